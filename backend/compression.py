@@ -0,0 +1,280 @@
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Any
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 설치 환경에 따라 다름
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 설치 환경에 따라 다름
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# 이미 압축된 형식이거나 이벤트마다 바로 보내야 하는 응답은 압축하지 않습니다.
+SKIPPED_MEDIA_TYPES = (
+    "application/gzip",
+    "application/zip",
+    "application/zstd",
+    "application/vnd.apache.parquet",
+    "application/vnd.openxmlformats",
+    "text/event-stream",
+    "image/",
+    "video/",
+    "audio/",
+)
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+ENCODERS = {
+    "zstd": (ZstdEncoder, zstandard is not None, "COMPRESSION_ZSTD_LEVEL", "3"),
+    "br": (BrotliEncoder, brotli is not None, "COMPRESSION_BROTLI_QUALITY", "4"),
+    "gzip": (GzipEncoder, True, "COMPRESSION_GZIP_LEVEL", "6"),
+}
+
+
+class CompressionStats:
+    """인코딩별 압축 응답 수, 압축 전후 바이트, 압축에 쓴 CPU 시간을 셉니다."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._encodings: dict[str, dict[str, float]] = {}
+        self._skipped: dict[str, int] = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        with self._guard:
+            entry = self._encodings.setdefault(
+                encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+            )
+            entry["responses"] += 1
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += bytes_out
+            entry["cpu_seconds"] += cpu_seconds
+
+    def skip(self, reason: str):
+        with self._guard:
+            self._skipped[reason] = self._skipped.get(reason, 0) + 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            encodings = {}
+            for name, entry in self._encodings.items():
+                encodings[name] = {
+                    **entry,
+                    "cpu_seconds": round(entry["cpu_seconds"], 6),
+                    "ratio": round(entry["bytes_in"] / entry["bytes_out"], 3) if entry["bytes_out"] else 0.0,
+                    "mb_per_cpu_second": (
+                        round(entry["bytes_in"] / entry["cpu_seconds"] / 1_000_000, 1) if entry["cpu_seconds"] else 0.0
+                    ),
+                }
+            return {"encodings": encodings, "skipped": dict(self._skipped)}
+
+
+compression_stats = CompressionStats()
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Accept-Encoding 헤더를 {인코딩: q} 로 읽습니다."""
+    accepted = {}
+    for part in header.split(","):
+        name, *params = [item.strip() for item in part.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.lower()] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """응답을 zstd/brotli/gzip 중 클라이언트가 받는 것으로 압축하는 ASGI 미들웨어.
+
+    COMPRESSION_MIN_SIZE보다 작은 응답은 그대로 보냅니다. 본문이 여러 조각으로 오는 스트리밍 응답(다운로드)은
+    한 인코더로 조각마다 이어서 압축하므로 전체를 모으지 않습니다. 큰 본문은 이벤트 루프를 막지 않도록
+    스레드에서 압축합니다.
+    """
+
+    def __init__(self, app: ASGIApp, stats: CompressionStats | None = None):
+        self.app = app
+        self.stats = stats or compression_stats
+        self.min_size = max(0, int(os.environ.get("COMPRESSION_MIN_SIZE", "1024")))
+        self.thread_threshold = int(os.environ.get("COMPRESSION_THREAD_THRESHOLD_BYTES", str(256 * 1024)))
+        preferred = os.environ.get("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+        self.encodings = []
+        for name in (item.strip().lower() for item in preferred.split(",")):
+            if name not in ENCODERS:
+                continue
+            encoder_class, available, level_env, default_level = ENCODERS[name]
+            if not available:
+                logger.info("압축 라이브러리가 없어 인코딩을 건너뜀", extra={"encoding": name})
+                continue
+            self.encodings.append((name, encoder_class, int(os.environ.get(level_env, default_level))))
+
+    def select_encoding(self, accept_encoding: str):
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best = None
+        best_quality = 0.0
+        for name, encoder_class, level in self.encodings:
+            quality = accepted.get(name, wildcard)
+            # q가 같으면 COMPRESSION_ENCODINGS 순서(압축률/속도가 좋은 순)를 따릅니다.
+            if quality > best_quality:
+                best, best_quality = (name, encoder_class, level), quality
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        selected = self.select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if selected is None:
+            self.stats.skip("not_accepted")
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressedResponder(self, selected, send))
+
+
+class CompressedResponder:
+    """한 응답의 send를 감싸 시작 메시지를 잠시 들고 있다가 첫 본문을 보고 압축 여부를 정합니다."""
+
+    def __init__(self, middleware: CompressionMiddleware, selected, send: Send):
+        self.middleware = middleware
+        self.name, self.encoder_class, self.level = selected
+        self.encoder = None
+        self.send = send
+        self.start_message: Message | None = None
+        self.buffer: list[bytes] = []
+        self.buffered_bytes = 0
+        self.passthrough = False
+        self.compressing = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").lower()
+            if "content-encoding" in headers:
+                self._skip("already_encoded")
+            elif any(media_type.startswith(prefix) for prefix in SKIPPED_MEDIA_TYPES):
+                self._skip("media_type")
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.compressing:
+            self.buffer.append(body)
+            self.buffered_bytes += len(body)
+            if more_body and self.buffered_bytes < self.middleware.min_size:
+                return
+            body = b"".join(self.buffer)
+            self.buffer.clear()
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.middleware.min_size:
+                self._skip("small")
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            self.compressing = True
+            self.encoder = self.encoder_class(self.level)
+            headers["Content-Encoding"] = self.name
+            if not more_body:
+                # 한 번에 끝나는 응답은 압축한 길이를 Content-Length로 보냅니다.
+                compressed = await self._compress(body, finish=True)
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+                self._record()
+                return
+            # 스트리밍 응답은 압축 후 길이를 미리 알 수 없으므로 청크 전송으로 보냅니다.
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self.send(self.start_message)
+
+        chunk = await self._compress(body, finish=not more_body)
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    def _skip(self, reason: str):
+        self.passthrough = True
+        self.middleware.stats.skip(reason)
+
+    def _record(self):
+        self.middleware.stats.record(self.name, self.bytes_in, self.bytes_out, self.cpu_seconds)
+
+    async def _compress(self, data: bytes, finish: bool) -> bytes:
+        if len(data) >= self.middleware.thread_threshold:
+            return await anyio.to_thread.run_sync(self._compress_sync, data, finish)
+        return self._compress_sync(data, finish)
+
+    def _compress_sync(self, data: bytes, finish: bool) -> bytes:
+        started = time.thread_time()
+        chunk = self.encoder.compress(data)
+        if finish:
+            chunk += self.encoder.finish()
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(data)
+        self.bytes_out += len(chunk)
+        return chunk
@@ -16,3 +16,27 @@ class FileTooLargeError(DataViewerError):
 
 class GeospatialDataError(DataViewerError):
     status_code = 422
+
+
+class DatasetNotFoundError(DataViewerError):
+    status_code = 404
+
+
+class QueryQueueFullError(DataViewerError):
+    status_code = 503
+
+
+class QueryCancelledError(DataViewerError):
+    status_code = 499
+
+
+class InvalidCursorError(DataViewerError):
+    status_code = 400
+
+
+class JobNotFoundError(DataViewerError):
+    status_code = 404
+
+
+class SheetNotFoundError(DataViewerError):
+    status_code = 404
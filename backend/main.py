@@ -3,12 +3,15 @@ import logging
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from compression import CompressionMiddleware
 from routers import dataviewer
 from logging_config import get_logging_config
 from logging.config import dictConfig
 
 LOG_FILE_PATH = os.getenv("LOG_FILE_PATH", "./logs/app.log")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# 2 이상이면 워커 프로세스마다 DataService를 따로 두고 SHARED_STATE_DIR로 dataset_id와 변환 작업을 공유합니다.
+WORKERS = max(1, int(os.getenv("DATAVIEWER_WORKERS", "1")))
 os.makedirs(os.path.dirname(LOG_FILE_PATH), exist_ok=True)
 
 dictConfig(get_logging_config(LOG_FILE_PATH, LOG_LEVEL))
@@ -29,6 +32,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 응답 압축 (Accept-Encoding에 따라 zstd/brotli/gzip)
+app.add_middleware(CompressionMiddleware)
+
 # 라우터 포함
 app.include_router(dataviewer.router)
 
@@ -43,5 +49,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=False,
+        workers=WORKERS,
         log_config=get_logging_config(LOG_FILE_PATH, LOG_LEVEL),
     )
\ No newline at end of file
@@ -1,4 +1,5 @@
 import re
+from typing import Literal
 from pydantic import BaseModel, Field, field_validator
 from config import MAX_QUERY_LENGTH, DANGEROUS_KEYWORDS
 
@@ -6,6 +7,7 @@ class LoadDatasetRequest(BaseModel):
     bucket_name: str
     file_name: str
     type: str = ""
+    sheet: str | None = None
 
 
 class MapPreviewRequest(BaseModel):
@@ -17,6 +19,7 @@ class MapPreviewRequest(BaseModel):
     limit: int = Field(default=1000, ge=1, le=5000)
     simplify_tolerance: float = Field(default=0.0, ge=0.0, le=5.0)
     fields: list[str] | None = None
+    zoom: float | None = Field(default=None, ge=0.0, le=24.0)
 
     @field_validator("bbox")
     @classmethod
@@ -32,9 +35,12 @@ class MapPreviewRequest(BaseModel):
 
 class QueryRequest(BaseModel):
     query: str
+    dataset_id: str
     bucket_name: str
     page: int
     page_size: int
+    pagination: Literal["offset", "cursor"] = "offset"
+    cursor: str | None = None
 
     @field_validator('query')
     def validate_query(cls, v):
@@ -53,7 +59,9 @@ class QueryRequest(BaseModel):
 
 class DownloadRequest(BaseModel):
     query: str
+    dataset_id: str
     bucket_name: str
+    format: Literal["csv", "csv.gz", "parquet", "arrow"] = "csv"
 
     @field_validator('query')
     def validate_query(cls, v):
@@ -1,18 +1,66 @@
+import asyncio
 import logging
-import io
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+import os
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from starlette.concurrency import run_in_threadpool
-from errors import DataViewerError
+from compression import compression_stats
+from errors import DataViewerError, QueryCancelledError
 from models import DownloadRequest, LoadDatasetRequest, MapPreviewRequest, QueryRequest
 from services.data_service import DataService
+from services.query_executor import CancelToken, QueryExecutor
+from services.streaming_export import EXPORT_FORMATS
+from services.table_encoding import dumps, encode_table_payload
 
 router = APIRouter(prefix="/dataviewer", tags=["DataViewer"])
 service = DataService()
+query_executor = QueryExecutor()
 logger = logging.getLogger(__name__)
 
+DISCONNECT_POLL_SECONDS = float(os.environ.get("QUERY_DISCONNECT_POLL_SECONDS", "0.5"))
+
+
+async def run_query(http_request: Request, func, *args, cancel_token: CancelToken | None = None):
+    """쿼리 실행기에서 작업을 실행하고, 클라이언트 연결이 끊기면 실행 중인 쿼리를 중단합니다."""
+    cancel_token = cancel_token or CancelToken()
+    future = query_executor.submit(func, *args, cancel_token=cancel_token)
+    waiter = asyncio.wrap_future(future)
+    while True:
+        done, _pending = await asyncio.wait({waiter}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            break
+        if await http_request.is_disconnected():
+            cancel_token.cancel()
+            future.cancel()
+            logger.info("클라이언트 연결 종료로 쿼리 취소")
+            raise QueryCancelledError("클라이언트 연결이 끊어져 쿼리를 취소했습니다.")
+    try:
+        return waiter.result()
+    except DataViewerError:
+        raise
+    except Exception:
+        if cancel_token.cancelled:
+            raise QueryCancelledError("클라이언트 연결이 끊어져 쿼리를 취소했습니다.")
+        raise
+
+
+def sse_event(event: str, payload: dict) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(payload) + b"\n\n"
+
+
+def table_response(payload: dict, http_request: Request) -> Response:
+    """표 응답을 jsonable_encoder 없이 바로 바이트로 보냅니다. Accept가 Arrow 스트림이면 Arrow IPC로 보냅니다."""
+    body, media_type = encode_table_payload(payload, http_request.headers.get("accept"))
+    return Response(body, media_type=media_type, headers={"Vary": "Accept"})
+
+
+def next_item(items):
+    return next(items, None)
+
+
 @router.post("/load_dataset")
-async def load_dataset(request: LoadDatasetRequest):
+async def load_dataset(request: LoadDatasetRequest, http_request: Request):
     try:
         logger.info(
             "/load_dataset 호출",
@@ -20,18 +68,21 @@ async def load_dataset(request: LoadDatasetRequest):
                 "bucket": request.bucket_name,
                 "file_name": request.file_name,
                 "storage_type": request.type or "minio",
+                "sheet": request.sheet,
                 "full_path": f"{request.bucket_name}/{request.file_name}"
             }
         )
         if request.type not in ('', 'nas', 'minio'):
             raise HTTPException(status_code=400, detail="type 파라미터는 'nas' 또는 'minio'만 허용됩니다.")
         
-        return await run_in_threadpool(
+        details = await run_in_threadpool(
             service.get_dataset_details,
             request.bucket_name,
             request.file_name,
             request.type,
+            request.sheet,
         )
+        return table_response(details, http_request)
     except DataViewerError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     except FileNotFoundError as e:
@@ -52,11 +103,12 @@ async def map_preview(request: MapPreviewRequest):
                 "layer": request.layer,
                 "limit": request.limit,
                 "bbox": request.bbox,
+                "zoom": request.zoom,
             },
         )
         if request.type not in ("", "nas", "minio"):
             raise HTTPException(status_code=400, detail="type 파라미터는 'nas' 또는 'minio'만 허용됩니다.")
-        return await run_in_threadpool(
+        preview = await run_in_threadpool(
             service.get_map_preview,
             bucket_name=request.bucket_name,
             file_name=request.file_name,
@@ -66,7 +118,10 @@ async def map_preview(request: MapPreviewRequest):
             limit=request.limit,
             simplify_tolerance=request.simplify_tolerance,
             fields=request.fields,
+            zoom=request.zoom,
         )
+        # 프로세스 풀에서 만든 Feature는 이미 JSON 조각이고, 좌표는 numpy 배열이므로 orjson으로 한 번에 직렬화합니다.
+        return Response(dumps(preview), media_type="application/json")
     except DataViewerError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     except FileNotFoundError as e:
@@ -76,11 +131,97 @@ async def map_preview(request: MapPreviewRequest):
         raise HTTPException(status_code=500, detail=f"Failed to preview map: {str(e)}")
 
 
+@router.get("/tiles/{layer:path}/{z}/{x}/{y}.mvt")
+async def map_tile(
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    bucket_name: str,
+    file_name: str,
+    type: str = "",
+    fields: list[str] | None = Query(default=None),
+):
+    """SHP 레이어의 Mapbox Vector Tile. layer는 /load_dataset이 돌려준 레이어 id이며, "_"는 첫 레이어입니다."""
+    if type not in ("", "nas", "minio"):
+        raise HTTPException(status_code=400, detail="type 파라미터는 'nas' 또는 'minio'만 허용됩니다.")
+    try:
+        tile = await run_in_threadpool(
+            service.get_map_tile,
+            bucket_name,
+            file_name,
+            type,
+            None if layer == "_" else layer,
+            z,
+            x,
+            y,
+            fields,
+        )
+        headers = {"Cache-Control": "public, max-age=3600"}
+        if not tile:
+            return Response(status_code=204, headers=headers)
+        return Response(tile, media_type="application/vnd.mapbox-vector-tile", headers=headers)
+    except DataViewerError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e) or "File not found")
+    except Exception as e:
+        logger.exception("map_tile 실패")
+        raise HTTPException(status_code=500, detail=f"Failed to render tile: {str(e)}")
+
+
+@router.get("/stats")
+async def get_stats():
+    return {
+        "datasets": service.registry.stats(),
+        "result_cache": service.result_cache.stats(),
+        "object_cache": service.object_cache.stats(),
+        "object_metadata": service.object_metadata.stats(),
+        "s3_reader": service.s3_reader.stats(),
+        "materialization": service.materialization_queue.stats(),
+        "shared_state": service.shared_state.stats(),
+        "query_executor": query_executor.stats(),
+        "cpu_pool": service.cpu_pool.stats(),
+        "vector_tiles": service.geospatial_service.tile_builder.stats(),
+        "spatial_index": service.geospatial_service.spatial_indexes.stats(),
+        "crs_cache": service.geospatial_service.crs_cache.stats(),
+        "layer_catalog": service.geospatial_service.layer_catalog.stats(),
+        "lod_pyramid": service.geospatial_service.lod_pyramid.stats(),
+        "compression": compression_stats.stats(),
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    try:
+        return service.get_materialization_status(job_id)
+    except DataViewerError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
 @router.post("/page")
-async def get_page(request: QueryRequest):
+async def get_page(request: QueryRequest, http_request: Request):
     try:
-        logger.info("/page 호출", extra={"bucket": request.bucket_name, "page": request.page, "size": request.page_size})
-        return service.get_paged_data(request.query, request.page, request.page_size)
+        logger.info(
+            "/page 호출",
+            extra={
+                "bucket": request.bucket_name,
+                "dataset_id": request.dataset_id,
+                "page": request.page,
+                "size": request.page_size,
+            },
+        )
+        page = await run_query(
+            http_request,
+            service.get_paged_data,
+            request.dataset_id,
+            request.query,
+            request.page,
+            request.page_size,
+            request.cursor,
+            request.pagination == "cursor",
+        )
+        return table_response(page, http_request)
     except DataViewerError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
@@ -88,30 +229,96 @@ async def get_page(request: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Failed to get page: {str(e)}")
 
 @router.post("/query")
-async def execute_query(request: QueryRequest):
+async def execute_query(request: QueryRequest, http_request: Request):
     try:
-        logger.info("/query 호출", extra={"bucket": request.bucket_name})
-        return service.execute_query(request.query)
+        logger.info("/query 호출", extra={"bucket": request.bucket_name, "dataset_id": request.dataset_id})
+        result = await run_query(http_request, service.execute_query, request.dataset_id, request.query)
+        return table_response(result, http_request)
     except DataViewerError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.exception("execute_query 실패")
         raise HTTPException(status_code=500, detail=f"Failed to execute query: {str(e)}")
 
+@router.post("/query/stream")
+async def stream_query(request: QueryRequest, http_request: Request):
+    """첫 행과 추정 건수를 바로 보내고, 정확한 건수와 분포를 server-sent events로 이어서 보냅니다."""
+    try:
+        logger.info("/query/stream 호출", extra={"bucket": request.bucket_name, "dataset_id": request.dataset_id})
+        cancel_token = CancelToken()
+        events = service.stream_query(request.dataset_id, request.query, cancel_token=cancel_token)
+        # 첫 이벤트까지는 일반 요청처럼 실행해 데이터셋/쿼리 오류를 HTTP 상태 코드로 돌려줍니다.
+        first = await run_query(http_request, next_item, events, cancel_token=cancel_token)
+    except DataViewerError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.exception("stream_query 실패")
+        raise HTTPException(status_code=500, detail=f"Failed to execute query: {str(e)}")
+
+    async def event_stream():
+        item = first
+        try:
+            while item is not None:
+                yield sse_event(*item)
+                item = await run_query(http_request, next_item, events, cancel_token=cancel_token)
+            yield sse_event("done", {})
+        except QueryCancelledError:
+            return
+        except DataViewerError as e:
+            yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.exception("stream_query 실패")
+            yield sse_event("error", {"status": 500, "detail": f"Failed to execute query: {str(e)}"})
+        finally:
+            cancel_token.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/download")
-async def download_csv(request: DownloadRequest):
+async def download_csv(request: DownloadRequest, http_request: Request):
     try:
-        logger.info("/download 호출", extra={"bucket": request.bucket_name})
-        csv_bytes = service.download_query(request.query)
-        return StreamingResponse(
-            io.BytesIO(csv_bytes),
-            media_type="text/csv; charset=utf-8",
-            headers={
-                "Content-Disposition": "attachment; filename=download.csv"
-            }
+        logger.info(
+            "/download 호출",
+            extra={"bucket": request.bucket_name, "dataset_id": request.dataset_id, "format": request.format},
+        )
+        cancel_token = CancelToken()
+        chunks = await run_query(
+            http_request,
+            service.download_query,
+            request.dataset_id,
+            request.query,
+            request.format,
+            cancel_token=cancel_token,
         )
     except DataViewerError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.exception("download_csv 실패")
         raise HTTPException(status_code=500, detail=f"Failed to download: {str(e)}")
+
+    async def export_stream():
+        # 청크마다 쿼리 실행기를 거쳐 작업자 수/대기열 제한을 지키고, 연결이 끊기면 내보내기를 멈춥니다.
+        try:
+            while (chunk := await run_query(http_request, next_item, chunks, cancel_token=cancel_token)) is not None:
+                yield chunk
+        except QueryCancelledError:
+            return
+        except Exception:
+            logger.exception("download_csv 스트리밍 실패")
+            raise
+        finally:
+            cancel_token.cancel()
+
+    media_type, extension = EXPORT_FORMATS[request.format]
+    return StreamingResponse(
+        export_stream(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=download.{extension}"
+        }
+    )
@@ -0,0 +1,77 @@
+import argparse
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import shapefile
+from pyproj import CRS, Transformer
+
+from services.cpu_pool import CpuPool
+from services.geospatial_service import GeospatialService
+
+
+def write_polygons(base_path: Path, features: int, vertices: int):
+    """EPSG:5179 좌표의 다각형 레이어를 만듭니다. 좌표 변환과 단순화가 실제 부하가 되도록 꼭짓점을 많이 둡니다."""
+    to_projected = Transformer.from_crs(4326, 5179, always_xy=True)
+    columns = math.ceil(math.sqrt(features))
+    with shapefile.Writer(base_path, shapeType=shapefile.POLYGON, encoding="utf-8") as writer:
+        writer.field("name", "C", size=20)
+        writer.field("value", "N", size=12, decimal=0)
+        for index in range(features):
+            center_x = 126.5 + (index % columns) * 0.01
+            center_y = 35.0 + (index // columns) * 0.01
+            ring = []
+            for step in range(vertices):
+                angle = 2 * math.pi * step / vertices
+                radius = 0.004 * (1 + 0.2 * math.sin(angle * 7))
+                ring.append(to_projected.transform(center_x + radius * math.cos(angle), center_y + radius * math.sin(angle)))
+            # SHP 외곽 링은 시계 방향입니다.
+            ring.reverse()
+            ring.append(ring[0])
+            writer.poly([ring])
+            writer.record(f"f{index}", index)
+    base_path.with_suffix(".prj").write_text(CRS.from_epsg(5179).to_wkt(), encoding="utf-8")
+
+
+def run(root: Path, workers: int, clients: int, requests: int, limit: int) -> float:
+    os.environ["CPU_POOL_WORKERS"] = str(workers)
+    os.environ["GEO_CACHE_DIR"] = str(root / f"cache-{workers}")
+    pool = CpuPool()
+    service = GeospatialService(None, str(root), cpu_pool=pool)
+    try:
+        service.get_preview("bench", "polygons.shp", "nas", limit=limit)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(lambda _: service.get_preview("bench", "polygons.shp", "nas", limit=limit), range(requests)))
+        return requests / (time.perf_counter() - started)
+    finally:
+        pool.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="지도 미리보기 GeoJSON 생성의 CPU 작업 프로세스 수별 처리량을 잽니다.")
+    parser.add_argument("--features", type=int, default=5000)
+    parser.add_argument("--vertices", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="동시에 미리보기를 요청하는 스레드 수")
+    parser.add_argument("--requests", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        (root / "bench").mkdir()
+        write_polygons(root / "bench" / "polygons", args.features, args.vertices)
+        baseline = None
+        print(f"features={args.features} vertices={args.vertices} clients={args.clients} cpus={os.cpu_count()}")
+        for workers in args.workers:
+            throughput = run(root, workers, args.clients, args.requests, args.features)
+            baseline = baseline or throughput
+            label = "스레드(풀 없음)" if workers == 0 else f"프로세스 {workers}개"
+            print(f"{label:>14}: {throughput:6.2f} previews/s  x{throughput / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from scripts.benchmark_cpu_pool import write_polygons
+from services.geospatial_service import GeospatialService
+
+
+def measure(root: Path, cache_size: int, requests: int, bbox: tuple[float, float, float, float]) -> list[float]:
+    os.environ["GEO_CRS_CACHE_SIZE"] = str(cache_size)
+    os.environ["GEO_TRANSFORMER_CACHE_SIZE"] = str(cache_size)
+    os.environ["GEO_CACHE_DIR"] = str(root / f"cache-{cache_size}")
+    service = GeospatialService(None, str(root))
+    # 첫 요청은 캐시 디렉터리와 공간 인덱스를 만드므로 재지 않습니다.
+    service.get_preview("bench", "polygons.shp", "nas", bbox=bbox, limit=100)
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        service.get_preview("bench", "polygons.shp", "nas", bbox=bbox, limit=100)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="좌표계/Transformer 캐시 유무에 따른 작은 bbox 미리보기 지연 시간을 잽니다.")
+    parser.add_argument("--features", type=int, default=2500)
+    parser.add_argument("--vertices", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    bbox = (126.5, 35.0, 126.52, 35.02)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        (root / "bench").mkdir()
+        write_polygons(root / "bench" / "polygons", args.features, args.vertices)
+        print(f"features={args.features} vertices={args.vertices} requests={args.requests} bbox={bbox}")
+        medians = {}
+        for label, cache_size in (("캐시 없음", 0), ("캐시 사용", 64)):
+            timings = measure(root, cache_size, args.requests, bbox)
+            medians[label] = statistics.median(timings)
+            print(f"{label:>8}: median {medians[label]:7.3f} ms  p95 {statistics.quantiles(timings, n=20)[-1]:7.3f} ms")
+        saved = medians["캐시 없음"] - medians["캐시 사용"]
+        print(f"미리보기 한 번당 절감: {saved:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
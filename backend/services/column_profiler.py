@@ -0,0 +1,220 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any
+
+import duckdb
+import numpy as np
+import polars as pl
+
+# 고유값이 이 수 이하인 숫자 컬럼은 값 자체를 막대로 그립니다.
+DISCRETE_NUMERIC_LIMIT = 20
+MAX_HISTOGRAM_BINS = 20
+
+
+@dataclass
+class ColumnPlan:
+    name: str
+    kind: str  # "categorical" | "numeric"
+    index: int
+    stats: dict[str, Any] = field(default_factory=dict)
+    top_values: list | None = None
+    value_counts: dict[Any, int] = field(default_factory=dict)
+    bin_counts: dict[int, int] = field(default_factory=dict)
+    bins: int = 0
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class ColumnProfiler:
+    """DuckDB 집계 두 번으로 모든 컬럼의 분포를 계산합니다.
+
+    1차 집계에서 건수/최솟값/최댓값/사분위/근사 고유값 수/상위 범주를 한 번에 구하고,
+    2차 집계에서 GROUPING SETS로 범주 빈도와 히스토그램 구간 빈도를 한 번에 셉니다.
+    결과는 기존 ``distributions`` 응답 형식과 같습니다.
+    """
+
+    def __init__(self, max_categories: int = 20):
+        self.max_categories = max_categories
+
+    def profile(self, con: duckdb.DuckDBPyConnection, query: str, approximate: bool = False) -> dict[str, Any]:
+        source = f"({query}) AS profile_src"
+        schema = con.execute(f"SELECT * FROM {source} LIMIT 0").pl().schema
+        plans = self._plan_columns(schema)
+        if not plans:
+            return {}
+
+        self._collect_stats(con, source, plans, approximate)
+        plans = [plan for plan in plans if plan.stats.get("count")]
+        if not plans:
+            return {}
+        self._collect_counts(con, source, plans)
+
+        distributions = {}
+        for plan in plans:
+            if plan.kind == "categorical":
+                distribution = self._categorical_distribution(plan)
+            else:
+                distribution = self._numeric_distribution(plan)
+            if distribution is not None:
+                distributions[plan.name] = distribution
+        return distributions
+
+    def _plan_columns(self, schema: pl.Schema) -> list[ColumnPlan]:
+        plans = []
+        for name, dtype in schema.items():
+            dtype_str = str(dtype).lower()
+            if "string" in dtype_str or "categorical" in dtype_str or "bool" in dtype_str:
+                plans.append(ColumnPlan(name, "categorical", len(plans)))
+            elif "int" in dtype_str or "float" in dtype_str:
+                plans.append(ColumnPlan(name, "numeric", len(plans)))
+        return plans
+
+    def _value_sql(self, plan: ColumnPlan) -> str:
+        column = quote_identifier(plan.name)
+        if plan.kind == "numeric":
+            # NaN/Infinity는 분포에서 제외합니다.
+            return f"CASE WHEN isfinite({column}::DOUBLE) THEN {column}::DOUBLE END"
+        return column
+
+    def _collect_stats(self, con, source: str, plans: list[ColumnPlan], approximate: bool):
+        quantile = "reservoir_quantile" if approximate else "quantile_cont"
+        aggregates = []
+        for plan in plans:
+            value = self._value_sql(plan)
+            prefix = f"c{plan.index}"
+            aggregates.append(f"count({value}) AS {prefix}_count")
+            if plan.kind == "categorical":
+                aggregates.append(f"approx_top_k({value}, {self.max_categories}) AS {prefix}_top")
+            else:
+                aggregates.extend(
+                    [
+                        f"min({value}) AS {prefix}_min",
+                        f"max({value}) AS {prefix}_max",
+                        f"{quantile}({value}, [0.25, 0.75]) AS {prefix}_quartiles",
+                        f"approx_count_distinct({value}) AS {prefix}_distinct",
+                    ]
+                )
+
+        result = con.execute(f"SELECT {', '.join(aggregates)} FROM {source}")
+        names = [column[0] for column in result.description]
+        row = dict(zip(names, result.fetchone()))
+        for plan in plans:
+            prefix = f"c{plan.index}"
+            plan.stats = {
+                key[len(prefix) + 1:]: value
+                for key, value in row.items()
+                if key.startswith(prefix + "_")
+            }
+            if plan.kind == "categorical":
+                plan.top_values = [value for value in (plan.stats.get("top") or []) if value is not None]
+
+    def _collect_counts(self, con, source: str, plans: list[ColumnPlan]):
+        buckets = []
+        params = []
+        for plan in plans:
+            value = self._value_sql(plan)
+            if plan.kind == "categorical":
+                if not plan.top_values:
+                    continue
+                buckets.append((plan, "value", f"CASE WHEN list_contains(?, {value}) THEN {value} END"))
+                params.append(plan.top_values)
+                continue
+
+            minimum, maximum = plan.stats["min"], plan.stats["max"]
+            if plan.stats["distinct"] <= DISCRETE_NUMERIC_LIMIT * 2:
+                # HyperLogLog 오차를 감안해 여유 있게 실제 값별 빈도도 같이 셉니다.
+                buckets.append((plan, "value", value))
+            if maximum > minimum:
+                plan.bins = self._histogram_bins(plan)
+                # 곱하기 전에 나누면 구간 경계에 정확히 놓인 값이 앞 구간으로 밀리므로 나누기를 마지막에 합니다.
+                # least()는 NULL을 무시하므로 NULL/NaN 행은 CASE로 따로 걸러냅니다.
+                position = f"floor(({value} - ({minimum!r})) * {plan.bins} / ({maximum - minimum!r}))::BIGINT"
+                buckets.append(
+                    (
+                        plan,
+                        "bin",
+                        f"CASE WHEN {value} IS NOT NULL THEN least({position}, {plan.bins - 1}) END",
+                    )
+                )
+
+        if not buckets:
+            return
+        aliases = [f"b{position}" for position in range(len(buckets))]
+        select_sql = ", ".join(f"{sql} AS {alias}" for (_plan, _kind, sql), alias in zip(buckets, aliases))
+        grouping_sets = ", ".join(f"({alias})" for alias in aliases)
+        rows = con.execute(
+            f"SELECT {', '.join(aliases)}, count(*) AS n "
+            f"FROM (SELECT {select_sql} FROM {source}) AS buckets "
+            f"GROUP BY GROUPING SETS ({grouping_sets})",
+            params,
+        ).fetchall()
+
+        for row in rows:
+            count = row[-1]
+            for (plan, kind, _sql), key in zip(buckets, row[:-1]):
+                if key is None:
+                    continue
+                if kind == "value":
+                    plan.value_counts[key] = count
+                else:
+                    plan.bin_counts[int(key)] = count
+                break
+
+    def _histogram_bins(self, plan: ColumnPlan) -> int:
+        count = plan.stats["count"]
+        minimum, maximum = plan.stats["min"], plan.stats["max"]
+        quartiles = plan.stats.get("quartiles") or [None, None]
+        num_bins = MAX_HISTOGRAM_BINS
+        if count >= 2 and quartiles[0] is not None and quartiles[1] is not None:
+            iqr = quartiles[1] - quartiles[0]
+            if iqr > 0:
+                # Freedman–Diaconis 규칙
+                bin_width = 2 * iqr * (count ** (-1 / 3))
+                num_bins = min(MAX_HISTOGRAM_BINS, int(math.ceil((maximum - minimum) / bin_width)))
+        return max(2, num_bins)
+
+    def _categorical_distribution(self, plan: ColumnPlan) -> dict[str, Any]:
+        ordered = sorted(plan.value_counts.items(), key=lambda item: item[1], reverse=True)
+        ordered = ordered[: self.max_categories]
+        return {
+            "type": "categorical",
+            "counts": [count for _value, count in ordered],
+            "labels": [str(value) for value, _count in ordered],
+        }
+
+    def _numeric_distribution(self, plan: ColumnPlan) -> dict[str, Any] | None:
+        count = plan.stats["count"]
+        unique_values = sorted(plan.value_counts)
+        # 값별 빈도는 근사 고유값 수가 작을 때만 세므로, 있으면 정확한 고유값 목록입니다.
+        exact_unique = bool(plan.value_counts)
+
+        if exact_unique and len(unique_values) == 1:
+            return {
+                "type": "numeric",
+                "counts": [int(count)],
+                "labels": [f"{float(unique_values[0]):.6g}"],
+            }
+
+        if exact_unique and 1 < len(unique_values) <= DISCRETE_NUMERIC_LIMIT:
+            values = np.array(unique_values, dtype=float)
+            diff_mean = float(np.diff(values).mean())
+            bin_edges = list(values - diff_mean / 2)
+            bin_edges.append(values[-1] + diff_mean / 2)
+            weights = [plan.value_counts[value] for value in unique_values]
+            hist_counts, _ = np.histogram(values, bins=bin_edges, weights=weights)
+            return {
+                "type": "numeric",
+                "counts": [int(value) for value in hist_counts],
+                "labels": [f"{float(value):.6g}" for value in unique_values],
+            }
+
+        if count < 2 or not plan.bins:
+            return None
+        edges = np.linspace(plan.stats["min"], plan.stats["max"], plan.bins + 1)
+        return {
+            "type": "numeric",
+            "counts": [int(plan.bin_counts.get(index, 0)) for index in range(plan.bins)],
+            "labels": [f"{edge:.6g}" for edge in edges[:-1]],
+        }
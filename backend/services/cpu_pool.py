@@ -0,0 +1,109 @@
+import logging
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _default_workers() -> int:
+    # 요청 처리 스레드와 DuckDB가 쓸 코어를 남기고 절반(최대 4개)만 씁니다.
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+def _default_start_method() -> str:
+    # fork는 DuckDB/Polars/실행기 스레드가 도는 프로세스를 복제하므로 잠금이 걸린 채로 복제되어 멈출 수 있습니다.
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class CpuPool:
+    """GIL을 오래 잡는 순수 Python 작업(GeoJSON 생성 등)을 별도 프로세스에서 실행합니다.
+
+    CPU_POOL_WORKERS=0이면 꺼져 호출한 스레드에서 바로 실행합니다. 입력과 결과는 Arrow IPC 바이트로
+    주고받아 큰 Python 객체를 pickle하지 않습니다. 기본 시작 방식은 forkserver(없으면 spawn)라 스레드가 돈 뒤에도
+    안전하게 작업 프로세스를 띄우므로 처음 쓸 때 띄웁니다. fork를 고르면 DuckDB 등이 스레드를 만들기 전에
+    생성자에서 미리 띄우고, 풀이 깨지면 다시 fork하지 않고 호출한 스레드에서 실행합니다.
+    """
+
+    def __init__(self):
+        self.max_workers = max(0, int(os.environ.get("CPU_POOL_WORKERS", str(_default_workers()))))
+        self.min_items = max(1, int(os.environ.get("CPU_POOL_MIN_ITEMS", "200")))
+        self.start_method = os.environ.get("CPU_POOL_START_METHOD", _default_start_method())
+        self._executor: ProcessPoolExecutor | None = None
+        self._guard = threading.Lock()
+        self._broken = False
+        self.tasks = 0
+        self.inline_tasks = 0
+        self.failures = 0
+        if self.enabled and self.start_method == "fork":
+            self._ensure_executor().submit(_warm_up).result()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0 and not self._broken
+
+    def map(self, func: Callable[[bytes], bytes], tasks: list[bytes]) -> list[bytes]:
+        """작업을 프로세스 풀에 나눠 실행하고 결과를 입력 순서대로 돌려줍니다. 풀이 깨지면 이번 요청은 직접 실행합니다."""
+        if not self.enabled:
+            with self._guard:
+                self.inline_tasks += len(tasks)
+            return [func(task) for task in tasks]
+        executor = self._ensure_executor()
+        try:
+            futures = [executor.submit(func, task) for task in tasks]
+            results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            logger.warning("CPU 작업 프로세스 풀이 중단되어 현재 스레드에서 실행합니다", exc_info=True)
+            with self._guard:
+                self.failures += 1
+                if self._executor is executor:
+                    self._executor = None
+                # 이미 스레드가 도는 프로세스에서 다시 fork하면 멈출 수 있으므로 fork 풀은 되살리지 않습니다.
+                self._broken = self.start_method == "fork"
+                self.inline_tasks += len(tasks)
+            executor.shutdown(wait=False, cancel_futures=True)
+            return [func(task) for task in tasks]
+        with self._guard:
+            self.tasks += len(tasks)
+        return results
+
+    def split(self, items: list, min_chunk: int = 1) -> list[list]:
+        """작업자 수에 맞춰 목록을 고르게 나눕니다."""
+        if not items:
+            return []
+        chunks = max(1, min(self.max_workers or 1, len(items) // max(1, min_chunk)))
+        size = -(-len(items) // chunks)
+        return [items[start:start + size] for start in range(0, len(items), size)]
+
+    def stats(self) -> dict[str, int | str]:
+        with self._guard:
+            return {
+                "max_workers": self.max_workers,
+                "start_method": self.start_method,
+                "enabled": self.enabled,
+                "tasks": self.tasks,
+                "inline_tasks": self.inline_tasks,
+                "failures": self.failures,
+            }
+
+    def shutdown(self, wait: bool = False):
+        with self._guard:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        with self._guard:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+            return self._executor
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from pyproj import CRS, Transformer
+
+
+class CrsCache:
+    """해석한 CRS와 만든 Transformer를 크기 제한 LRU로 보관해 요청마다 다시 만들지 않게 합니다.
+
+    CRS는 PRJ(WKT) 내용의 해시나 EPSG 코드로, Transformer는 (원본, 대상) CRS 정의로 찾습니다.
+    pyproj 3.1 이후 CRS/Transformer는 스레드마다 내부 객체를 따로 두므로 여러 스레드가 함께 써도 됩니다.
+    캐시 크기를 0으로 두면 캐시하지 않습니다(벤치마크 비교용).
+    """
+
+    def __init__(self):
+        self.max_crs = max(0, int(os.environ.get("GEO_CRS_CACHE_SIZE", "64")))
+        self.max_transformers = max(0, int(os.environ.get("GEO_TRANSFORMER_CACHE_SIZE", "64")))
+        self._crs: OrderedDict[str, CRS] = OrderedDict()
+        self._transformers: OrderedDict[tuple[str, str], Transformer] = OrderedDict()
+        self._guard = threading.Lock()
+        self._counts = {"crs_hits": 0, "crs_misses": 0, "transformer_hits": 0, "transformer_misses": 0}
+
+    def from_wkt(self, wkt: str) -> CRS:
+        """WKT를 해석합니다. 해석 오류(pyproj.exceptions.CRSError)는 캐시하지 않고 그대로 올립니다."""
+        key = "wkt:" + hashlib.sha256(wkt.encode("utf-8")).hexdigest()
+        return self._get_crs(key, lambda: CRS.from_wkt(wkt))
+
+    def from_epsg(self, code: int) -> CRS:
+        return self._get_crs(f"epsg:{code}", lambda: CRS.from_epsg(code))
+
+    def transformer(self, source: CRS, target: CRS) -> Transformer:
+        """always_xy(경도, 위도 순서) Transformer."""
+        key = (source.srs, target.srs)
+        with self._guard:
+            transformer = self._transformers.get(key)
+            if transformer is not None:
+                self._transformers.move_to_end(key)
+                self._counts["transformer_hits"] += 1
+                return transformer
+            self._counts["transformer_misses"] += 1
+
+        transformer = Transformer.from_crs(source, target, always_xy=True)
+        with self._guard:
+            self._store(self._transformers, key, transformer, self.max_transformers)
+        return transformer
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            return {"crs": len(self._crs), "transformers": len(self._transformers), **self._counts}
+
+    def _get_crs(self, key: str, parse) -> CRS:
+        with self._guard:
+            crs = self._crs.get(key)
+            if crs is not None:
+                self._crs.move_to_end(key)
+                self._counts["crs_hits"] += 1
+                return crs
+            self._counts["crs_misses"] += 1
+
+        # 해석은 잠금 밖에서 합니다. 같은 키를 동시에 해석하면 나중 결과로 덮어쓸 뿐입니다.
+        crs = parse()
+        with self._guard:
+            self._store(self._crs, key, crs, self.max_crs)
+        return crs
+
+    def _store(self, entries: OrderedDict, key, value, limit: int):
+        if limit <= 0:
+            return
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > limit:
+            entries.popitem(last=False)
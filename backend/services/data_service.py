@@ -1,17 +1,68 @@
-import os
+import codecs
+import contextvars
+import hashlib
 import io
+import os
 import re
-from datetime import timedelta
+import shutil
+import tempfile
+import threading
+import uuid
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
-import requests
+import orjson
 import polars as pl
 import duckdb
-import numpy as np
 from minio import Minio
 from minio.error import S3Error
 
-from errors import DataViewerError, FileTooLargeError, UnsupportedFileTypeError
+from errors import (
+    DataViewerError,
+    DatasetNotFoundError,
+    FileTooLargeError,
+    InvalidCursorError,
+    QueryCancelledError,
+    UnsupportedFileTypeError,
+)
+from services.column_profiler import ColumnProfiler
+from services.cpu_pool import CpuPool
+from services.dataset_registry import DatasetHandle, DatasetRegistry
+from services.excel_reader import list_sheets, read_preview, resolve_sheet, write_sheet_parquet
+from services.materialization import JOB_DONE, MaterializationJob, MaterializationQueue, MaterializedParquet
+from services.multi_file import (
+    PartFile,
+    is_multi_file,
+    list_minio_objects,
+    list_nas_files,
+    read_parquet_footers,
+    split_pattern,
+)
+from services.object_cache import ObjectCache
+from services.object_metadata import CountingMinioClient, ObjectMetadataCache, UploadedObject, count_storage_calls
+from services.pagination import (
+    PAGE_KEY_COLUMN,
+    ROW_KEY_COLUMN,
+    ROW_KEY_RELATION,
+    OrderKey,
+    PageCursor,
+    decode_cursor,
+    encode_cursor,
+    keyset_predicate,
+    order_by_sql,
+    normalize_keyset_values,
+    null_tail_predicate,
+    query_fingerprint,
+    row_key_query,
+    split_order_by,
+)
+from services.query_executor import CancelToken
+from services.result_cache import ResultCache, normalize_query
+from services.s3_reader import DuckDBS3Reader
+from services.shared_state import SharedStateStore
+from services.streaming_export import iter_export
+from services.table_encoding import TableData
 from services.geospatial_service import GeospatialService
 from config import (
     MINIO_ENDPOINT,
@@ -25,22 +76,62 @@ logger = logging.getLogger(__name__)
 SUPPORTED_FILE_TYPES = {"csv", "tsv", "psv", "txt", "xlsx", "xls", "parquet"}
 DELIMITED_FILE_TYPES = {"csv", "tsv", "psv", "txt"}
 EXCEL_FILE_TYPES = {"xlsx", "xls"}
+CSV_NULL_VALUES = ["", "NA", "N/A", "null", "NULL", "NaN", "nan", "-", "—"]
+# 집계/LIMIT/중복 제거/조인이 있는 쿼리는 샘플 건수를 전체 비율로 늘려도 결과 건수가 되지 않습니다.
+NON_SCALING_QUERY = re.compile(
+    r"\b(?:limit|group\s+by|distinct|join|union|intersect|except|having|qualify)\b|\b(?:count|sum|avg|min|max)\s*\(",
+    flags=re.IGNORECASE,
+)
 
 
 class DataService:
     def __init__(self):
+        # CPU_POOL_START_METHOD=fork를 고르면 DuckDB 스레드가 생기기 전에 작업 프로세스를 띄워야 하므로 가장 먼저 만듭니다.
+        self.cpu_pool = CpuPool()
         self.minio_client = self._init_minio()
-        self.url = ""
         self.con = duckdb.connect()
-        self.geospatial_service = GeospatialService(self.minio_client, NAS_ROOT_PATH)
-        self.use_duckdb_view = False
-        self.total_rows_cache = None
+        self.s3_reader = DuckDBS3Reader(self.con, MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY)
+        self.registry = DatasetRegistry(self.con)
+        self.result_cache = ResultCache()
+        self.object_cache = ObjectCache()
+        # 여러 워커로 띄우면 dataset_id와 변환 작업을 SHARED_STATE_DIR의 공유 저장소로 조정합니다.
+        self.worker_count = max(1, int(os.environ.get("DATAVIEWER_WORKERS", "1")))
+        self.shared_state = SharedStateStore()
+        self.materialization_queue = MaterializationQueue(self.shared_state)
+        self._reopen_locks: dict[str, threading.Lock] = {}
+        self._reopen_locks_guard = threading.Lock()
+        self.geospatial_service = GeospatialService(
+            self.minio_client, NAS_ROOT_PATH, self.object_metadata, self.cpu_pool
+        )
         self.large_file_threshold_bytes = int(os.environ.get("LARGE_FILE_THRESHOLD_BYTES", str(256 * 1024 * 1024)))
-        self.large_sample_rows = int(os.environ.get("LARGE_SAMPLE_ROWS", "100000"))
-        self.max_excel_preview_bytes = int(os.environ.get("MAX_EXCEL_PREVIEW_BYTES", str(100 * 1024 * 1024)))
+        self.max_excel_preview_bytes = int(os.environ.get("MAX_EXCEL_PREVIEW_BYTES", str(2 * 1024 * 1024 * 1024)))
+        self.excel_preview_rows = int(os.environ.get("EXCEL_PREVIEW_ROWS", "1000"))
         self.max_distribution_categories = int(os.environ.get("MAX_DISTRIBUTION_CATEGORIES", "20"))
+        self.column_profiler = ColumnProfiler(self.max_distribution_categories)
         self.max_page_size = int(os.environ.get("MAX_PAGE_SIZE", "100"))
         self.duckdb_csv_sample_size = int(os.environ.get("DUCKDB_CSV_SAMPLE_SIZE", "200000"))
+        self.export_batch_rows = int(os.environ.get("EXPORT_BATCH_ROWS", "100000"))
+        self.parquet_row_group_rows = int(os.environ.get("PARQUET_ROW_GROUP_ROWS", "122880"))
+        self.parquet_compression = os.environ.get("PARQUET_COMPRESSION", "zstd")
+        self.count_estimate_sample_rows = int(os.environ.get("COUNT_ESTIMATE_SAMPLE_ROWS", "100000"))
+        self.multi_file_max_files = int(os.environ.get("MULTI_FILE_MAX_FILES", "5000"))
+        self.multi_file_max_workers = max(1, int(os.environ.get("MULTI_FILE_MAX_WORKERS", "8")))
+
+    @property
+    def minio_client(self):
+        return self._minio_client
+
+    @minio_client.setter
+    def minio_client(self, client):
+        # 호출 수를 세는 클라이언트로 감싸고, 메타데이터 캐시와 지도 서비스도 같은 클라이언트를 보게 합니다.
+        if client is not None and not isinstance(client, CountingMinioClient):
+            client = CountingMinioClient(client)
+        self._minio_client = client
+        self.object_metadata = ObjectMetadataCache(client)
+        geospatial_service = getattr(self, "geospatial_service", None)
+        if geospatial_service is not None:
+            geospatial_service.minio_client = client
+            geospatial_service.object_metadata = self.object_metadata
 
     def _is_integer_dtype(self, dtype: pl.DataType) -> bool:
         integer_dtypes = {pl.Int8, pl.Int16, pl.Int32, pl.Int64, pl.UInt8, pl.UInt16, pl.UInt32, pl.UInt64}
@@ -60,22 +151,8 @@ class DataService:
     def _sql_string_literal(self, value: str) -> str:
         return value.replace("'", "''")
 
-    def _reset_dataset_state(self):
-        self.url = ""
-        self.use_duckdb_view = False
-        self.total_rows_cache = None
-        try:
-            self.con.unregister("df")
-        except Exception:
-            pass
-        try:
-            self.con.execute("DROP VIEW IF EXISTS df")
-        except Exception:
-            pass
-        try:
-            self.con.execute("DROP TABLE IF EXISTS df")
-        except Exception:
-            pass
+    def _source_fingerprint(self, storage: str, bucket_name: str, file_name: str, *versions) -> str:
+        return ":".join([storage, bucket_name, file_name, *(str(version) for version in versions)])
 
     def _get_extension(self, file_name: str) -> str:
         return os.path.splitext(file_name or "")[1].lower().lstrip(".")
@@ -116,21 +193,17 @@ class DataService:
         except OSError:
             return False
 
-    def _is_minio_cache_current(self, bucket_name: str, source_name: str, cache_name: str, source_stat) -> bool:
-        try:
-            cache_stat = self.minio_client.stat_object(bucket_name, cache_name)
-        except S3Error as exc:
-            if exc.code in ("NoSuchKey", "NoSuchObject", "NoSuchBucket"):
-                return False
-            raise
+    def _current_minio_cache_stat(self, bucket_name: str, source_name: str, cache_name: str, source_stat):
+        """원본보다 오래되지 않은 Parquet 캐시 객체의 stat을 돌려줍니다. 없거나 오래됐으면 None입니다."""
+        cache_stat = self.object_metadata.stat(bucket_name, cache_name)
+        if cache_stat is None or source_name == cache_name:
+            return cache_stat
 
         source_modified = getattr(source_stat, "last_modified", None)
         cache_modified = getattr(cache_stat, "last_modified", None)
-        if source_name == cache_name:
-            return True
-        if source_modified and cache_modified:
-            return cache_modified >= source_modified
-        return True
+        if source_modified and cache_modified and cache_modified < source_modified:
+            return None
+        return cache_stat
 
     def _delimiter_candidates(self, ext: str):
         if ext == "tsv":
@@ -153,15 +226,22 @@ class DataService:
         option_sql = ", ".join(options)
         return f"read_csv_auto('{self._sql_string_literal(source)}', {option_sql})"
 
-    def _create_csv_view_with_fallback(self, source: str, ext: str, all_varchar: bool = False) -> pl.DataFrame:
+    def _create_csv_view_with_fallback(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        source: str,
+        ext: str,
+        all_varchar: bool = False,
+    ) -> pl.DataFrame:
         last_error = None
         best_cols_df = None
 
         for delimiter in self._delimiter_candidates(ext):
             try:
                 reader_sql = self._csv_reader_sql(source, ext, delimiter, all_varchar)
-                self.con.execute(f"CREATE OR REPLACE VIEW df AS SELECT * FROM {reader_sql}")
-                cols_df = self.con.execute("SELECT * FROM df LIMIT 0").pl()
+                con.execute(f"CREATE OR REPLACE TEMP VIEW df AS SELECT * FROM {reader_sql}")
+                self._drop_row_keys(con)
+                cols_df = con.execute("SELECT * FROM df LIMIT 0").pl()
                 if best_cols_df is None:
                     best_cols_df = cols_df
                 if len(cols_df.columns) > 1:
@@ -173,19 +253,36 @@ class DataService:
             return best_cols_df
 
         if not all_varchar:
-            return self._create_csv_view_with_fallback(source, ext, all_varchar=True)
+            return self._create_csv_view_with_fallback(con, source, ext, all_varchar=True)
 
         raise RuntimeError(f"구분자 기반 파일을 읽을 수 없습니다: {last_error}")
 
-    def _read_csv_dataframe_with_fallback(self, source: str, ext: str) -> pl.DataFrame:
-        self._create_csv_view_with_fallback(source, ext)
-        df = self.con.execute("SELECT * FROM df").pl()
-        self.con.execute("DROP VIEW IF EXISTS df")
-        return df
+    def _read_parquet_as_view(self, con: duckdb.DuckDBPyConnection, source: str) -> pl.DataFrame:
+        reader_sql = f"read_parquet('{self._sql_string_literal(source)}'"
+        con.execute(f"CREATE OR REPLACE TEMP VIEW df AS SELECT * FROM {reader_sql})")
+        try:
+            # 파일 안 행 번호는 Parquet 스캔까지 조건이 내려가므로 커서 페이지가 앞쪽 row group을 건너뜁니다.
+            con.execute(
+                f"CREATE OR REPLACE TEMP VIEW {ROW_KEY_RELATION} AS "
+                f"SELECT * EXCLUDE (file_row_number), file_row_number AS {ROW_KEY_COLUMN} "
+                f"FROM {reader_sql}, file_row_number=true)"
+            )
+        except duckdb.Error:
+            # 원본에 같은 이름의 열이 있으면 행 번호 없이 offset 커서로 읽습니다.
+            self._drop_row_keys(con)
+        return con.execute("SELECT * FROM df LIMIT 0").pl()
+
+    def _register_frame(self, con: duckdb.DuckDBPyConnection, df: pl.DataFrame):
+        """df로 프레임을 등록하고, 커서 페이지가 이어 읽을 행 번호를 붙인 df_rows도 함께 등록합니다."""
+        con.register("df", df)
+        if ROW_KEY_COLUMN in df.columns:
+            self._drop_row_keys(con)
+        else:
+            con.register(ROW_KEY_RELATION, df.with_row_index(ROW_KEY_COLUMN))
 
-    def _read_parquet_as_view(self, source: str) -> pl.DataFrame:
-        self.con.execute(f"CREATE OR REPLACE VIEW df AS SELECT * FROM read_parquet('{self._sql_string_literal(source)}')")
-        return self.con.execute("SELECT * FROM df LIMIT 0").pl()
+    def _drop_row_keys(self, con: duckdb.DuckDBPyConnection):
+        """행 번호를 붙일 수 없는 df(CSV 뷰, 여러 파일 뷰)로 바꿀 때 이전 df_rows가 남지 않게 지웁니다."""
+        con.execute(f"DROP VIEW IF EXISTS {ROW_KEY_RELATION}")
 
     def _rewrite_user_query(self, query: str) -> str:
         safe_query = query.replace(';', '').strip()
@@ -194,11 +291,6 @@ class DataService:
             rewritten = re.sub(r"\bdata\b", "df", safe_query, count=1, flags=re.IGNORECASE)
         return rewritten
 
-    def _sample_for_distributions(self, query: str = "SELECT * FROM df") -> pl.DataFrame:
-        try:
-            return self.con.execute(f"SELECT * FROM ({query}) AS sample_src LIMIT {self.large_sample_rows}").pl()
-        except Exception:
-            return self.con.execute("SELECT * FROM df LIMIT 10").pl()
     def _resolve_nas_path(self, bucket_name: str, file_name: str) -> str:
         if file_name.startswith('/'):
             file_name = file_name[1:]
@@ -209,43 +301,71 @@ class DataService:
             raise PermissionError("NAS 경로 이탈이 감지되었습니다.")
         return abs_path
 
-    def _read_csv_with_fallback(self, source, ext: str = "csv", **common_args) -> pl.DataFrame:
-        """CSV/TSV/TXT 계열 파일을 구분자와 인코딩 후보로 재시도합니다."""
-        best_df = None
-        last_error = None
+    def _convert_delimited_to_parquet(self, source: str, target: str, ext: str):
+        """구분자 기반 파일을 메모리에 올리지 않고 Polars 스트리밍 엔진으로 Parquet 캐시를 만듭니다.
 
-        for encoding in (None, "utf-8-sig", "euc-kr"):
-            for separator in self._delimiter_candidates(ext):
-                if hasattr(source, 'seek'):
-                    source.seek(0)
-                args = dict(common_args)
-                if encoding:
-                    args["encoding"] = encoding
-                if separator is not None:
-                    args["separator"] = separator
-                try:
-                    df = pl.read_csv(source, **args)
-                    if best_df is None:
-                        best_df = df
-                    if len(df.columns) > 1:
-                        return df
-                except Exception as exc:
-                    last_error = exc
-
-        if best_df is not None:
-            return best_df
-
-        if hasattr(source, 'seek'):
-            source.seek(0)
-        args = {k: v for k, v in common_args.items() if k != "ignore_errors"}
+        결측값 채우기까지 lazy 쿼리로 처리하며, 완성된 파일만 target으로 옮깁니다.
+        UTF-8이 아닌 파일은 임시 UTF-8 파일로 조금씩 변환한 뒤 다시 시도합니다.
+        """
+        temp_target = f"{target}.{uuid.uuid4().hex}.tmp"
+        transcoded = None
         try:
-            return pl.read_csv(source, dtypes=pl.Utf8, **args)
-        except Exception as exc:
-            raise RuntimeError(f"구분자 기반 파일을 읽을 수 없습니다: {last_error or exc}") from exc
+            try:
+                self._sink_delimited(source, temp_target, ext)
+            except (pl.exceptions.ComputeError, UnicodeDecodeError) as exc:
+                logger.info("UTF-8이 아닌 구분자 파일, 인코딩 변환 후 재시도", extra={"error": str(exc)[:200]})
+                transcoded = f"{temp_target}.utf8"
+                self._transcode_to_utf8(source, transcoded)
+                self._sink_delimited(transcoded, temp_target, ext)
+            os.replace(temp_target, target)
+        finally:
+            for path in (temp_target, transcoded):
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+    def _sink_delimited(self, source: str, target: str, ext: str):
+        best_frame = None
+        last_error = None
+        for separator in self._delimiter_candidates(ext):
+            try:
+                frame = pl.scan_csv(
+                    source,
+                    separator=separator or ",",
+                    infer_schema_length=100000,
+                    ignore_errors=True,
+                    null_values=CSV_NULL_VALUES,
+                    try_parse_dates=True,
+                )
+                schema = frame.collect_schema()
+            except (pl.exceptions.ComputeError, pl.exceptions.NoDataError) as exc:
+                last_error = exc
+                continue
+            if best_frame is None:
+                best_frame = (frame, schema)
+            if len(schema) > 1:
+                best_frame = (frame, schema)
+                break
+        if best_frame is None:
+            raise RuntimeError(f"구분자 기반 파일을 읽을 수 없습니다: {last_error}")
+
+        frame, schema = best_frame
+        frame.select(self._null_fill_expressions(schema)).sink_parquet(
+            target,
+            compression=self.parquet_compression,
+            row_group_size=self.parquet_row_group_rows,
+        )
 
-    def _clean_dataframe_nulls(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _transcode_to_utf8(self, source: str, target: str, chunk_size: int = 8 * 1024 * 1024):
+        # EUC-KR 상위 호환인 CP949로 읽고, 깨진 바이트는 대체 문자로 남깁니다.
+        decoder = codecs.getincrementaldecoder("cp949")(errors="replace")
+        with open(source, "rb") as reader, open(target, "w", encoding="utf-8", newline="") as writer:
+            while chunk := reader.read(chunk_size):
+                writer.write(decoder.decode(chunk))
+            writer.write(decoder.decode(b"", final=True))
+
+    def _null_fill_expressions(self, schema: pl.Schema) -> list[pl.Expr]:
         expressions = []
-        for column_name, dtype in zip(df.columns, df.dtypes):
+        for column_name, dtype in schema.items():
             col = pl.col(column_name)
             if self._is_integer_dtype(dtype):
                 expressions.append(col.fill_null(0).alias(column_name))
@@ -259,7 +379,10 @@ class DataService:
             else:
                 # 문자열/범주형 등은 빈 문자열로 채움
                 expressions.append(col.fill_null("").alias(column_name))
-        return df.select(expressions)
+        return expressions
+
+    def _clean_dataframe_nulls(self, df: pl.DataFrame) -> pl.DataFrame:
+        return df.select(self._null_fill_expressions(df.schema))
 
     def _init_minio(self):
         try:
@@ -274,25 +397,18 @@ class DataService:
             logger.error("MinIO 초기화 실패", exc_info=e)
             return None
 
-    def _create_presigned_url(self, bucket_name: str, file_name: str, expires_in_hours: int = 1) -> str:
-        """pre-signed URL을 생성합니다."""
-        if not self.minio_client:
-            raise ConnectionError("MinIO 클라이언트가 설정되지 않아 URL을 생성할 수 없습니다.")
-
-        if not self.minio_client.bucket_exists(bucket_name):
-            raise FileNotFoundError(f"버킷 '{bucket_name}'을 찾을 수 없습니다.")
-
-        try:
-            self.url = self.minio_client.presigned_get_object(
-                bucket_name,
-                file_name,
-                expires=timedelta(hours=expires_in_hours)
-            )
-            logger.info("Pre-signed URL 생성 완료")
-        except Exception as e:
-            raise RuntimeError(f"Pre-signed URL 생성 중 오류 발생: {e}") from e
+    def _get_or_load_dataframe(
+        self,
+        handle: DatasetHandle,
+        bucket_name: str,
+        file_name: str,
+        storage_type: str | None = None,
+        sheet: str | None = None,
+    ) -> pl.DataFrame:
+        con = handle.con
+        if is_multi_file(file_name):
+            return self._load_multi_file(handle, bucket_name, file_name, storage_type)
 
-    def _get_or_load_dataframe(self, bucket_name: str, file_name: str, storage_type: str | None = None) -> pl.DataFrame:
         if storage_type == 'nas':
             # ---- NAS 경로 처리 ----
             if not os.path.isdir(NAS_ROOT_PATH):
@@ -303,97 +419,66 @@ class DataService:
             abs_path = self._resolve_nas_path(bucket_name, file_name)
             if not os.path.exists(abs_path):
                 raise FileNotFoundError(f"파일을 찾을 수 없습니다: {abs_path}")
+            source_stat = os.stat(abs_path)
+            handle.fingerprint = self._source_fingerprint(
+                "nas", bucket_name, file_name, source_stat.st_size, source_stat.st_mtime_ns
+            )
 
             base_name, ext = os.path.splitext(abs_path)
             ext = ext.lower().lstrip(".")
             self._validate_supported_extension(ext)
             parquet_path = f"{base_name}.parquet"
+            if ext in EXCEL_FILE_TYPES:
+                sheet = self._select_excel_sheet(handle, list_sheets(abs_path), sheet)
+                parquet_path = self._excel_cache_name(base_name, handle.sheets, sheet)
 
-            object_size = None
-            try:
-                object_size = os.path.getsize(abs_path)
-            except Exception:
-                pass
-            is_large_initial = object_size is not None and object_size >= self.large_file_threshold_bytes
+            object_size = source_stat.st_size
+            handle.source_size = object_size
             parquet_exists = ext == "parquet" or self._is_local_cache_current(abs_path, parquet_path)
 
-            # 확장자별 Parquet 캐시 생성 정책
-            if ext in DELIMITED_FILE_TYPES:
-                if not is_large_initial and not parquet_exists:
-                    common_args = dict(
-                        infer_schema_length=100000,
-                        ignore_errors=True,
-                        null_values=["", "NA", "N/A", "null", "NULL", "NaN", "nan", "-", "—"],
-                        try_parse_dates=True,
-                    )
-                    try:
-                        df = self._read_csv_with_fallback(abs_path, ext=ext, **common_args)
-                        df = self._clean_dataframe_nulls(df)
-                        df.write_parquet(parquet_path)
-                        parquet_exists = True
-                    except Exception as e:
-                        logger.warning("NAS Parquet 캐시 저장 실패", exc_info=e)
-            elif ext in EXCEL_FILE_TYPES:
-                self._ensure_excel_preview_allowed(object_size, parquet_exists)
-                if not parquet_exists:
-                    df = pl.read_excel(abs_path, infer_schema_length=10000)
-                    df = self._clean_dataframe_nulls(df)
-                    try:
-                        df.write_parquet(parquet_path)
-                        parquet_exists = True
-                    except Exception as e:
-                        logger.warning("NAS Parquet 캐시 저장 실패", exc_info=e)
-                        self.con.register("df", df)
-                        return df
-            elif ext == "parquet":
-                pass
-
-            # read_target 결정 및 구분자 기반 대용량 파일은 원본 사용 강제
+            # 확장자별 Parquet 캐시 생성 정책: 변환은 백그라운드 작업으로 한 번만 실행합니다.
             if ext in EXCEL_FILE_TYPES:
-                if not parquet_exists:
-                    raise RuntimeError("Excel 파일의 Parquet 캐시를 생성하지 못했습니다.")
-                read_target = parquet_path
-            elif ext in DELIMITED_FILE_TYPES:
-                read_target = parquet_path if parquet_exists else abs_path
-            else:
-                read_target = abs_path
-            read_target_ext = self._get_extension(read_target)
+                self._ensure_excel_preview_allowed(object_size, parquet_exists)
+            if ext in DELIMITED_FILE_TYPES | EXCEL_FILE_TYPES and not parquet_exists:
+                job = self.materialization_queue.submit(
+                    handle.fingerprint,
+                    bucket_name,
+                    file_name,
+                    lambda: self._materialize_local(abs_path, parquet_path, ext, sheet),
+                )
+                if ext in EXCEL_FILE_TYPES:
+                    # 변환이 끝날 때까지는 시트 앞부분만 읽어 보여주고, 쿼리는 변환을 기다립니다.
+                    return self._create_excel_preview(handle, job, abs_path, sheet)
+                if self._looks_like_utf8(abs_path):
+                    # 변환이 끝날 때까지는 원본을 DuckDB 뷰로 바로 읽고, 끝나면 _swap_to_parquet가 캐시로 바꿉니다.
+                    return self._create_raw_preview_view(handle, job, abs_path, ext)
+                # UTF-8이 아닌 CSV는 DuckDB로 바로 읽을 수 없어 같은 변환 작업이 끝나기를 기다립니다.
+                self._wait_for_materialization(job)
+
+            read_target = parquet_path if ext in EXCEL_FILE_TYPES | DELIMITED_FILE_TYPES else abs_path
+            handle.url = read_target
 
-            is_large = False
             if ext in DELIMITED_FILE_TYPES:
-                is_large = object_size is not None and object_size >= self.large_file_threshold_bytes
+                is_large = object_size >= self.large_file_threshold_bytes
             else:
-                read_target_size = None
-                try:
-                    read_target_size = os.path.getsize(read_target)
-                    is_large = read_target_size is not None and read_target_size >= self.large_file_threshold_bytes
-                except Exception:
-                    pass
+                is_large = os.path.getsize(read_target) >= self.large_file_threshold_bytes
 
             if is_large:
-                self.use_duckdb_view = True
-                if read_target_ext in DELIMITED_FILE_TYPES:
-                    cols_df = self._create_csv_view_with_fallback(read_target, read_target_ext)
-                else:
-                    cols_df = self._read_parquet_as_view(read_target)
-                self.total_rows_cache = self.con.execute("SELECT COUNT(*) FROM df").fetchone()[0]
-                logger.info("대용량 모드(DuckDB 뷰, NAS) 활성화", extra={"rows": self.total_rows_cache, "cols": len(cols_df.columns)})
+                handle.use_duckdb_view = True
+                cols_df = self._read_parquet_as_view(con, read_target)
+                handle.total_rows = con.execute("SELECT COUNT(*) FROM df").fetchone()[0]
+                logger.info("대용량 모드(DuckDB 뷰, NAS) 활성화", extra={"rows": handle.total_rows, "cols": len(cols_df.columns)})
                 return cols_df
             else:
-                if read_target_ext in DELIMITED_FILE_TYPES:
-                    df = self._read_csv_dataframe_with_fallback(read_target, read_target_ext)
-                else:
-                    df = self.con.execute(f"SELECT * FROM read_parquet('{self._sql_string_literal(read_target)}')").pl()
-                self.con.register("df", df)
+                df = con.execute(f"SELECT * FROM read_parquet('{self._sql_string_literal(read_target)}')").pl()
+                self._register_frame(con, df)
                 return df
 
         # ---- MinIO 처리 ----
         if not self.minio_client:
             raise ConnectionError("MinIO 클라이언트가 초기화되지 않았습니다.")
-        if not self.minio_client.bucket_exists(bucket_name):
+        if not self.object_metadata.bucket_exists(bucket_name):
             raise FileNotFoundError(f"MinIO 버킷 '{bucket_name}'을 찾을 수 없습니다.")
-        if not self.minio_client.stat_object(bucket_name, file_name):
-            raise FileNotFoundError(f"파일 '{file_name}'을 찾을 수 없습니다.")
 
         if file_name and file_name[0] == "/":
             file_name = file_name[1:]
@@ -404,74 +489,73 @@ class DataService:
         parquet_name = f"{base_name}.parquet"
 
         try:
-            stat = self.minio_client.stat_object(bucket_name, file_name)
+            # 원본과 기본 Parquet 캐시를 동시에 조회해 stat 왕복을 한 번으로 줄입니다.
+            sheets_name = f"{base_name}.sheets.json"
+            object_names = [file_name, parquet_name] + ([sheets_name] if ext in EXCEL_FILE_TYPES else [])
+            stat = self.object_metadata.stat_many(bucket_name, object_names)[file_name]
+            if stat is None:
+                raise FileNotFoundError(f"파일 '{file_name}'을 찾을 수 없습니다.")
             object_size = getattr(stat, 'size', None)
+            handle.fingerprint = self._source_fingerprint(
+                "minio",
+                bucket_name,
+                file_name,
+                getattr(stat, "etag", ""),
+                object_size,
+                getattr(stat, "last_modified", ""),
+            )
 
-            if object_size is not None and object_size >= self.large_file_threshold_bytes and ext in (DELIMITED_FILE_TYPES | {"parquet"}):
-                self._create_presigned_url(bucket_name, file_name)
-                self.use_duckdb_view = True
-                if ext in DELIMITED_FILE_TYPES:
-                    cols_df = self._create_csv_view_with_fallback(self.url, ext)
-                else:  # parquet
-                    cols_df = self._read_parquet_as_view(self.url)
-                self.total_rows_cache = self.con.execute("SELECT COUNT(*) FROM df").fetchone()[0]
-                logger.info("대용량 모드(DuckDB 뷰, MinIO) 활성화", extra={"rows": self.total_rows_cache, "cols": len(cols_df.columns)})
-                return cols_df
+            handle.source_size = object_size
 
-            parquet_exists = self._is_minio_cache_current(bucket_name, file_name, parquet_name, stat)
+            source_path = None
+            if ext in EXCEL_FILE_TYPES:
+                sheet_names = self._read_minio_sheet_list(bucket_name, file_name, sheets_name, stat)
+                if sheet_names is None:
+                    # 시트 목록은 원본에서만 읽을 수 있어 처음 한 번은 원본을 받아 읽고, 목록을 캐시 옆에 남깁니다.
+                    source_path = self._acquire_minio_object(handle, bucket_name, file_name, stat)
+                    sheet_names = list_sheets(source_path)
+                    self._write_minio_sheet_list(bucket_name, sheets_name, sheet_names)
+                sheet = self._select_excel_sheet(handle, sheet_names, sheet)
+                parquet_name = self._excel_cache_name(base_name, handle.sheets, sheet)
+
+            parquet_stat = self._current_minio_cache_stat(bucket_name, file_name, parquet_name, stat)
+            parquet_exists = parquet_stat is not None
 
             if ext in EXCEL_FILE_TYPES:
                 self._ensure_excel_preview_allowed(object_size, parquet_exists)
 
-            if not parquet_exists:
-                self._create_presigned_url(bucket_name, file_name)
-                response = requests.get(self.url, timeout=120)
-                response.raise_for_status()
-                buffer = io.BytesIO(response.content)
-
+            if parquet_exists:
+                handle.url = self._minio_read_path(handle, bucket_name, parquet_name, parquet_stat)
+            elif ext in DELIMITED_FILE_TYPES | EXCEL_FILE_TYPES:
+                job = self.materialization_queue.submit(
+                    handle.fingerprint,
+                    bucket_name,
+                    file_name,
+                    lambda: self._materialize_minio(bucket_name, file_name, parquet_name, ext, stat, sheet),
+                )
+                if ext in EXCEL_FILE_TYPES:
+                    if source_path is None:
+                        source_path = self._acquire_minio_object(handle, bucket_name, file_name, stat)
+                    return self._create_excel_preview(handle, job, source_path, sheet)
                 if ext in DELIMITED_FILE_TYPES:
-                    common_args = dict(
-                        infer_schema_length=100000,
-                        ignore_errors=True,
-                        null_values=["", "NA", "N/A", "null", "NULL", "NaN", "nan", "-", "—"],
-                        try_parse_dates=True,
-                    )
-                    df = self._read_csv_with_fallback(buffer, ext=ext, **common_args)
-                    df = self._clean_dataframe_nulls(df)
-                elif ext in EXCEL_FILE_TYPES:
-                    df = pl.read_excel(buffer, infer_schema_length=10000)
-                    df = self._clean_dataframe_nulls(df)
-                elif ext == "parquet":
-                    parquet_name = file_name
-                    parquet_exists = True
-                    df = None
-                else:
-                    raise UnsupportedFileTypeError(f"지원하지 않는 파일 형식입니다: .{ext}")
-
-                if df is not None:
-                    parquet_buffer = io.BytesIO()
-                    df.write_parquet(parquet_buffer)
-                    parquet_buffer.seek(0)
-
-                    self.minio_client.put_object(
-                        bucket_name,
-                        parquet_name,
-                        data=parquet_buffer,
-                        length=len(parquet_buffer.getvalue()),
-                        content_type="application/octet-stream"
-                    )
+                    source_path = self._acquire_minio_object(handle, bucket_name, file_name, stat)
+                    if self._looks_like_utf8(source_path):
+                        return self._create_raw_preview_view(handle, job, source_path, ext)
+                result = self._wait_for_materialization(job)
+                handle.url = self._minio_read_path(handle, bucket_name, parquet_name, result)
+            else:
+                raise UnsupportedFileTypeError(f"지원하지 않는 파일 형식입니다: .{ext}")
 
-            self._create_presigned_url(bucket_name, parquet_name)
-            logger.info("Parquet 읽기 시작", extra={"url": True, "bucket": bucket_name, "file": parquet_name})
+            logger.info("Parquet 읽기 시작", extra={"bucket": bucket_name, "file": parquet_name})
 
             if object_size is not None and object_size >= self.large_file_threshold_bytes:
-                self.use_duckdb_view = True
-                cols_df = self._read_parquet_as_view(self.url)
-                self.total_rows_cache = self.con.execute("SELECT COUNT(*) FROM df").fetchone()[0]
+                handle.use_duckdb_view = True
+                cols_df = self._read_parquet_as_view(con, handle.url)
+                handle.total_rows = con.execute("SELECT COUNT(*) FROM df").fetchone()[0]
                 return cols_df
             else:
-                df = self.con.execute(f"SELECT * FROM read_parquet('{self._sql_string_literal(self.url)}')").pl()
-                self.con.register("df", df)
+                df = con.execute(f"SELECT * FROM read_parquet('{self._sql_string_literal(handle.url)}')").pl()
+                self._register_frame(con, df)
                 return df
 
         except S3Error as exc:
@@ -481,124 +565,540 @@ class DataService:
                 raise
 
 
-    def _calculate_distributions(self, df: pl.DataFrame):
-        distributions = {}
-        for col in df.columns:
-            dtype_str = str(df[col].dtype).lower()
-            
-            if 'string' in dtype_str or 'categorical' in dtype_str or 'bool' in dtype_str:
-                value_counts = (
-                    df[col]
-                    .drop_nulls()
-                    .value_counts()
-                    .sort("count", descending=True)
-                    .head(self.max_distribution_categories)
+    def _load_multi_file(
+        self,
+        handle: DatasetHandle,
+        bucket_name: str,
+        file_name: str,
+        storage_type: str | None,
+    ) -> pl.DataFrame:
+        """접두사/glob에 맞는 파일 전체를 Hive 파티션 컬럼이 붙은 DuckDB 뷰 하나로 엽니다.
+
+        파일 목록은 파티션 디렉터리별로 병렬 조회하고, 파일 경로를 그대로 넘기므로 파티션 컬럼 조건이 있는
+        쿼리는 DuckDB가 맞지 않는 파일을 읽기 전에 제외합니다.
+        """
+        prefix, matcher = split_pattern(file_name)
+        if storage_type == 'nas':
+            if not os.path.isdir(NAS_ROOT_PATH):
+                raise FileNotFoundError(f"NAS 루트 경로를 찾을 수 없습니다: {NAS_ROOT_PATH}")
+            root = self._resolve_nas_path(bucket_name, "")
+            self._resolve_nas_path(bucket_name, prefix)
+            parts = list_nas_files(root, prefix, matcher, self.multi_file_max_workers)
+        else:
+            if not self.minio_client:
+                raise ConnectionError("MinIO 클라이언트가 초기화되지 않았습니다.")
+            if not self.object_metadata.bucket_exists(bucket_name):
+                raise FileNotFoundError(f"MinIO 버킷 '{bucket_name}'을 찾을 수 없습니다.")
+            parts = list_minio_objects(self.minio_client, bucket_name, prefix, matcher, self.multi_file_max_workers)
+
+        if not parts:
+            raise FileNotFoundError(f"'{file_name}'에 맞는 파일을 찾을 수 없습니다.")
+        if len(parts) > self.multi_file_max_files:
+            raise FileTooLargeError(
+                f"'{file_name}'에 맞는 파일이 {len(parts):,}개로 제한({self.multi_file_max_files:,}개)을 넘습니다. "
+                "범위를 좁혀 다시 시도해주세요."
+            )
+        ext = self._multi_file_extension(parts)
+
+        version = hashlib.sha256("\n".join(f"{part.key}:{part.size}:{part.version}" for part in parts).encode("utf-8"))
+        handle.fingerprint = self._source_fingerprint(
+            storage_type or "minio", bucket_name, file_name, len(parts), version.hexdigest()[:32]
+        )
+        handle.source_size = sum(part.size for part in parts)
+        remote = storage_type != 'nas' and self.s3_reader.multi_file_enabled
+        if remote:
+            # s3:// 경로를 그대로 넘기면 파티션 조건에 맞지 않는 객체는 내려받지도 않습니다.
+            paths = [self.s3_reader.url(bucket_name, part.key) for part in parts]
+            handle.url = self.s3_reader.url(bucket_name, prefix)
+        else:
+            if storage_type != 'nas':
+                # httpfs를 쓸 수 없으면 모든 객체를 받아 두므로 파티션 조건이 I/O를 줄이지 못합니다.
+                logger.warning(
+                    "S3 직접 읽기를 쓸 수 없어 여러 파일 데이터셋의 객체를 모두 내려받습니다",
+                    extra={"bucket": bucket_name, "pattern": file_name, "files": len(parts)},
                 )
-                distributions[col] = {
-                    'type': 'categorical',
-                    'counts': value_counts["count"].to_list(),
-                    'labels': [str(value) for value in value_counts[col].to_list()]
-                }
-            
-            elif 'int' in dtype_str or 'float' in dtype_str:
-                series = df[col].drop_nulls()
-                if 'float' in dtype_str:
-                    series = series.filter(series.is_finite())
-                if series.is_empty():
-                    continue
-                
-                unique_values = series.unique().sort()
-                unique_count = len(unique_values)
-                series_np = series.to_numpy()
-                series_np = series_np[np.isfinite(series_np)]
-                if len(series_np) == 0:
-                    continue
-                counts, labels = [], []
-
-                if 1 < unique_count <= 20:
-                    diff_mean = unique_values.diff().mean()
-                    
-                    if diff_mean is None:
-                        diff = unique_values[1] - unique_values[0]
-                        bin_edges = [unique_values[0] - diff / 2, unique_values[0] + diff / 2, unique_values[1] + diff / 2]
-                    else:
-                        bin_edges = (unique_values - (diff_mean / 2)).to_list()
-                        bin_edges.append(unique_values[-1] + (diff_mean / 2))
-
-                    hist_counts, _ = np.histogram(series_np, bins=bin_edges)
-                    counts = hist_counts
-                    labels = [f"{float(val):.6g}" for val in unique_values]
-
-                elif unique_count == 1:
-                    counts = [len(series_np)]
-                    labels = [f"{float(unique_values[0]):.6g}"]
+                parts = self._mirror_minio_parts(handle, bucket_name, parts)
+            paths = [part.path for part in parts]
+            handle.url = os.path.commonpath(paths)
+        handle.use_duckdb_view = True
+
+        path_list = "[" + ", ".join(f"'{self._sql_string_literal(path)}'" for path in paths) + "]"
+        if ext == "parquet":
+            if remote:
+                rows, same_schema = self._remote_parquet_footers(handle.con, path_list)
+            else:
+                rows, same_schema = read_parquet_footers(paths, self.multi_file_max_workers)
+            # 스키마가 모두 같으면 첫 파일 스키마만 쓰고, 다르면 이름 기준으로 컬럼을 합칩니다.
+            options = "hive_partitioning=true" + ("" if same_schema else ", union_by_name=true")
+            handle.total_rows = rows
+            reader_sql = f"read_parquet({path_list}, {options})"
+        else:
+            delimiter = self._delimiter_candidates(ext)[0]
+            options = [
+                f"sample_size={self.duckdb_csv_sample_size}",
+                "ignore_errors=true",
+                "hive_partitioning=true",
+                "union_by_name=true",
+            ]
+            if delimiter is not None:
+                options.append(f"delim='{self._sql_string_literal(delimiter)}'")
+            reader_sql = f"read_csv_auto({path_list}, {', '.join(options)})"
+        handle.con.execute(f"CREATE OR REPLACE TEMP VIEW df AS SELECT * FROM {reader_sql}")
+        self._drop_row_keys(handle.con)
+        logger.info(
+            "여러 파일 데이터셋 뷰 생성",
+            extra={"bucket": bucket_name, "pattern": file_name, "files": len(parts), "bytes": handle.source_size},
+        )
+        return handle.con.execute("SELECT * FROM df LIMIT 0").pl()
+
+    def _multi_file_extension(self, parts: list[PartFile]) -> str:
+        extensions = {part.ext for part in parts}
+        if len(extensions) > 1:
+            found = ", ".join(sorted(f".{ext}" for ext in extensions))
+            raise UnsupportedFileTypeError(
+                f"여러 형식의 파일이 섞여 있습니다({found}). '*.parquet'처럼 확장자를 지정해주세요."
+            )
+        ext = extensions.pop()
+        if ext != "parquet" and ext not in DELIMITED_FILE_TYPES:
+            raise UnsupportedFileTypeError(f"여러 파일 읽기는 Parquet과 구분자 기반 파일만 지원합니다: .{ext}")
+        return ext
+
+    def _mirror_minio_parts(self, handle: DatasetHandle, bucket_name: str, parts: list[PartFile]) -> list[PartFile]:
+        """객체를 병렬로 로컬 캐시에 받고, 객체 키와 같은 디렉터리 구조의 링크를 만들어 Hive 파티션 경로를 살립니다."""
+        mirror_root = tempfile.mkdtemp(prefix="dataviewer-parts-")
+        handle.releases.append(lambda: shutil.rmtree(mirror_root, ignore_errors=True))
+
+        def fetch(part: PartFile) -> PartFile:
+            cached = self._acquire_minio_object(handle, bucket_name, part.key, part)
+            link = os.path.join(mirror_root, *part.key.split("/"))
+            os.makedirs(os.path.dirname(link), exist_ok=True)
+            os.symlink(cached, link)
+            return PartFile(part.key, link, part.size, part.version)
+
+        with ThreadPoolExecutor(max_workers=self.multi_file_max_workers, thread_name_prefix="dataviewer-fetch") as executor:
+            futures = [executor.submit(contextvars.copy_context().run, fetch, part) for part in parts]
+            return [future.result() for future in futures]
+
+    def _remote_parquet_footers(self, con: duckdb.DuckDBPyConnection, path_list: str) -> tuple[int, bool]:
+        """S3 객체의 footer를 DuckDB로 읽어 전체 행 수와 스키마 일치 여부를 돌려줍니다. 읽은 footer는 메타데이터 캐시에 남습니다."""
+        rows = con.execute(f"SELECT COALESCE(SUM(num_rows), 0) FROM parquet_file_metadata({path_list})").fetchone()[0]
+        schemas = con.execute(
+            "SELECT COUNT(DISTINCT signature) FROM ("
+            "SELECT file_name, string_agg(name || ':' || COALESCE(type, '') || ':' || COALESCE(logical_type, ''), ',' ORDER BY name) AS signature "
+            f"FROM parquet_schema({path_list}) GROUP BY file_name)"
+        ).fetchone()[0]
+        return int(rows), schemas <= 1
+
+    def _minio_read_path(self, handle: DatasetHandle, bucket_name: str, object_name: str, stat) -> str:
+        """Parquet 객체를 읽을 경로. S3 직접 읽기가 켜져 있으면 s3:// 경로를, 아니면 로컬 캐시 경로를 돌려줍니다."""
+        if self.s3_reader.enabled:
+            return self.s3_reader.url(bucket_name, object_name)
+        return self._acquire_minio_object(handle, bucket_name, object_name, stat)
+
+    def _acquire_minio_object(self, handle: DatasetHandle, bucket_name: str, object_name: str, stat) -> str:
+        """MinIO 객체를 로컬 디스크 캐시에서 찾거나 내려받아 경로를 돌려줍니다. 핸들을 닫으면 고정이 풀립니다."""
+        version = getattr(stat, "etag", None) or f"{getattr(stat, 'size', '')}:{getattr(stat, 'last_modified', '')}"
+        path = self.object_cache.acquire(
+            bucket_name,
+            object_name,
+            version,
+            lambda target: self.minio_client.fget_object(bucket_name, object_name, target),
+        )
+        handle.releases.append(lambda: self.object_cache.release(path))
+        return str(path)
 
-                else:
-                    n = len(series_np)
-                    if n < 2: continue
-
-                    min_val, max_val = series_np.min(), series_np.max()
-
-                    q1 = np.quantile(series_np, 0.25)
-                    q3 = np.quantile(series_np, 0.75)
-                    iqr = q3 - q1
-                    
-                    if iqr > 0:
-                        bin_width = 2 * iqr * (n ** (-1/3))
-                        num_bins = min(20, int(np.ceil((max_val - min_val) / bin_width))) if bin_width > 0 else 20
-                    else:
-                        num_bins = 20
-
-                    num_bins = max(2, num_bins)
-                    hist_counts, hist_edges = np.histogram(series_np, bins=num_bins)
-                    counts = hist_counts
-                    labels = [f"{edge:.6g}" for edge in hist_edges[:-1]]
-                
-                distributions[col] = {
-                    'type': 'numeric',
-                    'counts': counts if isinstance(counts, list) else counts.tolist(),
-                    'labels': labels
-                }
-        return distributions
-
-    def get_dataset_details(self, bucket_name: str, file_name: str, storage_type: str | None = None):
+    def _parquet_rows(self, path: str) -> int:
+        return int(pl.scan_parquet(path).select(pl.len()).collect().item())
+
+    def _materialize_local(self, source: str, target: str, ext: str, sheet: str | None = None) -> MaterializedParquet:
+        if self._is_local_cache_current(source, target):
+            # 다른 워커가 같은 변환 잠금을 먼저 잡고 캐시를 만들어 두었습니다.
+            return MaterializedParquet(target, self._parquet_rows(target))
+        if ext in DELIMITED_FILE_TYPES:
+            self._convert_delimited_to_parquet(source, target, ext)
+            return MaterializedParquet(target, self._parquet_rows(target))
+
+        temp_target = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            rows = write_sheet_parquet(
+                source,
+                sheet if sheet is not None else 0,
+                temp_target,
+                self._clean_dataframe_nulls,
+                compression=self.parquet_compression,
+                row_group_rows=self.parquet_row_group_rows,
+            )
+            os.replace(temp_target, target)
+        finally:
+            if os.path.exists(temp_target):
+                os.remove(temp_target)
+        return MaterializedParquet(target, rows)
+
+    def _materialize_minio(
+        self,
+        bucket_name: str,
+        file_name: str,
+        parquet_name: str,
+        ext: str,
+        stat,
+        sheet: str | None = None,
+    ) -> MaterializedParquet:
+        if self.worker_count > 1:
+            # 다른 워커가 같은 변환 잠금을 먼저 잡고 Parquet을 올렸을 수 있으므로 캐시된 stat 대신 다시 조회합니다.
+            # 워커가 하나면 같은 변환은 이 큐에서만 돌므로 적재할 때 조회한 stat이 그대로 맞습니다.
+            self.object_metadata.invalidate(bucket_name, parquet_name)
+        cache_stat = self._current_minio_cache_stat(bucket_name, file_name, parquet_name, stat)
+        if cache_stat is not None:
+            # 다른 워커가 같은 변환 잠금을 먼저 잡고 Parquet을 올려 두었습니다.
+            cached_path = self.object_cache.acquire(
+                bucket_name,
+                parquet_name,
+                cache_stat.etag,
+                lambda target: self.minio_client.fget_object(bucket_name, parquet_name, target),
+            )
+            try:
+                rows = self._parquet_rows(str(cached_path))
+            finally:
+                self.object_cache.release(cached_path)
+            return MaterializedParquet(str(cached_path), rows, object_name=parquet_name, etag=cache_stat.etag)
+
+        # 작업 중에는 원본을 직접 고정해 두어, 요청한 데이터셋이 먼저 닫혀도 캐시에서 지워지지 않게 합니다.
+        source_version = getattr(stat, "etag", None) or f"{getattr(stat, 'size', '')}:{getattr(stat, 'last_modified', '')}"
+        source_path = self.object_cache.acquire(
+            bucket_name,
+            file_name,
+            source_version,
+            lambda target: self.minio_client.fget_object(bucket_name, file_name, target),
+        )
+        try:
+            with tempfile.TemporaryDirectory(prefix="dataviewer-parquet-") as work_dir:
+                local_parquet = os.path.join(work_dir, "cache.parquet")
+                materialized = self._materialize_local(str(source_path), local_parquet, ext, sheet)
+                # 파일에서 바로 업로드하고, 올린 Parquet은 다시 내려받지 않고 로컬 캐시로 옮깁니다.
+                result = self.minio_client.fput_object(
+                    bucket_name,
+                    parquet_name,
+                    local_parquet,
+                    content_type="application/octet-stream",
+                )
+                # 올린 결과로 메타데이터를 채워 다음 적재가 같은 객체를 다시 stat하지 않게 합니다.
+                self.object_metadata.remember(
+                    bucket_name, parquet_name, UploadedObject(result.etag, os.path.getsize(local_parquet))
+                )
+                cached_path = self.object_cache.store(bucket_name, parquet_name, result.etag, local_parquet)
+                self.object_cache.release(cached_path)
+        finally:
+            self.object_cache.release(source_path)
+        return MaterializedParquet(str(cached_path), materialized.rows, object_name=parquet_name, etag=result.etag)
+
+    def _wait_for_materialization(self, job: MaterializationJob) -> MaterializedParquet:
+        job.wait()
+        if job.status != JOB_DONE:
+            raise RuntimeError(f"Parquet 캐시를 생성하지 못했습니다: {job.error}")
+        return job.result
+
+    def _swap_to_parquet(self, handle: DatasetHandle, job: MaterializationJob):
+        """Parquet 변환이 끝나면 원본 CSV 뷰를 읽던 핸들을 변환된 캐시로 바꿉니다."""
+        if job.status != JOB_DONE:
+            logger.warning("Parquet 변환 실패, 원본 CSV 뷰를 계속 사용", extra={"job_id": job.job_id, "error": job.error})
+            return
+        if self.registry.peek(handle.dataset_id) is not handle:
+            return
+
+        result = job.result
+        with handle.lock:
+            if handle.materialization is not job:
+                return
+            path = result.path
+            if result.object_name is not None:
+                path = self._minio_read_path(handle, handle.bucket_name, result.object_name, result)
+            con = handle.con
+            con.execute("DROP VIEW IF EXISTS df")
+            if (handle.source_size or 0) >= self.large_file_threshold_bytes:
+                self._read_parquet_as_view(con, path)
+                handle.frame = None
+                handle.size_bytes = 0
+                handle.use_duckdb_view = True
+            else:
+                df = con.execute(f"SELECT * FROM read_parquet('{self._sql_string_literal(path)}')").pl()
+                self._register_frame(con, df)
+                handle.frame = df
+                handle.size_bytes = int(df.estimated_size())
+                handle.use_duckdb_view = False
+            handle.url = path
+            handle.total_rows = result.rows
+            if handle.fingerprint:
+                handle.fingerprint = handle.fingerprint.removesuffix(":raw") + (":view" if handle.use_duckdb_view else ":frame")
+            handle.materialization = None
+            handle.estimated_rows = None
+            handle.preview_only = False
+        logger.info("데이터셋을 Parquet 캐시로 전환", extra={"dataset_id": handle.dataset_id, "job_id": job.job_id})
+        # 메모리 적재로 바뀌었을 수 있으므로 메모리 예산을 다시 적용합니다.
+        self.registry.add(handle)
+
+    def _looks_like_utf8(self, path: str) -> bool:
+        with open(path, "rb") as file:
+            head = file.read(64 * 1024)
+        try:
+            # 잘린 마지막 글자는 오류로 보지 않도록 증분 디코더를 씁니다.
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def _create_raw_preview_view(self, handle: DatasetHandle, job: MaterializationJob, source: str, ext: str) -> pl.DataFrame:
+        handle.materialization = job
+        handle.use_duckdb_view = True
+        handle.url = source
+        if handle.source_size is None or handle.source_size > 1024 * 1024:
+            # 작은 파일은 그대로 세고, 큰 파일은 전체 스캔 대신 줄 길이로 총건수를 추정합니다.
+            handle.estimated_rows = self._estimate_delimited_rows(source)
+        cols_df = self._create_csv_view_with_fallback(handle.con, source, ext)
+        logger.info("Parquet 변환 중 원본 CSV 미리보기", extra={"job_id": job.job_id, "cols": len(cols_df.columns)})
+        return cols_df
+
+    def _create_excel_preview(
+        self,
+        handle: DatasetHandle,
+        job: MaterializationJob,
+        source: str,
+        sheet: str,
+    ) -> pl.DataFrame:
+        """시트 앞부분 EXCEL_PREVIEW_ROWS 행만 df로 등록합니다. 시트를 끝까지 읽었으면 쿼리도 바로 실행합니다."""
+        preview = read_preview(source, sheet, self.excel_preview_rows)
+        df = self._clean_dataframe_nulls(preview.frame)
+        handle.materialization = job
+        handle.url = source
+        handle.preview_only = not preview.complete
+        handle.estimated_rows = None if preview.complete else preview.total_rows
+        self._register_frame(handle.con, df)
+        handle.frame = df
+        handle.size_bytes = int(df.estimated_size())
+        logger.info(
+            "Parquet 변환 중 Excel 시트 앞부분 미리보기",
+            extra={"job_id": job.job_id, "sheet": sheet, "rows": len(df), "complete": preview.complete},
+        )
+        return df
+
+    def _select_excel_sheet(self, handle: DatasetHandle, sheet_names: list[str], sheet: str | None) -> str:
+        handle.sheets = sheet_names
+        handle.sheet = resolve_sheet(handle.sheets, sheet)
+        # 같은 통합 문서라도 시트마다 다른 데이터셋입니다.
+        handle.fingerprint = f"{handle.fingerprint}:{handle.sheet}"
+        return handle.sheet
+
+    def _read_minio_sheet_list(self, bucket_name: str, file_name: str, sheets_name: str, source_stat) -> list[str] | None:
+        """Parquet 캐시 옆에 남긴 시트 목록. 없거나 원본보다 오래됐으면 None입니다."""
+        if self._current_minio_cache_stat(bucket_name, file_name, sheets_name, source_stat) is None:
+            return None
+        response = None
+        try:
+            response = self.minio_client.get_object(bucket_name, sheets_name)
+            sheet_names = orjson.loads(response.read())["sheets"]
+        except (S3Error, orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning("시트 목록 캐시를 읽지 못해 원본에서 다시 읽습니다.", extra={"bucket": bucket_name, "file": sheets_name})
+            return None
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+        if not sheet_names or not all(isinstance(name, str) for name in sheet_names):
+            return None
+        return sheet_names
+
+    def _write_minio_sheet_list(self, bucket_name: str, sheets_name: str, sheet_names: list[str]):
+        payload = orjson.dumps({"sheets": sheet_names})
+        try:
+            result = self.minio_client.put_object(
+                bucket_name,
+                sheets_name,
+                io.BytesIO(payload),
+                len(payload),
+                content_type="application/json",
+            )
+        except S3Error:
+            logger.warning("시트 목록 캐시 저장 실패", extra={"bucket": bucket_name, "file": sheets_name}, exc_info=True)
+            self.object_metadata.invalidate(bucket_name, sheets_name)
+            return
+        self.object_metadata.remember(bucket_name, sheets_name, UploadedObject(result.etag, len(payload)))
+
+    def _excel_cache_name(self, base_name: str, sheet_names: list[str], sheet: str) -> str:
+        """첫 시트는 기존 캐시 이름을 그대로 쓰고, 나머지 시트는 시트 이름을 붙여 따로 캐시합니다."""
+        if sheet == sheet_names[0]:
+            return f"{base_name}.parquet"
+        slug = re.sub(r"[^\w.-]+", "_", sheet).strip("._") or "sheet"
+        digest = hashlib.sha1(sheet.encode("utf-8")).hexdigest()[:8]
+        return f"{base_name}.{slug}-{digest}.parquet"
+
+    def _estimate_delimited_rows(self, path: str) -> int:
+        """파일 앞부분의 평균 줄 길이로 전체 행 수를 추정합니다(헤더 제외)."""
+        size = os.path.getsize(path)
+        with open(path, "rb") as file:
+            head = file.read(1024 * 1024)
+        lines = head.count(b"\n")
+        if not head or lines == 0:
+            return 0
+        return max(0, int(size * lines / len(head)) - 1)
+
+    def get_dataset_details(
+        self,
+        bucket_name: str,
+        file_name: str,
+        storage_type: str | None = None,
+        sheet: str | None = None,
+    ):
         """데이터셋의 초기 정보 반환"""
+        with count_storage_calls() as calls:
+            details = self._load_dataset_details(bucket_name, file_name, storage_type, sheet)
+        if calls.total:
+            logger.info(
+                "데이터셋 적재 스토리지 호출",
+                extra={"bucket": bucket_name, "file_name": file_name, "storage_calls": calls.as_dict()},
+            )
+        return details
+
+    def _load_dataset_details(
+        self,
+        bucket_name: str,
+        file_name: str,
+        storage_type: str | None,
+        sheet: str | None,
+    ):
         if self.geospatial_service.supports(file_name):
             return self.geospatial_service.get_dataset_details(
                 bucket_name,
                 file_name,
                 storage_type,
             )
-        self._reset_dataset_state()
-        df = self._get_or_load_dataframe(bucket_name, file_name, storage_type)
-        preview = self.con.execute(f"SELECT * FROM df LIMIT 10").pl()
-
-        if self.use_duckdb_view:
-            # 대용량: 전체 적재 대신 샘플로 분포 계산, 총건수는 캐시/COUNT(*) 사용
-            sample_df = self._sample_for_distributions()
-            distributions = self._calculate_distributions(sample_df)
-            total_count = self.total_rows_cache
-            if total_count is None:
-                try:
-                    total_count = self.con.execute("SELECT COUNT(*) FROM df").fetchone()[0]
-                except Exception:
-                    total_count = 0
-            return {
-                "bucket_name": bucket_name,
-                "columns": preview.columns,
-                "tableData": preview.to_dicts(),
-                "distributions": distributions,
-                "total": int(total_count),
-            }
-        else:
-            distributions = self._calculate_distributions(df.head(self.large_sample_rows))
-            return {
-                "bucket_name": bucket_name,
-                "columns": df.columns,
-                "tableData": preview.to_dicts(),
-                "distributions": distributions,
-                "total": len(df)
-            }
+        handle = self.registry.create(bucket_name, file_name, storage_type)
+        try:
+            df = self._get_or_load_dataframe(handle, bucket_name, file_name, storage_type, sheet)
+            preview = handle.con.execute(f"SELECT * FROM df LIMIT 10").pl()
+            total_count, total_estimated = self._dataset_total(handle, df)
+
+            if handle.materialization is not None:
+                # 변환 중인 원본 CSV/Excel 미리보기: 앞부분 샘플로 분포를 구하고, 총건수는 추정치를 씁니다.
+                distributions = self.column_profiler.profile(
+                    handle.con,
+                    f"SELECT * FROM df LIMIT {self.count_estimate_sample_rows}",
+                    approximate=True,
+                )
+                columns = preview.columns
+            elif handle.use_duckdb_view:
+                # 대용량: 전체를 적재하지 않고 DuckDB 집계로 분포 계산, 총건수는 캐시/COUNT(*) 사용
+                distributions = self.column_profiler.profile(handle.con, "SELECT * FROM df", approximate=True)
+                columns = preview.columns
+            else:
+                columns = df.columns
+                distributions = self.column_profiler.profile(handle.con, "SELECT * FROM df")
+        except BaseException:
+            handle.close()
+            raise
+
+        job = handle.materialization
+        self._register_handle(handle, total_count, total_estimated)
+        self.shared_state.save_dataset(handle.dataset_id, bucket_name, file_name, storage_type, handle.sheet)
+        return {
+            "dataset_id": handle.dataset_id,
+            "bucket_name": bucket_name,
+            "columns": columns,
+            "tableData": TableData(preview),
+            "distributions": distributions,
+            "total": int(total_count),
+            "total_estimated": total_estimated,
+            "materialization": job.to_dict() if job is not None else None,
+            "sheets": handle.sheets,
+            "sheet": handle.sheet,
+        }
+
+    def _dataset_total(self, handle: DatasetHandle, df: pl.DataFrame) -> tuple[int, bool]:
+        """적재 직후 전체 행 수와 추정치 여부. 메모리 적재면 핸들에 프레임을 붙입니다."""
+        if handle.materialization is not None:
+            if handle.estimated_rows is not None:
+                return handle.estimated_rows, True
+            return handle.con.execute("SELECT COUNT(*) FROM df").fetchone()[0], False
+        if handle.use_duckdb_view:
+            if handle.total_rows is not None:
+                return handle.total_rows, False
+            try:
+                return handle.con.execute("SELECT COUNT(*) FROM df").fetchone()[0], False
+            except Exception:
+                return 0, False
+        handle.frame = df
+        handle.size_bytes = int(df.estimated_size())
+        return len(df), False
+
+    def _register_handle(self, handle: DatasetHandle, total_count: int, total_estimated: bool):
+        job = handle.materialization
+        handle.total_rows = None if total_estimated else int(total_count)
+        if handle.fingerprint:
+            # 같은 원본이라도 원본 CSV/뷰/메모리 적재 방식에 따라 결측값 처리가 다르므로 구분합니다.
+            if job is not None:
+                handle.fingerprint += ":raw"
+            else:
+                handle.fingerprint += ":view" if handle.use_duckdb_view else ":frame"
+        self.registry.add(handle)
+        if job is not None:
+            job.add_done_callback(lambda finished: self._swap_to_parquet(handle, finished))
+
+    def _get_handle(self, dataset_id: str) -> DatasetHandle:
+        """핸들을 찾습니다. 여러 워커 모드에서 이 워커에 없으면 공유 저장소의 적재 정보로 같은 id를 다시 엽니다."""
+        try:
+            return self.registry.get(dataset_id)
+        except DatasetNotFoundError:
+            if self.worker_count <= 1:
+                raise
+            descriptor = self.shared_state.get_dataset(dataset_id or "")
+            if descriptor is None:
+                raise
+        # 같은 id를 동시에 다시 여는 요청만 기다리게 하고, 다른 데이터셋의 재적재는 막지 않습니다.
+        lock = self._reopen_lock(dataset_id)
+        with lock:
+            try:
+                handle = self.registry.peek(dataset_id)
+                if handle is not None:
+                    return self.registry.get(dataset_id)
+                return self._reopen_handle(dataset_id, descriptor)
+            finally:
+                with self._reopen_locks_guard:
+                    if self._reopen_locks.get(dataset_id) is lock:
+                        del self._reopen_locks[dataset_id]
+
+    def _reopen_lock(self, dataset_id: str) -> threading.Lock:
+        with self._reopen_locks_guard:
+            return self._reopen_locks.setdefault(dataset_id, threading.Lock())
+
+    def _reopen_handle(self, dataset_id: str, descriptor) -> DatasetHandle:
+        handle = self.registry.create(
+            descriptor.bucket_name, descriptor.file_name, descriptor.storage_type, dataset_id=dataset_id
+        )
+        try:
+            df = self._get_or_load_dataframe(
+                handle, descriptor.bucket_name, descriptor.file_name, descriptor.storage_type, descriptor.sheet
+            )
+            total_count, total_estimated = self._dataset_total(handle, df)
+        except BaseException:
+            handle.close()
+            raise
+        self._register_handle(handle, total_count, total_estimated)
+        logger.info("다른 워커에서 적재한 데이터셋을 다시 엶", extra={"dataset_id": dataset_id, "pid": os.getpid()})
+        return handle
+
+    def get_materialization_status(self, job_id: str) -> dict:
+        return self.materialization_queue.get_status(job_id)
+
+    def _get_ready_handle(self, dataset_id: str, cancel_token: CancelToken | None = None) -> DatasetHandle:
+        """쿼리할 핸들을 돌려줍니다. Excel 시트 앞부분만 적재된 상태면 Parquet 변환이 끝날 때까지 기다립니다."""
+        handle = self._get_handle(dataset_id)
+        job = handle.materialization
+        if job is None or not handle.preview_only:
+            return handle
+        while not job.wait(timeout=0.5):
+            if cancel_token is not None and cancel_token.cancelled:
+                raise QueryCancelledError("클라이언트 연결이 끊어져 쿼리를 취소했습니다.")
+        if job.status != JOB_DONE:
+            raise RuntimeError(f"Parquet 캐시를 생성하지 못했습니다: {job.error}")
+        return handle
 
     def get_map_preview(
         self,
@@ -610,66 +1110,322 @@ class DataService:
         limit: int | None = None,
         simplify_tolerance: float = 0.0,
         fields: list[str] | None = None,
+        zoom: float | None = None,
     ):
-        return self.geospatial_service.get_preview(
-            bucket_name=bucket_name,
-            file_name=file_name,
-            storage_type=storage_type,
-            layer=layer,
-            bbox=bbox,
-            limit=limit,
-            simplify_tolerance=simplify_tolerance,
-            fields=fields,
-        )
+        with count_storage_calls() as calls:
+            preview = self.geospatial_service.get_preview(
+                bucket_name=bucket_name,
+                file_name=file_name,
+                storage_type=storage_type,
+                layer=layer,
+                bbox=bbox,
+                limit=limit,
+                simplify_tolerance=simplify_tolerance,
+                fields=fields,
+                zoom=zoom,
+            )
+        if calls.total:
+            logger.info(
+                "지도 미리보기 스토리지 호출",
+                extra={"bucket": bucket_name, "file_name": file_name, "storage_calls": calls.as_dict()},
+            )
+        return preview
 
-    def get_paged_data(self, query: str, page: int, page_size: int):
+    def get_map_tile(
+        self,
+        bucket_name: str,
+        file_name: str,
+        storage_type: str | None,
+        layer: str | None,
+        z: int,
+        x: int,
+        y: int,
+        fields: list[str] | None = None,
+    ) -> bytes:
+        return self.geospatial_service.get_tile(bucket_name, file_name, storage_type, layer, z, x, y, fields)
+
+    def get_paged_data(
+        self,
+        dataset_id: str,
+        query: str,
+        page: int,
+        page_size: int,
+        cursor: str | None = None,
+        use_cursor: bool = False,
+        cancel_token: CancelToken | None = None,
+    ):
         base_query = self._rewrite_user_query(query)
         safe_page = max(1, int(page or 1))
         safe_page_size = min(self.max_page_size, max(1, int(page_size or 10)))
+        if use_cursor or cursor:
+            return self._get_cursor_page(dataset_id, base_query, safe_page_size, cursor, cancel_token)
         offset = (safe_page - 1) * safe_page_size
         paged_query = f"SELECT * FROM ({base_query}) AS page_src LIMIT {safe_page_size} OFFSET {offset}"
-        
-        result_df = self.con.execute(paged_query).pl()
-        return {"tableData": result_df.to_dicts()}
 
-    def execute_query(self, query: str):  
-        """사용자 쿼리를 실행하고 결과 반환""" 
+        handle = self._get_ready_handle(dataset_id, cancel_token)
+        rows = self.result_cache.get_page(handle.fingerprint, base_query, safe_page, safe_page_size)
+        if rows is None:
+            with handle.cursor(cancel_token) as con:
+                result_df = con.execute(paged_query).pl()
+            rows = TableData(result_df)
+            self.result_cache.put_page(handle.fingerprint, base_query, safe_page, safe_page_size, rows)
+        return {"tableData": rows}
+
+    def _get_cursor_page(
+        self,
+        dataset_id: str,
+        base_query: str,
+        page_size: int,
+        cursor: str | None,
+        cancel_token: CancelToken | None,
+    ):
+        """keyset 커서로 다음 페이지를 읽습니다.
+
+        원본 행마다 결과가 하나씩 나오는 쿼리는 원본 행 번호(df_rows)를 붙여, ORDER BY가 없으면 마지막 행 번호
+        이후부터, 단순 ORDER BY가 있으면 정렬 키와 행 번호 이후부터 읽으므로 페이지 깊이와 무관하게 비용이 일정합니다.
+        행 번호가 없는 파생 결과는 ORDER BY가 있으면 정렬 키로, 없으면 커서에 offset을 담아 기존 방식으로 읽습니다.
+        """
+        query_hash = query_fingerprint(dataset_id, base_query)
+        position = decode_cursor(cursor, query_hash) if cursor else PageCursor(query_hash)
+        body, keys = split_order_by(base_query)
+        keyed_body = row_key_query(body)
+
+        handle = self._get_ready_handle(dataset_id, cancel_token)
+        with handle.cursor(cancel_token) as con:
+            if keyed_body is not None:
+                try:
+                    description = con.execute(f"SELECT * FROM ({keyed_body}) AS page_src LIMIT 0").description
+                    body = keyed_body
+                except (duckdb.CatalogException, duckdb.BinderException):
+                    # 행 번호 관계가 없는 데이터셋이거나 집계처럼 행 번호를 붙일 수 없는 쿼리입니다.
+                    keyed_body = None
+            if keys and keyed_body is None:
+                description = con.execute(f"SELECT * FROM ({body}) AS page_src LIMIT 0").description
+            if keys:
+                columns = [column[0] for column in description]
+                if not all(key.name in columns for key in keys):
+                    keys = []
+                    keyed_body = None
+                    body = base_query
+
+            if keys:
+                if keyed_body is not None:
+                    keys = [*keys, OrderKey(PAGE_KEY_COLUMN)]
+                    ordering = order_by_sql(keys)
+                else:
+                    ordering = order_by_sql(keys, columns)
+                if position.values is None:
+                    result_df = con.execute(
+                        f"SELECT * FROM ({body}) AS page_src "
+                        f"ORDER BY {ordering} LIMIT {page_size + 1} OFFSET {position.offset}"
+                    ).pl()
+                else:
+                    if len(position.values) != len(keys):
+                        raise InvalidCursorError("페이지 커서가 현재 쿼리와 일치하지 않습니다. 첫 페이지부터 다시 조회해주세요.")
+                    predicate, params = keyset_predicate(keys, position.values)
+                    result_df = con.execute(
+                        f"SELECT * FROM ({body}) AS page_src WHERE {predicate} "
+                        f"ORDER BY {ordering} LIMIT {page_size + 1} OFFSET {position.ties}",
+                        params,
+                    ).pl()
+                    tail_predicate = null_tail_predicate(keys, position.values)
+                    if tail_predicate and len(result_df) <= page_size:
+                        tail_df = con.execute(
+                            f"SELECT * FROM ({body}) AS page_src WHERE {tail_predicate} "
+                            f"ORDER BY {ordering} LIMIT {page_size + 1 - len(result_df)}"
+                        ).pl()
+                        result_df = pl.concat([result_df, tail_df])
+            elif keyed_body is not None:
+                # 정렬하지 않아도 읽은 순서가 행 번호 순서이므로, 행 번호 조건이 Parquet row group까지 내려가 앞쪽을 건너뜁니다.
+                keys = [OrderKey(PAGE_KEY_COLUMN)]
+                if position.values is not None and len(position.values) != 1:
+                    raise InvalidCursorError("페이지 커서가 현재 쿼리와 일치하지 않습니다. 첫 페이지부터 다시 조회해주세요.")
+                after = "" if position.values is None else f" WHERE {PAGE_KEY_COLUMN} > ?"
+                result_df = con.execute(
+                    f"SELECT * FROM ({body}) AS page_src{after} LIMIT {page_size + 1}",
+                    [] if position.values is None else list(position.values),
+                ).pl()
+            else:
+                paged_query = (
+                    f"SELECT * FROM ({base_query}) AS page_src LIMIT {page_size + 1} OFFSET {position.offset}"
+                )
+                result_df = con.execute(paged_query).pl()
+
+        has_more = len(result_df) > page_size
+        result_df = result_df.head(page_size)
+        next_cursor = None
+        if has_more:
+            key_rows = []
+            # 정렬 키를 커서에 담을 수 없는 타입이면 처음부터 offset 커서로 이어 읽습니다.
+            if keys and (position.values is not None or position.offset == 0):
+                key_rows = [normalize_keyset_values(row) for row in result_df.select([key.name for key in keys]).rows()]
+            last_values = key_rows[-1] if key_rows else None
+
+            if last_values is None:
+                next_position = PageCursor(query_hash, offset=position.offset + page_size)
+            else:
+                ties = 0
+                for row in reversed(key_rows):
+                    if row != last_values:
+                        break
+                    ties += 1
+                if ties == len(key_rows) and position.values == last_values:
+                    ties += position.ties
+                next_position = PageCursor(query_hash, values=last_values, ties=ties)
+            next_cursor = encode_cursor(next_position)
+
+        if keyed_body is not None:
+            result_df = result_df.drop([ROW_KEY_COLUMN, PAGE_KEY_COLUMN], strict=False)
+        return {
+            "tableData": TableData(result_df),
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }
+
+    def execute_query(self, dataset_id: str, query: str, cancel_token: CancelToken | None = None):
+        """사용자 쿼리를 실행하고 결과 반환"""
         base_query = self._rewrite_user_query(query)
-        total_count = self.con.execute(f"SELECT COUNT(*) FROM ({base_query}) AS sub").fetchone()[0]
+        handle = self._get_ready_handle(dataset_id, cancel_token)
+        cached = self.result_cache.get_summary(handle.fingerprint, base_query)
+        if cached is not None:
+            return cached
 
-        paged_query = f"SELECT * FROM ({base_query}) AS query_src LIMIT 10"
-        result_df = self.con.execute(paged_query).pl()
+        with handle.cursor(cancel_token) as con:
+            total_count = con.execute(f"SELECT COUNT(*) FROM ({base_query}) AS sub").fetchone()[0]
 
-        # 대용량: 분포는 샘플로 계산하여 OOM 방지
-        try:
-            sample_limit = min(self.large_sample_rows, max(10, int(total_count)))
-        except Exception:
-            sample_limit = self.large_sample_rows
-        try:
-            sample_df = self.con.execute(f"SELECT * FROM ({base_query}) AS sub LIMIT {sample_limit}").pl()
-        except Exception:
-            sample_df = result_df
-        distributions = self._calculate_distributions(sample_df)
+            paged_query = f"SELECT * FROM ({base_query}) AS query_src LIMIT 10"
+            result_df = con.execute(paged_query).pl()
+            distributions = self.column_profiler.profile(con, base_query, approximate=handle.use_duckdb_view)
 
-        return {
+        result = {
             "columns": result_df.columns,
-            "tableData": result_df.to_dicts(),
+            "tableData": TableData(result_df),
             "distributions": distributions,
             "total": int(total_count)
-        } 
+        }
+        self.result_cache.put_summary(handle.fingerprint, base_query, result)
+        self.result_cache.put_page(handle.fingerprint, base_query, 1, 10, result["tableData"])
+        return result
+
+    def _estimate_query_total(self, con: duckdb.DuckDBPyConnection, handle: DatasetHandle, base_query: str) -> tuple[int, bool]:
+        """앞쪽 일부 행만 스캔해 결과 건수를 추정합니다. 두 번째 값은 추정치인지 여부입니다.
+
+        원본 전체 건수는 로드 시점의 handle.total_rows(Parquet은 row group 메타데이터)를 사용하고,
+        샘플에서 조건을 만족한 비율만큼 늘려 추정합니다.
+        """
+        total_rows = handle.total_rows
+        if normalize_query(base_query).lower() == "select * from df" and total_rows is not None:
+            return int(total_rows), False
+
+        sample_rows = self.count_estimate_sample_rows
+        sample_count = con.execute(
+            f"WITH df AS (SELECT * FROM temp.main.df LIMIT {sample_rows}) "
+            f"SELECT COUNT(*) FROM ({base_query}) AS sub"
+        ).fetchone()[0]
+        if total_rows is None:
+            # 원본 CSV를 변환하는 중이라 전체 건수를 모르면 샘플 건수를 추정치로 보내고 정확한 건수가 뒤따릅니다.
+            return int(sample_count), True
+        if total_rows <= sample_rows:
+            return int(sample_count), False
+        if NON_SCALING_QUERY.search(base_query):
+            return int(sample_count), True
+        return int(round(sample_count * total_rows / sample_rows)), True
+
+    def stream_query(
+        self,
+        dataset_id: str,
+        query: str,
+        cancel_token: CancelToken | None = None,
+    ) -> Iterator[tuple[str, dict]]:
+        """첫 행과 추정 건수를 먼저 내보내고, 정확한 건수와 분포는 계산되는 대로 이어서 내보냅니다."""
+        base_query = self._rewrite_user_query(query)
+        handle = self._get_ready_handle(dataset_id, cancel_token)
+        cached = self.result_cache.get_summary(handle.fingerprint, base_query)
+        if cached is not None:
+            yield "preview", {
+                "columns": cached["columns"],
+                "tableData": cached["tableData"],
+                "total": cached["total"],
+                "total_estimated": False,
+            }
+            yield "total", {"total": cached["total"]}
+            yield "distributions", {"distributions": cached["distributions"]}
+            return
 
-    def download_query(self, query: str) -> bytes:
-        """사용자 쿼리 전체 결과를 CSV로 반환"""
+        with handle.cursor(cancel_token) as con:
+            result_df = con.execute(f"SELECT * FROM ({base_query}) AS query_src LIMIT 10").pl()
+            estimated_total, is_estimate = self._estimate_query_total(con, handle, base_query)
+        table_data = TableData(result_df)
+        yield "preview", {
+            "columns": result_df.columns,
+            "tableData": table_data,
+            "total": estimated_total,
+            "total_estimated": is_estimate,
+        }
+
+        if is_estimate:
+            with handle.cursor(cancel_token) as con:
+                total_count = int(con.execute(f"SELECT COUNT(*) FROM ({base_query}) AS sub").fetchone()[0])
+        else:
+            total_count = estimated_total
+        yield "total", {"total": total_count}
+
+        with handle.cursor(cancel_token) as con:
+            distributions = self.column_profiler.profile(con, base_query, approximate=handle.use_duckdb_view)
+        yield "distributions", {"distributions": distributions}
+
+        result = {
+            "columns": result_df.columns,
+            "tableData": table_data,
+            "distributions": distributions,
+            "total": total_count,
+        }
+        self.result_cache.put_summary(handle.fingerprint, base_query, result)
+        self.result_cache.put_page(handle.fingerprint, base_query, 1, 10, table_data)
+
+    def download_query(
+        self,
+        dataset_id: str,
+        query: str,
+        export_format: str = "csv",
+        cancel_token: CancelToken | None = None,
+    ) -> Iterator[bytes]:
+        """사용자 쿼리 전체 결과를 RecordBatch 단위로 인코딩하며 스트리밍합니다."""
         base_query = self._rewrite_user_query(query)
+        handle = self._get_ready_handle(dataset_id, cancel_token)
+        con = handle.fork()
         try:
-            df = self.con.execute(base_query).pl()
+            if cancel_token is not None:
+                cancel_token.attach(con)
+            try:
+                reader = con.execute(base_query).fetch_record_batch(self.export_batch_rows)
+            finally:
+                if cancel_token is not None:
+                    cancel_token.detach()
+        except DataViewerError:
+            con.close()
+            raise
         except Exception as e:
+            con.close()
             raise RuntimeError(f"쿼리 실행 실패: {e}") from e
 
-        try:
-            csv_bytes_io = io.BytesIO()
-            df.write_csv(csv_bytes_io)
-            csv_bytes_io.seek(0)
-            return csv_bytes_io.getvalue()
-        except Exception as e:
-            raise RuntimeError(f"CSV 변환 실패: {e}") from e
+        def stream():
+            chunks = iter_export(reader, export_format)
+            try:
+                while True:
+                    # 다음 RecordBatch를 읽는 동안에만 커서를 토큰에 연결해 연결 종료 시 중단할 수 있게 합니다.
+                    if cancel_token is not None:
+                        cancel_token.attach(con)
+                    try:
+                        chunk = next(chunks, None)
+                    finally:
+                        if cancel_token is not None:
+                            cancel_token.detach()
+                    if chunk is None:
+                        return
+                    if chunk:
+                        yield chunk
+            finally:
+                con.close()
+
+        return stream()
@@ -0,0 +1,201 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import duckdb
+import polars as pl
+
+from errors import DatasetNotFoundError
+from services.query_executor import CancelToken
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DatasetHandle:
+    """사용자별로 적재된 데이터셋과 전용 DuckDB 커서를 보관합니다."""
+
+    dataset_id: str
+    con: duckdb.DuckDBPyConnection
+    bucket_name: str
+    file_name: str
+    storage_type: str | None = None
+    fingerprint: str | None = None
+    url: str = ""
+    use_duckdb_view: bool = False
+    total_rows: int | None = None
+    source_size: int | None = None
+    # Excel 통합 문서의 시트 목록과 현재 시트
+    sheet: str | None = None
+    sheets: list[str] | None = None
+    # 원본 CSV/Excel 미리보기를 읽는 동안 진행 중인 Parquet 변환 작업(MaterializationJob)
+    materialization: object | None = field(default=None, repr=False)
+    # 변환 중 추정한 전체 행 수. None이면 df를 그대로 세면 됩니다.
+    estimated_rows: int | None = None
+    # df가 시트 앞부분만 담고 있으면 True. 쿼리는 변환이 끝날 때까지 기다립니다.
+    preview_only: bool = False
+    frame: pl.DataFrame | None = field(default=None, repr=False)
+    size_bytes: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    # 핸들을 닫을 때 함께 정리할 자원(로컬 캐시 파일 고정 등)
+    releases: list[Callable[[], None]] = field(default_factory=list, repr=False)
+
+    @contextmanager
+    def cursor(self, cancel_token: CancelToken | None = None):
+        """핸들의 커서를 독점적으로 빌려주고, 취소 토큰이 있으면 실행 중 중단할 수 있게 연결합니다."""
+        with self.lock:
+            if cancel_token is not None:
+                cancel_token.attach(self.con)
+            try:
+                yield self.con
+            finally:
+                if cancel_token is not None:
+                    cancel_token.detach()
+
+    def fork(self) -> duckdb.DuckDBPyConnection:
+        """같은 ``df``를 바라보는 별도 커서를 만듭니다. 호출한 쪽에서 닫아야 합니다.
+
+        다운로드처럼 결과를 오래 스트리밍하는 작업이 핸들 커서를 점유하지 않도록 사용합니다.
+        """
+        with self.lock:
+            con = self.con.cursor()
+            try:
+                if self.frame is not None:
+                    con.register("df", self.frame)
+                else:
+                    row = self.con.execute(
+                        "SELECT sql FROM duckdb_views() WHERE view_name = 'df' AND temporary"
+                    ).fetchone()
+                    if row is None:
+                        raise DatasetNotFoundError("데이터셋 뷰를 찾을 수 없습니다. 데이터셋을 다시 불러와주세요.")
+                    con.execute(row[0])
+            except BaseException:
+                con.close()
+                raise
+            return con
+
+    def close(self):
+        try:
+            self.con.close()
+        except Exception:
+            logger.debug("DuckDB 커서 종료 실패", exc_info=True)
+        for release in self.releases:
+            try:
+                release()
+            except Exception:
+                logger.debug("데이터셋 자원 정리 실패", exc_info=True)
+        self.releases.clear()
+
+
+class DatasetRegistry:
+    """dataset_id 별 DuckDB 커서를 관리하고 LRU + 메모리 예산으로 정리합니다.
+
+    모든 핸들은 하나의 DuckDB 데이터베이스에서 파생된 커서를 사용하므로 버퍼 풀은 공유하지만
+    ``df`` 뷰와 등록된 프레임은 커서마다 분리됩니다.
+    """
+
+    def __init__(self, con: duckdb.DuckDBPyConnection | None = None):
+        self.con = con or duckdb.connect()
+        self.max_handles = int(os.environ.get("DATASET_MAX_HANDLES", "32"))
+        self.memory_budget_bytes = int(
+            os.environ.get("DATASET_MEMORY_BUDGET_BYTES", str(2 * 1024 * 1024 * 1024))
+        )
+        self.idle_ttl_seconds = float(os.environ.get("DATASET_IDLE_TTL_SECONDS", "1800"))
+        self._handles: OrderedDict[str, DatasetHandle] = OrderedDict()
+        self._guard = threading.Lock()
+
+    def create(
+        self,
+        bucket_name: str,
+        file_name: str,
+        storage_type: str | None = None,
+        dataset_id: str | None = None,
+    ) -> DatasetHandle:
+        return DatasetHandle(
+            dataset_id=dataset_id or uuid.uuid4().hex,
+            con=self.con.cursor(),
+            bucket_name=bucket_name,
+            file_name=file_name,
+            storage_type=storage_type,
+        )
+
+    def add(self, handle: DatasetHandle) -> DatasetHandle:
+        handle.last_access = time.monotonic()
+        with self._guard:
+            self._handles[handle.dataset_id] = handle
+            self._handles.move_to_end(handle.dataset_id)
+            evicted = self._collect_evictions(keep=handle.dataset_id)
+        self._close_all(evicted)
+        return handle
+
+    def get(self, dataset_id: str) -> DatasetHandle:
+        with self._guard:
+            evicted = self._collect_evictions(keep=dataset_id)
+            handle = self._handles.get(dataset_id or "")
+            if handle is not None:
+                handle.last_access = time.monotonic()
+                self._handles.move_to_end(dataset_id)
+        self._close_all(evicted)
+        if handle is None:
+            raise DatasetNotFoundError(
+                "데이터셋이 만료되었거나 존재하지 않습니다. 데이터셋을 다시 불러와주세요."
+            )
+        return handle
+
+    def peek(self, dataset_id: str) -> DatasetHandle | None:
+        """LRU 순서를 바꾸지 않고 핸들을 조회합니다."""
+        with self._guard:
+            return self._handles.get(dataset_id)
+
+    def remove(self, dataset_id: str):
+        with self._guard:
+            handle = self._handles.pop(dataset_id, None)
+        if handle is not None:
+            handle.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._guard:
+            return {
+                "handles": len(self._handles),
+                "bytes": sum(handle.size_bytes for handle in self._handles.values()),
+                "max_handles": self.max_handles,
+                "memory_budget_bytes": self.memory_budget_bytes,
+            }
+
+    def _collect_evictions(self, keep: str | None = None) -> list[DatasetHandle]:
+        evicted = []
+        now = time.monotonic()
+        if self.idle_ttl_seconds > 0:
+            for dataset_id, handle in list(self._handles.items()):
+                if dataset_id != keep and now - handle.last_access > self.idle_ttl_seconds:
+                    evicted.append(self._handles.pop(dataset_id))
+
+        total_bytes = sum(handle.size_bytes for handle in self._handles.values())
+        for dataset_id in list(self._handles.keys()):
+            over_count = len(self._handles) > self.max_handles
+            over_budget = total_bytes > self.memory_budget_bytes
+            if not over_count and not over_budget:
+                break
+            if dataset_id == keep:
+                continue
+            handle = self._handles.pop(dataset_id)
+            total_bytes -= handle.size_bytes
+            evicted.append(handle)
+        return evicted
+
+    def _close_all(self, handles: list[DatasetHandle]):
+        for handle in handles:
+            logger.info(
+                "데이터셋 핸들 정리",
+                extra={"dataset_id": handle.dataset_id, "bytes": handle.size_bytes},
+            )
+            # 실행 중인 쿼리가 끝난 뒤 커서를 닫습니다.
+            with handle.lock:
+                handle.close()
@@ -0,0 +1,327 @@
+import os
+import re
+import zipfile
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from itertools import chain, islice
+
+import fastexcel
+import openpyxl
+import polars as pl
+import pyarrow.parquet as pq
+
+from errors import SheetNotFoundError
+
+UNNAMED_COLUMN = re.compile(r"(_duplicated_|__UNNAMED__)\d+$")
+# 열 타입을 정할 때 보는 앞쪽 행 수. 미리보기와 Parquet 변환이 같은 값을 써야 타입이 어긋나지 않습니다.
+SCHEMA_SAMPLE_ROWS = 10000
+# calamine은 날짜 없는 시각을 엑셀 기준일(1899-12-31)의 날짜시간으로 읽습니다.
+EXCEL_EPOCH = date(1899, 12, 31)
+CELL_DTYPES = {"bool": pl.Boolean, "number": pl.Float64, "datetime": pl.Datetime("ms"), "string": pl.String}
+
+
+@dataclass
+class ExcelPreview:
+    frame: pl.DataFrame
+    # 헤더를 제외한 시트 전체 행 수
+    total_rows: int
+    # 시트 끝까지 읽었으면 True (frame이 시트 전체)
+    complete: bool
+
+
+def list_sheets(path: str) -> list[str]:
+    """통합 문서 메타데이터만 읽으므로 파일 크기와 관계없이 바로 끝납니다."""
+    return list(fastexcel.read_excel(path).sheet_names)
+
+
+def resolve_sheet(sheet_names: list[str], sheet: str | None) -> str:
+    if not sheet:
+        return sheet_names[0]
+    if sheet not in sheet_names:
+        raise SheetNotFoundError(f"시트를 찾을 수 없습니다: {sheet}")
+    return sheet
+
+
+def read_preview(path: str, sheet: str, n_rows: int) -> ExcelPreview:
+    """시트 앞부분 n_rows 행만 변환합니다.
+
+    Parquet 변환(write_sheet_parquet)과 같은 읽기 경로와 타입 규칙을 쓰므로 미리보기와 캐시의 타입이 어긋나지 않습니다.
+    xlsx는 앞부분만 스트리밍으로 읽어 통합 문서 크기와 관계없이 메모리를 적게 씁니다.
+    """
+    if not zipfile.is_zipfile(path):
+        sheet_data = fastexcel.read_excel(path).load_sheet(sheet, n_rows=n_rows, schema_sample_rows=SCHEMA_SAMPLE_ROWS)
+        frame = normalize_frame(sheet_data.to_polars())
+        return ExcelPreview(frame, sheet_data.total_height, sheet_data.total_height <= sheet_data.height)
+
+    with _open_xlsx_sheet(path, sheet) as worksheet:
+        reader = XlsxSheetReader(worksheet, max(n_rows, SCHEMA_SAMPLE_ROWS))
+        frame = reader.frame(islice(reader.rows, n_rows + 1))
+        complete = frame.height <= n_rows
+        total_rows = frame.height if complete else reader.total_rows
+    frame = normalize_frame(frame.head(n_rows))
+    return ExcelPreview(frame, total_rows if total_rows is not None else n_rows, complete)
+
+
+def write_sheet_parquet(
+    path: str,
+    sheet: str | int,
+    target: str,
+    clean: Callable[[pl.DataFrame], pl.DataFrame],
+    compression: str,
+    row_group_rows: int,
+    schema_sample_rows: int = SCHEMA_SAMPLE_ROWS,
+) -> int:
+    """시트를 row_group_rows 행씩 읽어 Parquet에 이어 씁니다. 시트 전체를 메모리에 올리지 않습니다.
+
+    정수/날짜 열로 좁히기와 빈 열 지우기는 시트 전체를 봐야 정할 수 있으므로, 먼저 읽은 타입 그대로
+    임시 Parquet에 쓰고 끝에서 row group 단위로 다시 읽어 타입을 바꾸고 결측값을 채웁니다.
+    돌려주는 값은 기록한 행 수입니다.
+    """
+    raw_target = f"{target}.raw"
+    try:
+        plan = _write_raw_parquet(path, sheet, raw_target, compression, row_group_rows, schema_sample_rows)
+        return _write_normalized_parquet(raw_target, target, plan, clean, compression, row_group_rows)
+    finally:
+        if os.path.exists(raw_target):
+            os.remove(raw_target)
+
+
+def _write_raw_parquet(
+    path: str,
+    sheet: str | int,
+    target: str,
+    compression: str,
+    row_group_rows: int,
+    schema_sample_rows: int,
+) -> "NormalizePlan":
+    plan = None
+    writer = None
+    try:
+        for window in _sheet_windows(path, sheet, row_group_rows, schema_sample_rows):
+            if plan is None:
+                plan = NormalizePlan(window.schema)
+            chunk = plan.observe(window).to_arrow()
+            if writer is None:
+                writer = pq.ParquetWriter(target, chunk.schema, compression=compression)
+            writer.write_table(chunk, row_group_size=row_group_rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return plan
+
+
+def _write_normalized_parquet(
+    source: str,
+    target: str,
+    plan: "NormalizePlan",
+    clean: Callable[[pl.DataFrame], pl.DataFrame],
+    compression: str,
+    row_group_rows: int,
+) -> int:
+    raw = pq.ParquetFile(source)
+    if raw.metadata.num_rows:
+        frames = (pl.from_arrow(batch) for batch in raw.iter_batches(batch_size=row_group_rows))
+    else:
+        frames = iter([pl.read_parquet(source)])
+
+    writer = None
+    rows = 0
+    try:
+        for frame in frames:
+            chunk = clean(plan.apply(frame)).to_arrow()
+            if writer is None:
+                writer = pq.ParquetWriter(target, chunk.schema, compression=compression)
+            writer.write_table(chunk, row_group_size=row_group_rows)
+            rows += chunk.num_rows
+    finally:
+        raw.close()
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _sheet_windows(path: str, sheet: str | int, batch_rows: int, schema_sample_rows: int) -> Iterator[pl.DataFrame]:
+    """시트를 batch_rows 행씩 같은 스키마의 프레임으로 돌려줍니다. 빈 시트도 헤더만 있는 프레임 하나를 돌려줍니다."""
+    if not zipfile.is_zipfile(path):
+        # xls는 형식상 시트당 65,536행까지라 한 번에 읽어도 됩니다.
+        frame = pl.from_arrow(fastexcel.read_excel(path).load_sheet_eager(sheet, schema_sample_rows=schema_sample_rows))
+        for offset in range(0, max(frame.height, 1), batch_rows):
+            yield frame.slice(offset, batch_rows)
+        return
+
+    with _open_xlsx_sheet(path, sheet) as worksheet:
+        reader = XlsxSheetReader(worksheet, schema_sample_rows)
+        window = reader.frame(islice(reader.rows, batch_rows))
+        yield window
+        while window.height == batch_rows:
+            window = reader.frame(islice(reader.rows, batch_rows))
+            if window.height:
+                yield window
+
+
+@contextmanager
+def _open_xlsx_sheet(path: str, sheet: str | int):
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if isinstance(sheet, int):
+            yield workbook.worksheets[sheet]
+        else:
+            yield workbook[sheet]
+    finally:
+        workbook.close()
+
+
+class XlsxSheetReader:
+    """openpyxl 읽기 전용 모드로 xlsx 시트를 한 행씩 읽어 calamine(fastexcel)과 같은 규칙의 프레임으로 바꿉니다.
+
+    첫 번째 비어 있지 않은 행을 헤더로 쓰고, 열 타입은 앞쪽 schema_sample_rows 행으로 정합니다.
+    타입이 섞인 열은 문자열로, 그 뒤에 나온 다른 타입 값은 같은 규칙으로 바꾸거나 비웁니다.
+    """
+
+    def __init__(self, worksheet, schema_sample_rows: int):
+        rows = worksheet.iter_rows(min_col=worksheet.min_column, values_only=True)
+        header_row = worksheet.min_row or 1
+        header = ()
+        for header in rows:
+            if any(value is not None for value in header):
+                break
+            header_row += 1
+        self.columns = _column_names(header)
+        self.total_rows = worksheet.max_row - header_row if worksheet.max_row else None
+        sample = [self._fit(row) for row in islice(rows, schema_sample_rows)]
+        self.schema = pl.Schema(
+            {name: _infer_dtype(row[index] for row in sample) for index, name in enumerate(self.columns)}
+        )
+        self.rows = chain(sample, (self._fit(row) for row in rows))
+
+    def frame(self, rows) -> pl.DataFrame:
+        rows = list(rows)
+        return pl.DataFrame(
+            {
+                name: [_coerce_cell(row[index], dtype) for row in rows]
+                for index, (name, dtype) in enumerate(self.schema.items())
+            },
+            schema=self.schema,
+        )
+
+    def _fit(self, row: tuple) -> tuple:
+        width = len(self.columns)
+        if len(row) == width:
+            return row
+        return row[:width] + (None,) * (width - len(row))
+
+
+def _column_names(header: tuple) -> list[str]:
+    names = []
+    seen: dict[str, int] = {}
+    for index, value in enumerate(header):
+        name = _cell_text(value) if value not in (None, "") else f"__UNNAMED__{index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _cell_kind(value) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, (datetime, date, time)):
+        return "datetime"
+    return "string"
+
+
+def _infer_dtype(values) -> pl.DataType:
+    kinds = {_cell_kind(value) for value in values if value is not None}
+    if len(kinds) == 1:
+        return CELL_DTYPES[kinds.pop()]
+    # 값이 없거나 타입이 섞인 열은 calamine처럼 문자열로 읽습니다.
+    return pl.String
+
+
+def _coerce_cell(value, dtype: pl.DataType):
+    if value is None:
+        return None
+    kind = _cell_kind(value)
+    if dtype == pl.String:
+        return _cell_text(value)
+    if dtype == pl.Float64:
+        return float(value) if kind == "number" else None
+    if dtype == pl.Boolean:
+        return value if kind == "bool" else None
+    return _cell_datetime(value) if kind == "datetime" else None
+
+
+def _cell_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time(0, 0))
+    return datetime.combine(EXCEL_EPOCH, value)
+
+
+def _cell_text(value) -> str:
+    kind = _cell_kind(value)
+    if kind == "bool":
+        return "true" if value else "false"
+    if kind == "number":
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+    if kind == "datetime":
+        return _cell_datetime(value).isoformat(sep=" ")
+    return str(value)
+
+
+def normalize_frame(frame: pl.DataFrame) -> pl.DataFrame:
+    """``pl.read_excel``(calamine)과 같은 규칙으로 빈 행/열을 지우고 타입을 좁힙니다."""
+    plan = NormalizePlan(frame.schema)
+    return plan.apply(plan.observe(frame))
+
+
+class NormalizePlan:
+    """이름 없는 빈 열과 모든 값이 비어 있는 행을 지우고, 정수만 있는 실수 열은 Int64로,
+    자정만 있는 날짜시간 열은 Date로 바꿉니다.
+
+    열 단위 규칙은 observe()로 본 모든 프레임에서 성립해야 적용하므로, 시트를 나눠 읽어도 한 번에 읽은 것과 같습니다.
+    """
+
+    def __init__(self, schema: pl.Schema):
+        self.empty_columns = {name for name in schema if name == "" or UNNAMED_COLUMN.match(name)}
+        self.casts: dict[str, tuple[pl.Expr, pl.Expr]] = {}
+        for name, dtype in schema.items():
+            column = pl.col(name)
+            if dtype.is_float():
+                self.casts[name] = (column.floor().eq_missing(column) & column.is_not_nan(), column.cast(pl.Int64))
+            elif dtype == pl.Datetime:
+                self.casts[name] = (column.dt.time().eq(time(0, 0, 0)), column.cast(pl.Date))
+
+    def observe(self, frame: pl.DataFrame) -> pl.DataFrame:
+        """프레임으로 열 규칙을 갱신하고, 모든 값이 비어 있는 행을 지운 프레임을 돌려줍니다."""
+        for name in list(self.empty_columns):
+            column = frame[name]
+            if not (
+                column.null_count() == frame.height
+                or (column.dtype.is_numeric() and column.replace(0, None).null_count() == frame.height)
+            ):
+                self.empty_columns.discard(name)
+        if frame.width:
+            frame = frame.filter(~pl.all_horizontal(pl.all().is_null()))
+        if self.casts:
+            allowed = frame.select(check.all(ignore_nulls=True) for check, _cast in self.casts.values()).row(0)
+            for name, ok in zip(list(self.casts), allowed):
+                if not ok:
+                    del self.casts[name]
+        return frame
+
+    def apply(self, frame: pl.DataFrame) -> pl.DataFrame:
+        if self.empty_columns:
+            frame = frame.drop(self.empty_columns)
+        casts = [cast for name, (_check, cast) in self.casts.items() if name not in self.empty_columns]
+        if casts:
+            frame = frame.with_columns(casts)
+        return frame
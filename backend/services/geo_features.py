@@ -0,0 +1,478 @@
+import logging
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import orjson
+import pyarrow as pa
+import shapefile
+import shapely
+from pyproj import CRS, Transformer
+from shapely.geometry import mapping, shape as to_shapely
+
+from services.crs_cache import CrsCache
+from services.spatial_index import SHP_HEADER_BYTES
+
+logger = logging.getLogger(__name__)
+
+FEATURE_RESULT_SCHEMA = pa.schema([("id", pa.int64()), ("feature", pa.binary())])
+
+
+def json_value(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def record_to_dict(record) -> dict[str, Any]:
+    if record is None:
+        return {}
+    values = record.as_dict() if hasattr(record, "as_dict") else dict(record)
+    return {str(key): json_value(value) for key, value in values.items()}
+
+
+# pyshp 형상 타입 → 묶음 변환 종류. 나머지(MultiPatch 등)는 __geo_interface__로 하나씩 바꿉니다.
+SHAPE_KINDS = {
+    shapefile.POINT: "point",
+    shapefile.POINTZ: "point",
+    shapefile.POINTM: "point",
+    shapefile.MULTIPOINT: "multipoint",
+    shapefile.MULTIPOINTZ: "multipoint",
+    shapefile.MULTIPOINTM: "multipoint",
+    shapefile.POLYLINE: "line",
+    shapefile.POLYLINEZ: "line",
+    shapefile.POLYLINEM: "line",
+    shapefile.POLYGON: "polygon",
+    shapefile.POLYGONZ: "polygon",
+    shapefile.POLYGONM: "polygon",
+}
+MINIMUM_PART_POINTS = {"line": 2, "polygon": 4}
+SINGLE_PART = np.zeros(1, dtype=np.int64)
+GEOJSON_TYPES = {0: "Point", 1: "LineString", 3: "Polygon", 4: "MultiPoint", 5: "MultiLineString", 6: "MultiPolygon"}
+MULTI_TYPE_IDS = {4, 5, 6}
+# 선택한 레코드 사이 간격이 이보다 작으면 건너뛰지 않고 이어서 읽고, 한 번에 읽는 구간은 이 크기까지로 묶습니다.
+SHP_READ_GAP_BYTES = 64 * 1024
+SHP_READ_RUN_BYTES = 8 * 1024 * 1024
+# 종류를 모르거나 바로 읽을 수 없는 레코드. 레코드별로 pyshp __geo_interface__를 거쳐 변환합니다.
+UNREADABLE_PARTS = (None, np.empty((0, 2)), SINGLE_PART)
+
+
+def read_geometries(layer_path: Path, reader, record_ids: list[int]) -> np.ndarray:
+    """레코드 번호의 형상을 shapely 배열로 읽습니다. 읽을 수 없거나 빈 형상은 None입니다.
+
+    SHX가 있으면 SHP 레코드의 좌표 영역을 numpy로 바로 읽어 pyshp의 좌표별 파이썬 객체를 만들지 않습니다.
+    좌표는 한 배열로 모아 종류별로 한 번에 만듭니다. 다각형은 pyshp와 같이 시계 방향 링을 외곽으로 보며,
+    외곽이 하나이거나 구멍이 없는 경우만 묶어서 만들고 나머지는 __geo_interface__로 구멍 소속을 가립니다.
+    레코드는 파일 위치 순서로 정렬해 가까운 것끼리 묶어 한 번에 순차로 읽습니다.
+    """
+    shx_path = layer_path.with_suffix(".shx")
+    if shx_path.exists() and len(record_ids):
+        entries = _read_record_parts(layer_path, shx_path, record_ids)
+    else:
+        entries = [_shape_parts(reader, record_id) for record_id in record_ids]
+    return _build_geometries(entries, lambda position: reader.shape(record_ids[position]))
+
+
+def _read_record_parts(layer_path: Path, shx_path: Path, record_ids: list[int]) -> list:
+    """SHX의 위치/길이로 레코드를 파일 순서로 정렬하고, 간격이 SHP_READ_GAP_BYTES 이하인 레코드를
+    SHP_READ_RUN_BYTES까지 한 구간으로 묶어 구간마다 한 번씩 읽습니다. 결과는 record_ids 순서입니다."""
+    index = np.memmap(shx_path, dtype=">i4", mode="r", offset=SHP_HEADER_BYTES).reshape(-1, 2)
+    rows = index[np.asarray(record_ids, dtype=np.int64)].astype(np.int64) * 2
+    starts = rows[:, 0]
+    ends = starts + rows[:, 1] + 8
+    order = np.argsort(starts, kind="stable")
+    entries: list = [None] * len(record_ids)
+    with layer_path.open("rb") as handle:
+        run_start = 0
+        while run_start < len(order):
+            first = starts[order[run_start]]
+            run_end = run_start + 1
+            last = ends[order[run_start]]
+            while run_end < len(order):
+                position = order[run_end]
+                if starts[position] - last > SHP_READ_GAP_BYTES or ends[position] - first > SHP_READ_RUN_BYTES:
+                    break
+                last = max(last, ends[position])
+                run_end += 1
+            handle.seek(int(first))
+            data = handle.read(int(last - first))
+            for position in order[run_start:run_end].tolist():
+                entries[position] = _record_parts(data, int(starts[position] - first))
+            run_start = run_end
+    return entries
+
+
+def _record_parts(data: bytes, offset: int) -> tuple[str | None, np.ndarray, np.ndarray] | None:
+    """SHP 레코드 하나의 (종류, 좌표 배열, 파트 시작 위치). 레코드 머리(8바이트) 뒤가 형상 내용입니다.
+
+    잘리거나 개수/파트 위치가 맞지 않는 레코드는 UNREADABLE_PARTS로 돌려 레코드별 변환(pyshp)으로 넘깁니다.
+    """
+    try:
+        return _parse_record(data, offset)
+    except ValueError:
+        return UNREADABLE_PARTS
+
+
+def _parse_record(data: bytes, offset: int) -> tuple[str | None, np.ndarray, np.ndarray] | None:
+    shape_type = int(np.frombuffer(data, "<i4", 1, offset + 8)[0])
+    kind = SHAPE_KINDS.get(shape_type)
+    if shape_type == shapefile.NULL:
+        return None
+    if kind == "point":
+        return kind, np.frombuffer(data, "<f8", 2, offset + 12).reshape(1, 2), SINGLE_PART
+    if kind == "multipoint":
+        point_count = int(np.frombuffer(data, "<i4", 1, offset + 44)[0])
+        if point_count < 0:
+            raise ValueError("음수 좌표 수")
+        return kind, np.frombuffer(data, "<f8", 2 * point_count, offset + 48).reshape(-1, 2), SINGLE_PART
+    if kind in {"line", "polygon"}:
+        part_count, point_count = np.frombuffer(data, "<i4", 2, offset + 44).tolist()
+        if part_count < 0 or point_count < 0:
+            raise ValueError("음수 파트/좌표 수")
+        starts = np.frombuffer(data, "<i4", part_count, offset + 52)
+        points_offset = offset + 52 + 4 * part_count
+        points = np.frombuffer(data, "<f8", 2 * point_count, points_offset).reshape(-1, 2)
+        if point_count and (not part_count or starts[0] != 0 or starts[-1] >= point_count or (np.diff(starts) < 0).any()):
+            raise ValueError("파트 시작 위치가 좌표 범위와 맞지 않습니다")
+        return kind, points, starts
+    return UNREADABLE_PARTS
+
+
+def _shape_parts(reader, record_id: int) -> tuple[str | None, np.ndarray, np.ndarray] | None:
+    try:
+        shape = reader.shape(record_id)
+    except Exception:
+        return UNREADABLE_PARTS
+    if shape is None or shape.shapeType == shapefile.NULL:
+        return None
+    if not shape.points:
+        return SHAPE_KINDS.get(shape.shapeType), np.empty((0, 2)), SINGLE_PART
+    points = np.asarray(shape.points, dtype=np.float64)[:, :2]
+    return SHAPE_KINDS.get(shape.shapeType), points, np.asarray(getattr(shape, "parts", None) or [0], dtype=np.int64)
+
+
+def _build_geometries(entries: list, load_shape) -> np.ndarray:
+    geometries = np.full(len(entries), None, dtype=object)
+    batches: dict[str, tuple[list[int], list[np.ndarray], list[np.ndarray]]] = {}
+    fallback = []
+    for position, entry in enumerate(entries):
+        if entry is None:
+            continue
+        kind, points, starts = entry
+        if not len(points):
+            if kind is None:
+                fallback.append(position)
+            continue
+        lengths = np.diff(np.append(starts, len(points)))
+        if kind is None or lengths.min() < MINIMUM_PART_POINTS.get(kind, 1):
+            fallback.append(position)
+            continue
+        positions, coords, part_lengths = batches.setdefault(kind, ([], [], []))
+        positions.append(position)
+        coords.append(points)
+        part_lengths.append(lengths)
+
+    for kind, (positions, coords, part_lengths) in batches.items():
+        positions = np.asarray(positions)
+        try:
+            fallback.extend(_build_batch(geometries, kind, positions, coords, part_lengths))
+        except (ValueError, shapely.errors.GEOSException):
+            # 묶음 하나가 실패해도 미리보기 전체가 실패하지 않도록 그 묶음은 레코드별로 다시 변환합니다.
+            logger.warning("지도 형상 일괄 변환 실패, 레코드별로 변환", extra={"kind": kind, "records": len(positions)})
+            geometries[positions] = None
+            fallback.extend(positions.tolist())
+
+    for position in fallback:
+        try:
+            geometry = to_shapely(load_shape(position).__geo_interface__)
+            geometries[position] = None if geometry.is_empty else geometry
+        except Exception:
+            logger.warning("지도 형상 변환 실패", exc_info=True)
+    return geometries
+
+
+def _build_batch(geometries, kind: str, positions: np.ndarray, coords: list, part_lengths: list) -> list[int]:
+    """같은 종류의 형상을 한 번에 만들어 geometries에 넣고, 묶어서 만들 수 없는 위치를 돌려줍니다."""
+    coords = np.concatenate(coords)
+    lengths = np.concatenate(part_lengths)
+    part_owner = np.repeat(np.arange(len(positions)), [len(item) for item in part_lengths])
+    if kind == "point":
+        geometries[positions] = shapely.points(coords[np.cumsum(lengths) - lengths])
+    elif kind == "multipoint":
+        geometries[positions] = shapely.multipoints(shapely.points(coords), indices=np.repeat(part_owner, lengths))
+    elif kind == "line":
+        lines = shapely.linestrings(coords, indices=np.repeat(np.arange(len(lengths)), lengths))
+        geometries[positions] = _collect_parts(lines, part_owner, len(positions), shapely.multilinestrings)
+    else:
+        return _build_polygons(geometries, positions, coords, lengths, part_owner)
+    return []
+
+
+def _collect_parts(parts: np.ndarray, owner: np.ndarray, count: int, combine) -> np.ndarray:
+    """파트가 하나인 형상은 파트 그대로, 여러 개면 combine(Multi*)으로 묶습니다. pyshp __geo_interface__와 같습니다."""
+    result = np.full(count, None, dtype=object)
+    single = np.bincount(owner, minlength=count)[owner] == 1
+    result[owner[single]] = parts[single]
+    if not single.all():
+        multi_owner, indices = np.unique(owner[~single], return_inverse=True)
+        result[multi_owner] = combine(parts[~single], indices=indices)
+    return result
+
+
+def _build_polygons(geometries, positions, coords, lengths, ring_owner) -> list[int]:
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    # 링별 부호 있는 넓이(신발끈 공식). 링 경계를 넘는 항은 누적합 구간에서 빠집니다.
+    cross = np.append(coords[:-1, 0] * coords[1:, 1] - coords[1:, 0] * coords[:-1, 1], 0.0)
+    cumulative = np.concatenate([[0.0], np.cumsum(cross)])
+    area = (cumulative[ends - 1] - cumulative[starts]) / 2
+    exterior = area < 0
+
+    count = len(positions)
+    exteriors = np.bincount(ring_owner, weights=exterior, minlength=count)
+    rings_per_shape = np.bincount(ring_owner, minlength=count)
+    degenerate = np.bincount(ring_owner, weights=area == 0, minlength=count)
+    batched = ((exteriors == 1) | ((exteriors > 1) & (exteriors == rings_per_shape))) & (degenerate == 0)
+
+    ring_index = np.flatnonzero(batched[ring_owner])
+    if len(ring_index):
+        # 형상마다 외곽 링을 먼저 두고, 외곽 링에서 새 다각형을 시작합니다.
+        ring_index = ring_index[np.lexsort((~exterior[ring_index], ring_owner[ring_index]))]
+        ring_lengths = lengths[ring_index]
+        ring_offsets = np.cumsum(ring_lengths) - ring_lengths
+        coordinate_index = np.arange(ring_lengths.sum()) + np.repeat(starts[ring_index] - ring_offsets, ring_lengths)
+        rings = shapely.linearrings(
+            coords[coordinate_index],
+            indices=np.repeat(np.arange(len(ring_index)), ring_lengths),
+        )
+        polygon_index = np.cumsum(exterior[ring_index]) - 1
+        polygons = shapely.polygons(rings, indices=polygon_index)
+        polygon_owner = ring_owner[ring_index][exterior[ring_index]]
+        built = _collect_parts(polygons, polygon_owner, count, shapely.multipolygons)
+        geometries[positions[batched]] = built[batched]
+    return positions[~batched].tolist()
+
+
+def simplify_geometries(
+    geometries: np.ndarray,
+    tolerance: float,
+    layer_bounds: list[float],
+    max_coordinates: int,
+) -> np.ndarray:
+    """요청 허용 오차로 한 번에 단순화하고, 좌표가 max_coordinates를 넘는 형상만 허용 오차를 두 배씩 키워 다시 줄입니다."""
+    if tolerance > 0:
+        geometries = shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+    over = np.flatnonzero(shapely.get_num_coordinates(geometries) > max_coordinates)
+    if not len(over):
+        return geometries
+
+    span = 1.0
+    if len(layer_bounds) == 4:
+        span = max(
+            abs(layer_bounds[2] - layer_bounds[0]),
+            abs(layer_bounds[3] - layer_bounds[1]),
+            1e-9,
+        )
+    adaptive_tolerance = max(tolerance, span / 100000)
+    for _ in range(10):
+        geometries[over] = shapely.simplify(geometries[over], adaptive_tolerance, preserve_topology=True)
+        over = over[shapely.get_num_coordinates(geometries[over]) > max_coordinates]
+        if not len(over):
+            break
+        adaptive_tolerance *= 2
+    return geometries
+
+
+def geometries_to_geojson(geometries: np.ndarray) -> list[dict[str, Any]]:
+    """GeoJSON geometry 사전 목록. 좌표는 한 번에 꺼낸 배열의 조각(view)으로 두어 파이썬 float 객체를 만들지 않습니다.
+
+    orjson.OPT_SERIALIZE_NUMPY(table_encoding.dumps)로 직렬화하면 리스트로 바꾼 것과 같은 JSON이 나옵니다.
+    """
+    type_ids = shapely.get_type_id(geometries)
+    parts, part_owner = shapely.get_parts(geometries, return_index=True)
+    part_types = shapely.get_type_id(parts)
+    polygon_parts = np.flatnonzero(part_types == 3)
+    other_parts = np.flatnonzero(part_types != 3)
+    rings, ring_part = shapely.get_rings(parts[polygon_parts], return_index=True)
+    sequence_part = np.concatenate([polygon_parts[ring_part], other_parts])
+    order = np.argsort(sequence_part, kind="stable")
+    sequences = np.concatenate([rings, parts[other_parts]])[order]
+    sequence_part = sequence_part[order]
+
+    coordinates = shapely.get_coordinates(sequences)
+    ends = np.cumsum(shapely.get_num_coordinates(sequences)).tolist()
+    part_values: list[Any] = [None] * len(parts)
+    part_types = part_types.tolist()
+    start = 0
+    for part, end in zip(sequence_part.tolist(), ends):
+        sequence = coordinates[start:end]
+        start = end
+        part_type = part_types[part]
+        if part_type == 3:
+            if part_values[part] is None:
+                part_values[part] = []
+            part_values[part].append(sequence)
+        else:
+            part_values[part] = sequence[0] if part_type == 0 else sequence
+
+    grouped: list[list[Any]] = [[] for _ in range(len(geometries))]
+    for owner, value in zip(part_owner.tolist(), part_values):
+        grouped[owner].append(value)
+    result = []
+    for geometry, type_id, values in zip(geometries, type_ids.tolist(), grouped):
+        if type_id not in GEOJSON_TYPES:
+            result.append(mapping(geometry))
+            continue
+        result.append({"type": GEOJSON_TYPES[type_id], "coordinates": values if type_id in MULTI_TYPE_IDS else values[0]})
+    return result
+
+
+def project_geometries(
+    layer_path: Path,
+    reader,
+    feature_ids: list[int],
+    to_wgs84: Transformer,
+    simplify_tolerance: float,
+    layer_bounds: list[float],
+    max_coordinates: int,
+) -> np.ndarray:
+    """레코드 형상을 읽어 WGS84로 바꾸고 단순화한 shapely 배열. 좌표 변환은 Transformer.transform 한 번입니다."""
+    geometries = read_geometries(layer_path, reader, feature_ids)
+    geometries = shapely.transform(
+        geometries,
+        lambda coords: np.column_stack(to_wgs84.transform(coords[:, 0], coords[:, 1])),
+    )
+    return simplify_geometries(
+        geometries,
+        max(0.0, float(simplify_tolerance or 0.0)),
+        layer_bounds,
+        max_coordinates,
+    )
+
+
+def features_from_geometries(reader, feature_ids: list[int], fields: list[str], geometries: np.ndarray) -> list[dict[str, Any]]:
+    """WGS84 형상 배열을 GeoJSON Feature 목록으로 만듭니다. 빈 형상은 빠지고, 속성은 남은 레코드만 읽습니다."""
+    kept = np.flatnonzero(~shapely.is_missing(geometries) & ~shapely.is_empty(geometries))
+    features = []
+    for position, geometry in zip(kept.tolist(), geometries_to_geojson(geometries[kept])):
+        record = reader.record(feature_ids[position], fields=fields)
+        if record is None:
+            continue
+        features.append(
+            {
+                "type": "Feature",
+                "id": int(feature_ids[position]),
+                "geometry": geometry,
+                "properties": record_to_dict(record),
+            }
+        )
+    return features
+
+
+def build_features(
+    layer_path: Path,
+    reader,
+    feature_ids: list[int],
+    fields: list[str],
+    to_wgs84: Transformer,
+    simplify_tolerance: float,
+    layer_bounds: list[float],
+    max_coordinates: int,
+) -> list[dict[str, Any]]:
+    """레코드 번호 묶음을 GeoJSON Feature 목록으로 바꿉니다. 변환할 수 없거나 빈 형상의 레코드는 빠집니다."""
+    geometries = project_geometries(
+        layer_path,
+        reader,
+        feature_ids,
+        to_wgs84,
+        simplify_tolerance,
+        layer_bounds,
+        max_coordinates,
+    )
+    return features_from_geometries(reader, feature_ids, fields, geometries)
+
+
+def encode_feature_task(
+    layer_path: str,
+    encoding: str | None,
+    fields: list[str],
+    source_crs: CRS,
+    simplify_tolerance: float,
+    layer_bounds: list[float],
+    max_coordinates: int,
+    feature_ids: list[int],
+) -> bytes:
+    """작업 프로세스에 넘길 입력. 레코드 번호 배열과 설정(스키마 메타데이터)만 Arrow IPC로 담습니다."""
+    metadata = {
+        "layer_path": layer_path,
+        "encoding": encoding or "",
+        "fields": orjson.dumps(fields).decode("utf-8"),
+        "crs": source_crs.to_wkt(),
+        "tolerance": repr(float(simplify_tolerance or 0.0)),
+        "bounds": orjson.dumps(layer_bounds).decode("utf-8"),
+        "max_coordinates": str(int(max_coordinates)),
+    }
+    table = pa.table({"id": pa.array(feature_ids, type=pa.int64())}).replace_schema_metadata(metadata)
+    return _write_ipc(table)
+
+
+# 작업 프로세스는 오래 살아 있으므로 배치마다 좌표계를 다시 해석하지 않도록 프로세스별로 캐시합니다.
+_worker_crs_cache = CrsCache()
+
+
+def build_feature_batch(task: bytes) -> bytes:
+    """작업 프로세스 진입점. SHP를 직접 열어 레코드를 읽고, GeoJSON Feature를 JSON 바이트로 만들어 돌려줍니다."""
+    table = pa.ipc.open_stream(task).read_all()
+    metadata = {key.decode("utf-8"): value.decode("utf-8") for key, value in table.schema.metadata.items()}
+    fields = orjson.loads(metadata["fields"])
+    bounds = orjson.loads(metadata["bounds"])
+    tolerance = float(metadata["tolerance"])
+    max_coordinates = int(metadata["max_coordinates"])
+    to_wgs84 = _worker_crs_cache.transformer(
+        _worker_crs_cache.from_wkt(metadata["crs"]), _worker_crs_cache.from_epsg(4326)
+    )
+
+    feature_ids = table.column("id").to_pylist()
+    with shapefile.Reader(
+        metadata["layer_path"],
+        encoding=metadata["encoding"] or None,
+        encodingErrors="replace",
+    ) as reader:
+        built = build_features(
+            Path(metadata["layer_path"]),
+            reader,
+            feature_ids,
+            fields,
+            to_wgs84,
+            tolerance,
+            bounds,
+            max_coordinates,
+        )
+    ids = [feature["id"] for feature in built]
+    features = [orjson.dumps(feature, option=orjson.OPT_SERIALIZE_NUMPY) for feature in built]
+    return _write_ipc(pa.table([pa.array(ids, type=pa.int64()), pa.array(features, type=pa.binary())], schema=FEATURE_RESULT_SCHEMA))
+
+
+def decode_feature_batch(payload: bytes) -> list[orjson.Fragment]:
+    """작업 결과를 다시 파싱하지 않고 응답 직렬화 때 그대로 끼워 넣을 조각으로 돌려줍니다."""
+    table = pa.ipc.open_stream(payload).read_all()
+    return [orjson.Fragment(feature) for feature in table.column("feature").to_pylist()]
+
+
+def _write_ipc(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
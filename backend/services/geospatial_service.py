@@ -1,44 +1,67 @@
 import codecs
 import hashlib
 import logging
-import math
 import os
 import shutil
 import tempfile
 import threading
 import zipfile
 from dataclasses import dataclass
-from datetime import date, datetime
-from decimal import Decimal
 from itertools import islice
 from pathlib import Path, PurePosixPath
 from typing import Any
 
 import shapefile
-from minio.error import S3Error
-from pyproj import CRS, Transformer
-from shapely import get_num_coordinates
-from shapely.geometry import mapping, shape as to_shapely
-from shapely.ops import transform as transform_geometry
+from pyproj import CRS
 
 from errors import GeospatialDataError
+from services.cpu_pool import CpuPool
+from services.crs_cache import CrsCache
+from services.geo_features import (
+    build_feature_batch,
+    build_features,
+    decode_feature_batch,
+    encode_feature_task,
+    features_from_geometries,
+    record_to_dict,
+)
+from services.layer_catalog import LayerCatalog
+from services.lod_pyramid import LodPyramid
+from services.object_metadata import ObjectMetadataCache
+from services.shared_state import InterProcessLock
+from services.spatial_index import SpatialIndex, SpatialIndexStore
+from services.vector_tiles import VectorTileBuilder
 
 logger = logging.getLogger(__name__)
 
 SHAPEFILE_EXTENSIONS = {".shp", ".shx", ".dbf", ".prj", ".cpg"}
 GEOSPATIAL_EXTENSIONS = {"shp", "zip"}
 CACHE_FORMAT_VERSION = "2"
+POINT_GEOMETRY_TYPES = {"POINT", "POINTZ", "POINTM"}
 
 
 @dataclass(frozen=True)
 class PreparedDataset:
     root: Path
     layers: tuple[Path, ...]
+    # 원본 지문(.fingerprint)으로 관리되는 캐시 디렉터리. 공간 인덱스와 레이어 카탈로그를 여기에 둡니다.
+    cache_dir: Path
+    fingerprint: str
 
 
 class GeospatialService:
-    def __init__(self, minio_client, nas_root_path: str):
+    def __init__(
+        self,
+        minio_client,
+        nas_root_path: str,
+        object_metadata: ObjectMetadataCache | None = None,
+        cpu_pool: CpuPool | None = None,
+        crs_cache: CrsCache | None = None,
+    ):
         self.minio_client = minio_client
+        self.object_metadata = object_metadata or ObjectMetadataCache(minio_client)
+        self.cpu_pool = cpu_pool or CpuPool()
+        self.crs_cache = crs_cache or CrsCache()
         self.nas_root_path = nas_root_path
         self.cache_root = Path(
             os.environ.get(
@@ -47,11 +70,17 @@ class GeospatialService:
             )
         )
         self.cache_root.mkdir(parents=True, exist_ok=True)
-        self._cache_locks: dict[str, threading.Lock] = {}
+        self.tile_builder = VectorTileBuilder(self.crs_cache)
+        self.spatial_indexes = SpatialIndexStore()
+        self.layer_catalog = LayerCatalog()
+        self.lod_pyramid = LodPyramid()
+        self._cache_locks: dict[str, InterProcessLock] = {}
         self._cache_locks_guard = threading.Lock()
         self.default_preview_limit = int(os.environ.get("GEO_PREVIEW_LIMIT", "1000"))
         self.max_preview_limit = int(os.environ.get("GEO_MAX_PREVIEW_LIMIT", "5000"))
         self.max_property_fields = int(os.environ.get("GEO_MAX_PROPERTY_FIELDS", "30"))
+        # 미리보기 표본: spatial(공간 층화, 기본값) 또는 stride(파일 순서 등간격)
+        self.preview_sampling = os.environ.get("GEO_PREVIEW_SAMPLING", "spatial").lower()
         self.max_coordinates_per_feature = int(
             os.environ.get("GEO_MAX_COORDINATES_PER_FEATURE", "20000")
         )
@@ -70,16 +99,24 @@ class GeospatialService:
         storage_type: str | None = None,
     ) -> dict[str, Any]:
         prepared = self._prepare_dataset(bucket_name, file_name, storage_type)
-        layer_summaries = [self._inspect_layer(prepared, path) for path in prepared.layers]
+        # 처음 여는 데이터셋은 레이어 요약과 미리보기 레코드를 모두 만든 뒤 카탈로그를 한 번만 씁니다.
+        layer_ids = [self._layer_id(prepared, path) for path in prepared.layers]
+        selected_path = prepared.layers[0]
+        builds = {
+            f"layer:{layer_id}": (lambda layer_id=layer_id, path=path: self._read_layer_summary(layer_id, path))
+            for layer_id, path in zip(layer_ids, prepared.layers)
+        }
+        builds[f"records:{layer_ids[0]}"] = lambda: self._read_preview_records(selected_path)
+        entries = self.layer_catalog.get_many(
+            prepared.cache_dir,
+            prepared.fingerprint,
+            builds,
+            self._get_cache_lock(prepared.cache_dir),
+        )
+        layer_summaries = [entries[f"layer:{layer_id}"] for layer_id in layer_ids]
         selected_layer = layer_summaries[0]
-        selected_path = self._select_layer(prepared, selected_layer["id"])
-
-        with self._open_reader(selected_path) as reader:
-            columns = self._field_names(reader)
-            preview_records = []
-            for record in islice(reader.iterRecords(), 10):
-                if record is not None:
-                    preview_records.append(self._record_to_dict(record))
+        columns = selected_layer["fields"]
+        preview_records = entries[f"records:{layer_ids[0]}"]
 
         return {
             "dataset_type": "geospatial",
@@ -108,7 +145,9 @@ class GeospatialService:
         limit: int | None = None,
         simplify_tolerance: float = 0.0,
         fields: list[str] | None = None,
+        zoom: float | None = None,
     ) -> dict[str, Any]:
+        """레이어 미리보기 FeatureCollection. zoom을 주면 simplify_tolerance 대신 그 줌에 맞는 LOD 단계 형상을 씁니다."""
         prepared = self._prepare_dataset(bucket_name, file_name, storage_type)
         selected_path = self._select_layer(prepared, layer)
         layer_summary = self._inspect_layer(prepared, selected_path)
@@ -117,54 +156,83 @@ class GeospatialService:
             max(1, int(limit or self.default_preview_limit)),
         )
 
+        tolerance = max(0.0, float(simplify_tolerance or 0.0))
+        lod_level = None
+        if zoom is not None:
+            tolerance = 0.0
+            # 점 레이어는 단순화할 것이 없으므로 원본 좌표를 그대로 씁니다.
+            if layer_summary["geometry_type"] not in POINT_GEOMETRY_TYPES:
+                lod_level = self.lod_pyramid.level_for(zoom)
+        # 요청 상한이 충분히 크면 형상 변환은 CPU 작업 프로세스에서 하고, 이 스레드는 레코드 번호만 고릅니다.
+        # LOD 단계 형상은 이미 변환/단순화되어 있으므로 풀을 쓰지 않습니다.
+        use_pool = self.cpu_pool.enabled and safe_limit >= self.cpu_pool.min_items
+        features = None
         with self._open_reader(selected_path) as reader:
             all_fields = self._field_names(reader)
             selected_fields = self._select_fields(all_fields, fields)
             source_crs, crs_warning = self._read_crs(selected_path, reader.bbox)
-            to_wgs84 = Transformer.from_crs(source_crs, CRS.from_epsg(4326), always_xy=True)
+            to_wgs84 = self.crs_cache.transformer(source_crs, self.crs_cache.from_epsg(4326))
             source_bbox = self._source_bbox(bbox, source_crs) if bbox else None
 
             if source_bbox:
-                candidates = reader.iterShapeRecords(
-                    fields=selected_fields or None,
-                    bbox=source_bbox,
+                # 공간 인덱스로 bbox와 겹치는 레코드 번호만 찾아 그 레코드만 읽습니다.
+                candidate_ids, _candidate_bounds = self._spatial_index(prepared, selected_path, reader).query(
+                    *source_bbox
                 )
-                records = list(islice(candidates, safe_limit + 1))
-                has_more = len(records) > safe_limit
-                records = records[:safe_limit]
+                has_more = len(candidate_ids) > safe_limit
                 sampled = has_more
-                feature_ids = range(len(records))
+                feature_ids = candidate_ids[:safe_limit].tolist()
             else:
                 total = len(reader)
-                indices = self._sample_indices(total, safe_limit)
-                indexed_records = [
-                    (index, reader.shapeRecord(index, fields=selected_fields))
-                    for index in indices
-                ]
-                indexed_records = [
-                    (index, record)
-                    for index, record in indexed_records
-                    if record is not None
-                ]
-                feature_ids = [index for index, _record in indexed_records]
-                records = [record for _index, record in indexed_records]
-                has_more = total > len(records)
+                if self.preview_sampling == "stride" or total <= safe_limit:
+                    feature_ids = self._sample_indices(total, safe_limit)
+                else:
+                    # 공간 인덱스의 층화 표본 순서로 화면 전체에 고르게 퍼진 레코드를 고릅니다(오름차순).
+                    feature_ids = self._spatial_index(prepared, selected_path, reader).sample(safe_limit).tolist()
+                has_more = total > len(feature_ids)
                 sampled = total > safe_limit
 
-            features = []
-            omitted = 0
-            for feature_id, shape_record in zip(feature_ids, records):
-                feature = self._shape_record_to_feature(
-                    shape_record,
-                    feature_id,
+            if lod_level is not None:
+                level_path = prepared.cache_dir / "lod" / self._layer_key(prepared, selected_path) / self.lod_pyramid.file_name(
+                    lod_level, self.max_coordinates_per_feature
+                )
+                geometries = self.lod_pyramid.geometries(level_path, selected_path, feature_ids)
+                if geometries is not None:
+                    features = features_from_geometries(reader, feature_ids, selected_fields, geometries)
+                else:
+                    # 단계 파일은 백그라운드에서 만들고, 그동안은 단계와 같은 허용 오차로 바로 단순화합니다.
+                    self.lod_pyramid.schedule(
+                        level_path,
+                        lod_level,
+                        selected_path,
+                        lambda: self._open_reader(selected_path),
+                        to_wgs84,
+                        layer_summary["bounds"],
+                        self.max_coordinates_per_feature,
+                    )
+                    tolerance = self.lod_pyramid.tolerance(lod_level)
+            if features is None and not use_pool:
+                features = build_features(
+                    selected_path,
+                    reader,
+                    feature_ids,
+                    selected_fields,
                     to_wgs84,
-                    simplify_tolerance,
+                    tolerance,
                     layer_summary["bounds"],
+                    self.max_coordinates_per_feature,
                 )
-                if feature is None:
-                    omitted += 1
-                    continue
-                features.append(feature)
+
+        if features is None:
+            features = self._build_features_in_pool(
+                selected_path,
+                selected_fields,
+                source_crs,
+                feature_ids,
+                tolerance,
+                layer_summary["bounds"],
+            )
+        omitted = len(feature_ids) - len(features)
 
         return {
             "type": "FeatureCollection",
@@ -183,9 +251,31 @@ class GeospatialService:
                 "crs_warning": crs_warning,
                 "fields": selected_fields,
                 "omitted_invalid_geometries": omitted,
+                "lod_zoom": lod_level,
             },
         }
 
+    def get_tile(
+        self,
+        bucket_name: str,
+        file_name: str,
+        storage_type: str | None,
+        layer: str | None,
+        z: int,
+        x: int,
+        y: int,
+        fields: list[str] | None = None,
+    ) -> bytes:
+        """레이어의 XYZ 타일을 Mapbox Vector Tile로 돌려줍니다. 겹치는 형상이 없으면 빈 바이트입니다."""
+        prepared = self._prepare_dataset(bucket_name, file_name, storage_type)
+        selected_path = self._select_layer(prepared, layer)
+        with self._open_reader(selected_path) as reader:
+            selected_fields = self._select_fields(self._field_names(reader), fields)
+            source_crs, _crs_warning = self._read_crs(selected_path, reader.bbox)
+            index = self._spatial_index(prepared, selected_path, reader)
+            tile_dir = prepared.cache_dir / "tiles" / self._layer_key(prepared, selected_path)
+            return self.tile_builder.render(tile_dir, selected_path, reader, index, source_crs, selected_fields, z, x, y)
+
     def _prepare_dataset(
         self,
         bucket_name: str,
@@ -201,7 +291,16 @@ class GeospatialService:
             if not source_path.exists():
                 raise FileNotFoundError(f"파일을 찾을 수 없습니다: {source_path}")
             if extension == ".shp":
-                return PreparedDataset(source_path.parent, (source_path,))
+                # 원본은 그대로 읽고, 캐시 디렉터리는 공간 인덱스 보관용으로만 씁니다.
+                fingerprint = ":".join(
+                    f"{path.stat().st_size}:{path.stat().st_mtime_ns}"
+                    for path in (source_path, source_path.with_suffix(".shx"))
+                    if path.exists()
+                )
+                cache_dir = self._cache_directory("nas", bucket_name, file_name)
+                with self._get_cache_lock(cache_dir):
+                    self._refresh_cache(cache_dir, fingerprint)
+                return PreparedDataset(source_path.parent, (source_path,), cache_dir, fingerprint)
 
             fingerprint = f"{source_path.stat().st_size}:{source_path.stat().st_mtime_ns}"
             cache_dir = self._cache_directory("nas", bucket_name, file_name)
@@ -210,20 +309,17 @@ class GeospatialService:
                 archive_path = cache_dir / "source.zip"
                 if not archive_path.exists():
                     shutil.copy2(source_path, archive_path)
-                return self._prepare_archive(cache_dir, archive_path)
+                return self._prepare_archive(cache_dir, archive_path, fingerprint)
 
         if not self.minio_client:
             raise ConnectionError("MinIO 클라이언트가 초기화되지 않았습니다.")
-        if not self.minio_client.bucket_exists(bucket_name):
+        if not self.object_metadata.bucket_exists(bucket_name):
             raise FileNotFoundError(f"MinIO 버킷 '{bucket_name}'을 찾을 수 없습니다.")
 
         object_name = file_name.lstrip("/")
-        try:
-            stat = self.minio_client.stat_object(bucket_name, object_name)
-        except S3Error as exc:
-            if exc.code in {"NoSuchKey", "NoSuchObject", "NoSuchBucket"}:
-                raise FileNotFoundError(f"파일 '{object_name}'을 찾을 수 없습니다.") from exc
-            raise
+        stat = self.object_metadata.stat(bucket_name, object_name)
+        if stat is None:
+            raise FileNotFoundError(f"파일 '{object_name}'을 찾을 수 없습니다.")
 
         fingerprint = ":".join(
             [
@@ -240,12 +336,12 @@ class GeospatialService:
                 archive_path = cache_dir / "source.zip"
                 if not archive_path.exists():
                     self.minio_client.fget_object(bucket_name, object_name, str(archive_path))
-                return self._prepare_archive(cache_dir, archive_path)
+                return self._prepare_archive(cache_dir, archive_path, fingerprint)
 
             layer_path = self._download_minio_shapefile(cache_dir, bucket_name, object_name)
-            return PreparedDataset(cache_dir, (layer_path,))
+            return PreparedDataset(cache_dir, (layer_path,), cache_dir, fingerprint)
 
-    def _prepare_archive(self, cache_dir: Path, archive_path: Path) -> PreparedDataset:
+    def _prepare_archive(self, cache_dir: Path, archive_path: Path, fingerprint: str) -> PreparedDataset:
         extract_root = cache_dir / "archive"
         marker = extract_root / ".complete"
         cache_is_current = (
@@ -262,7 +358,7 @@ class GeospatialService:
         layers = tuple(sorted(extract_root.rglob("*.shp")))
         if not layers:
             raise GeospatialDataError("ZIP 파일 안에서 SHP 파일을 찾지 못했습니다.")
-        return PreparedDataset(extract_root, layers)
+        return PreparedDataset(extract_root, layers, cache_dir, fingerprint)
 
     def _extract_archive(self, archive_path: Path, destination: Path):
         try:
@@ -327,14 +423,34 @@ class GeospatialService:
             logger.warning("SHP 속성 파일(DBF)이 없습니다.", extra={"file": object_name})
         return downloaded[".shp"]
 
+    def _layer_id(self, prepared: PreparedDataset, layer_path: Path) -> str:
+        return layer_path.relative_to(prepared.root).as_posix()
+
     def _inspect_layer(self, prepared: PreparedDataset, layer_path: Path) -> dict[str, Any]:
+        layer_id = self._layer_id(prepared, layer_path)
+        return self._catalog_entry(
+            prepared,
+            f"layer:{layer_id}",
+            lambda: self._read_layer_summary(layer_id, layer_path),
+        )
+
+    def _catalog_entry(self, prepared: PreparedDataset, key: str, build):
+        return self.layer_catalog.get(
+            prepared.cache_dir,
+            prepared.fingerprint,
+            key,
+            build,
+            self._get_cache_lock(prepared.cache_dir),
+        )
+
+    def _read_layer_summary(self, layer_id: str, layer_path: Path) -> dict[str, Any]:
         with self._open_reader(layer_path) as reader:
             source_crs, crs_warning = self._read_crs(layer_path, reader.bbox)
             bounds = self._transform_bounds(reader.bbox, source_crs)
             authority = source_crs.to_authority()
             source_crs_name = ":".join(authority) if authority else source_crs.name
             return {
-                "id": layer_path.relative_to(prepared.root).as_posix(),
+                "id": layer_id,
                 "name": layer_path.stem,
                 "feature_count": len(reader),
                 "geometry_type": reader.shapeTypeName,
@@ -344,6 +460,10 @@ class GeospatialService:
                 "fields": self._field_names(reader),
             }
 
+    def _read_preview_records(self, layer_path: Path) -> list[dict[str, Any]]:
+        with self._open_reader(layer_path) as reader:
+            return [record_to_dict(record) for record in islice(reader.iterRecords(), 10) if record is not None]
+
     def _open_reader(self, layer_path: Path):
         try:
             encoding = self._read_dbf_encoding(layer_path)
@@ -391,13 +511,13 @@ class GeospatialService:
         prj_path = layer_path.with_suffix(".prj")
         if prj_path.exists():
             try:
-                return CRS.from_wkt(prj_path.read_text(encoding="utf-8", errors="replace")), None
+                return self.crs_cache.from_wkt(prj_path.read_text(encoding="utf-8", errors="replace")), None
             except Exception as exc:
                 raise GeospatialDataError(f"좌표계(PRJ)를 해석할 수 없습니다: {exc}") from exc
 
         bounds = [float(value) for value in source_bounds] if source_bounds else []
         if len(bounds) == 4 and self._looks_like_wgs84(bounds):
-            return CRS.from_epsg(4326), "PRJ 파일이 없어 좌표를 WGS84로 간주했습니다."
+            return self.crs_cache.from_epsg(4326), "PRJ 파일이 없어 좌표를 WGS84로 간주했습니다."
         raise GeospatialDataError(
             "PRJ 파일이 없어 지도 좌표계를 확인할 수 없습니다. SHP와 같은 이름의 PRJ 파일을 포함해주세요."
         )
@@ -405,7 +525,7 @@ class GeospatialService:
     def _transform_bounds(self, source_bounds, source_crs: CRS) -> list[float]:
         if not source_bounds:
             return []
-        transformer = Transformer.from_crs(source_crs, CRS.from_epsg(4326), always_xy=True)
+        transformer = self.crs_cache.transformer(source_crs, self.crs_cache.from_epsg(4326))
         transformed = transformer.transform_bounds(
             *[float(value) for value in source_bounds],
             densify_pts=21,
@@ -417,65 +537,46 @@ class GeospatialService:
         bbox: tuple[float, float, float, float],
         source_crs: CRS,
     ) -> tuple[float, float, float, float]:
-        transformer = Transformer.from_crs(CRS.from_epsg(4326), source_crs, always_xy=True)
+        transformer = self.crs_cache.transformer(self.crs_cache.from_epsg(4326), source_crs)
         transformed = transformer.transform_bounds(*bbox, densify_pts=21)
         return tuple(float(value) for value in transformed)
 
-    def _shape_record_to_feature(
+    def _build_features_in_pool(
         self,
-        shape_record,
-        feature_id: int,
-        to_wgs84: Transformer,
-        simplify_tolerance: float,
+        layer_path: Path,
+        fields: list[str],
+        source_crs: CRS,
+        feature_ids: list[int],
+        tolerance: float,
         layer_bounds: list[float],
-    ) -> dict[str, Any] | None:
-        if shape_record is None or shape_record.shape is None:
-            return None
-        try:
-            geometry = to_shapely(shape_record.shape.__geo_interface__)
-            if geometry.is_empty:
-                return None
-            geometry = transform_geometry(to_wgs84.transform, geometry)
-            geometry = self._simplify_geometry(
-                geometry,
-                max(0.0, float(simplify_tolerance or 0.0)),
+    ) -> list:
+        """레코드 번호를 작업자 수만큼 나눠 프로세스 풀에서 Feature를 만듭니다. 결과는 직렬화된 JSON 조각입니다."""
+        encoding = self._read_dbf_encoding(layer_path)
+        tasks = [
+            encode_feature_task(
+                str(layer_path),
+                encoding,
+                fields,
+                source_crs,
+                tolerance,
                 layer_bounds,
+                self.max_coordinates_per_feature,
+                chunk,
             )
-            if geometry.is_empty:
-                return None
-            properties = self._record_to_dict(shape_record.record)
-            return {
-                "type": "Feature",
-                "id": int(feature_id),
-                "geometry": mapping(geometry),
-                "properties": properties,
-            }
-        except Exception:
-            logger.warning("지도 형상 변환 실패", exc_info=True)
-            return None
+            for chunk in self.cpu_pool.split(list(feature_ids), min_chunk=self.cpu_pool.min_items // 2)
+        ]
+        features = []
+        for payload in self.cpu_pool.map(build_feature_batch, tasks):
+            features.extend(decode_feature_batch(payload))
+        return features
 
-    def _simplify_geometry(self, geometry, tolerance: float, layer_bounds: list[float]):
-        if tolerance > 0:
-            geometry = geometry.simplify(tolerance, preserve_topology=True)
+    def _layer_key(self, prepared: PreparedDataset, layer_path: Path) -> str:
+        layer_id = self._layer_id(prepared, layer_path)
+        return hashlib.sha256(layer_id.encode("utf-8")).hexdigest()[:16]
 
-        coordinate_count = get_num_coordinates(geometry)
-        if coordinate_count <= self.max_coordinates_per_feature:
-            return geometry
-
-        span = 1.0
-        if len(layer_bounds) == 4:
-            span = max(
-                abs(layer_bounds[2] - layer_bounds[0]),
-                abs(layer_bounds[3] - layer_bounds[1]),
-                1e-9,
-            )
-        adaptive_tolerance = max(tolerance, span / 100000)
-        for _ in range(10):
-            geometry = geometry.simplify(adaptive_tolerance, preserve_topology=True)
-            if get_num_coordinates(geometry) <= self.max_coordinates_per_feature:
-                break
-            adaptive_tolerance *= 2
-        return geometry
+    def _spatial_index(self, prepared: PreparedDataset, layer_path: Path, reader) -> SpatialIndex:
+        index_dir = prepared.cache_dir / "index" / self._layer_key(prepared, layer_path)
+        return self.spatial_indexes.get(index_dir, layer_path, reader, self._get_cache_lock(prepared.cache_dir))
 
     def _select_layer(self, prepared: PreparedDataset, layer: str | None) -> Path:
         if not layer:
@@ -500,25 +601,6 @@ class GeospatialService:
                 names.append(str(name))
         return names
 
-    def _record_to_dict(self, record) -> dict[str, Any]:
-        if record is None:
-            return {}
-        values = record.as_dict() if hasattr(record, "as_dict") else dict(record)
-        return {str(key): self._json_value(value) for key, value in values.items()}
-
-    def _json_value(self, value):
-        if value is None or isinstance(value, (str, int, float, bool)):
-            if isinstance(value, float) and not math.isfinite(value):
-                return None
-            return value
-        if isinstance(value, (date, datetime)):
-            return value.isoformat()
-        if isinstance(value, Decimal):
-            return float(value)
-        if isinstance(value, bytes):
-            return value.decode("utf-8", errors="replace")
-        return str(value)
-
     def _sample_indices(self, total: int, limit: int) -> list[int]:
         if total <= limit:
             return list(range(total))
@@ -549,10 +631,16 @@ class GeospatialService:
         ).hexdigest()
         return self.cache_root / cache_key
 
-    def _get_cache_lock(self, cache_dir: Path) -> threading.Lock:
+    def _get_cache_lock(self, cache_dir: Path) -> InterProcessLock:
+        # 캐시 디렉터리는 지문이 바뀌면 통째로 지우므로 잠금 파일은 바깥(.locks)에 둡니다.
         cache_key = str(cache_dir)
         with self._cache_locks_guard:
-            return self._cache_locks.setdefault(cache_key, threading.Lock())
+            lock = self._cache_locks.get(cache_key)
+            if lock is None:
+                lock = self._cache_locks[cache_key] = InterProcessLock(
+                    self.cache_root / ".locks" / f"{cache_dir.name}.lock"
+                )
+            return lock
 
     def _refresh_cache(self, cache_dir: Path, fingerprint: str):
         fingerprint_file = cache_dir / ".fingerprint"
@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+LAYER_CATALOG_VERSION = "1"
+CATALOG_FILE_NAME = "catalog.json"
+
+
+class LayerCatalog:
+    """레이어 메타데이터(피처 수, 형상 타입, 범위, 좌표계, 필드 등)를 데이터셋 캐시 디렉터리의 catalog.json에 보관합니다.
+
+    catalog.json은 원본 지문(.fingerprint)으로 관리되는 캐시 디렉터리 안에 있으므로 원본이 바뀌면 함께 지워집니다.
+    읽은 카탈로그는 메모리에도 데이터셋 단위로 두어, 같은 지문이면 파일을 열지 않고 바로 답합니다.
+    """
+
+    def __init__(self):
+        self.max_datasets = max(1, int(os.environ.get("GEO_LAYER_CATALOG_CACHE_SIZE", "64")))
+        self._datasets: OrderedDict[str, tuple[str, dict[str, Any]]] = OrderedDict()
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.loaded = 0
+        self.built = 0
+
+    def get(self, cache_dir: Path, fingerprint: str, key: str, build: Callable[[], Any], lock) -> Any:
+        """메모리, catalog.json 순으로 찾고 없으면 build()로 만들어 lock(프로세스 간 잠금)을 잡고 기록합니다."""
+        return self.get_many(cache_dir, fingerprint, {key: build}, lock)[key]
+
+    def get_many(self, cache_dir: Path, fingerprint: str, builds: dict[str, Callable[[], Any]], lock) -> dict[str, Any]:
+        """여러 항목을 한 번에 찾습니다. 없는 항목을 모두 만든 뒤 catalog.json은 한 번만 다시 씁니다."""
+        entries = self._memory_entries(cache_dir, fingerprint)
+        if entries is not None and all(key in entries for key in builds):
+            with self._guard:
+                self.hits += len(builds)
+            return {key: entries[key] for key in builds}
+
+        entries = self._read(cache_dir, fingerprint)
+        found = {key: entries[key] for key in builds if key in entries}
+        if found:
+            self._remember(cache_dir, fingerprint, entries)
+            with self._guard:
+                self.loaded += len(found)
+        missing = {key: build() for key, build in builds.items() if key not in found}
+        if not missing:
+            return found
+
+        with lock:
+            # 다른 워커가 그사이 다른 레이어를 기록했을 수 있으므로 다시 읽어 합칩니다.
+            entries = {**self._read(cache_dir, fingerprint), **missing}
+            self._write(cache_dir, fingerprint, entries)
+        self._remember(cache_dir, fingerprint, entries)
+        with self._guard:
+            self.built += len(missing)
+        return {key: found[key] if key in found else missing[key] for key in builds}
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            return {"datasets": len(self._datasets), "hits": self.hits, "loaded": self.loaded, "built": self.built}
+
+    def _memory_entries(self, cache_dir: Path, fingerprint: str) -> dict[str, Any] | None:
+        with self._guard:
+            cached = self._datasets.get(str(cache_dir))
+            if cached is None or cached[0] != fingerprint:
+                return None
+            self._datasets.move_to_end(str(cache_dir))
+            return cached[1]
+
+    def _remember(self, cache_dir: Path, fingerprint: str, entries: dict[str, Any]):
+        with self._guard:
+            self._datasets[str(cache_dir)] = (fingerprint, entries)
+            self._datasets.move_to_end(str(cache_dir))
+            while len(self._datasets) > self.max_datasets:
+                self._datasets.popitem(last=False)
+
+    def _read(self, cache_dir: Path, fingerprint: str) -> dict[str, Any]:
+        try:
+            catalog = orjson.loads((cache_dir / CATALOG_FILE_NAME).read_bytes())
+        except FileNotFoundError:
+            return {}
+        except (OSError, orjson.JSONDecodeError):
+            logger.warning("레이어 카탈로그를 읽을 수 없어 다시 만듭니다.", extra={"cache_dir": str(cache_dir)})
+            return {}
+        if catalog.get("version") != LAYER_CATALOG_VERSION or catalog.get("fingerprint") != fingerprint:
+            return {}
+        return catalog.get("entries", {})
+
+    def _write(self, cache_dir: Path, fingerprint: str, entries: dict[str, Any]):
+        catalog_path = cache_dir / CATALOG_FILE_NAME
+        partial_path = catalog_path.with_name(f"{CATALOG_FILE_NAME}.{uuid.uuid4().hex}.part")
+        partial_path.write_bytes(
+            orjson.dumps({"version": LAYER_CATALOG_VERSION, "fingerprint": fingerprint, "entries": entries})
+        )
+        os.replace(partial_path, catalog_path)
@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pyarrow as pa
+import shapely
+
+from services.geo_features import project_geometries
+from services.shared_state import InterProcessLock
+
+logger = logging.getLogger(__name__)
+
+LOD_FORMAT_VERSION = "1"
+LOD_SCHEMA = pa.schema([("wkb", pa.binary())])
+
+
+class LodPyramid:
+    """레이어 전체를 몇 개의 줌 단계로 미리 단순화해 지오 캐시 디렉터리에 두는 LOD 피라미드.
+
+    단계마다 WGS84로 바꾸고 화면 GEO_LOD_PIXEL_TOLERANCE 픽셀 크기로 단순화한 형상을 레코드 번호 순서의 WKB로
+    Arrow IPC 파일에 씁니다. 요청 줌보다 세밀한 단계 중 가장 거친 단계를 고르므로, 같은 줌에서 화면을 옮길 때는
+    단순화를 다시 하지 않고 해상도에 맞는 크기의 형상을 돌려줍니다. 원본 지문(.fingerprint)으로 관리되는 캐시
+    디렉터리 안에 있으므로 원본이 바뀌면 함께 지워집니다.
+
+    레이어 전체를 변환하는 단계 생성은 요청 스레드가 아니라 백그라운드 스레드에서 단계 파일별 잠금을 잡고 합니다.
+    단계 파일이 생기기 전까지 호출하는 쪽은 같은 허용 오차로 바로 단순화해 응답합니다.
+    """
+
+    def __init__(self):
+        zooms = os.environ.get("GEO_LOD_ZOOMS", "4,6,8,10,12,14")
+        self.zooms = sorted({int(value) for value in zooms.split(",") if value.strip()})
+        self.pixel_tolerance = float(os.environ.get("GEO_LOD_PIXEL_TOLERANCE", "1.5"))
+        self.build_chunk_size = max(1, int(os.environ.get("GEO_LOD_BUILD_CHUNK_SIZE", "20000")))
+        self.max_open = max(1, int(os.environ.get("GEO_LOD_CACHE_SIZE", "16")))
+        self.build_workers = max(1, int(os.environ.get("GEO_LOD_BUILD_WORKERS", "1")))
+        self._open: OrderedDict[str, pa.Table] = OrderedDict()
+        self._builds: dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.build_workers, thread_name_prefix="dataviewer-lod")
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.loaded = 0
+        self.built = 0
+        self.failed = 0
+
+    def level_for(self, zoom: float) -> int | None:
+        """줌에 쓸 단계. 가장 세밀한 단계보다 더 확대하면 None(원본 좌표)입니다."""
+        for level in self.zooms:
+            if level >= zoom:
+                return level
+        return None
+
+    def tolerance(self, level: int) -> float:
+        """단계 줌에서 화면 픽셀 크기(경위도)에 GEO_LOD_PIXEL_TOLERANCE를 곱한 단순화 허용 오차."""
+        return 360 / (256 * 2**level) * self.pixel_tolerance
+
+    def file_name(self, level: int, max_coordinates: int) -> str:
+        return f"z{level}-{self.pixel_tolerance:g}-{max_coordinates}-v{LOD_FORMAT_VERSION}.arrow"
+
+    def geometries(self, level_path: Path, layer_path: Path, feature_ids: list[int]) -> np.ndarray | None:
+        """단계 파일에서 레코드 번호의 단순화된 WGS84 형상을 꺼냅니다. 단계 파일이 아직 없으면 None입니다."""
+        source_stat = layer_path.stat()
+        key = f"{level_path}:{source_stat.st_size}:{source_stat.st_mtime_ns}"
+        with self._guard:
+            table = self._open.get(key)
+            if table is not None:
+                self._open.move_to_end(key)
+                self.hits += 1
+
+        if table is None:
+            table = self._load(level_path)
+            if table is None:
+                return None
+            with self._guard:
+                self.loaded += 1
+                self._open[key] = table
+                while len(self._open) > self.max_open:
+                    self._open.popitem(last=False)
+
+        wkb = table.column("wkb").take(pa.array(feature_ids, type=pa.int64())).to_pylist()
+        return shapely.from_wkb(np.asarray(wkb, dtype=object))
+
+    def schedule(
+        self,
+        level_path: Path,
+        level: int,
+        layer_path: Path,
+        open_reader: Callable[[], Any],
+        to_wgs84,
+        layer_bounds: list[float],
+        max_coordinates: int,
+    ):
+        """단계 파일 생성을 백그라운드에 맡깁니다. 같은 단계 파일을 이미 만드는 중이면 아무것도 하지 않습니다."""
+        with self._guard:
+            if str(level_path) in self._builds:
+                return
+            self._builds[str(level_path)] = self._executor.submit(
+                self._run_build, level_path, level, layer_path, open_reader, to_wgs84, layer_bounds, max_coordinates
+            )
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """진행 중인 단계 생성이 끝날 때까지 기다립니다. 모두 끝났으면 True입니다."""
+        with self._guard:
+            futures = list(self._builds.values())
+        _done, not_done = wait_futures(futures, timeout=timeout)
+        return not not_done
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            return {
+                "zooms": self.zooms,
+                "open": len(self._open),
+                "hits": self.hits,
+                "loaded": self.loaded,
+                "built": self.built,
+                "failed": self.failed,
+                "building": len(self._builds),
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _load(self, level_path: Path) -> pa.Table | None:
+        if not level_path.exists():
+            return None
+        try:
+            return pa.ipc.open_file(pa.memory_map(str(level_path))).read_all()
+        except (OSError, pa.ArrowInvalid):
+            logger.warning("LOD 단계 파일을 읽을 수 없어 다시 만듭니다.", extra={"path": str(level_path)})
+            return None
+
+    def _run_build(self, level_path, level, layer_path, open_reader, to_wgs84, layer_bounds, max_coordinates):
+        counter = None
+        try:
+            # 데이터셋 캐시 잠금이 아니라 단계 파일별 잠금이므로, 생성 중에도 같은 데이터셋의 다른 요청은 막히지 않습니다.
+            with InterProcessLock(level_path.with_name(f"{level_path.name}.lock")):
+                if not level_path.exists():
+                    with open_reader() as reader:
+                        self._build(level_path, level, layer_path, reader, to_wgs84, layer_bounds, max_coordinates)
+                    counter = "built"
+        except Exception:
+            counter = "failed"
+            logger.exception("LOD 단계 생성 실패", extra={"layer": str(layer_path), "zoom": level})
+        finally:
+            with self._guard:
+                if counter is not None:
+                    setattr(self, counter, getattr(self, counter) + 1)
+                self._builds.pop(str(level_path), None)
+
+    def _build(self, level_path, level, layer_path, reader, to_wgs84, layer_bounds, max_coordinates):
+        tolerance = self.tolerance(level)
+        level_path.parent.mkdir(parents=True, exist_ok=True)
+        # 다른 워커가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 이름을 바꿉니다.
+        partial_path = level_path.with_name(f"{level_path.name}.{uuid.uuid4().hex}.part")
+        with pa.OSFile(str(partial_path), "wb") as sink, pa.ipc.new_file(sink, LOD_SCHEMA) as writer:
+            for start in range(0, len(reader), self.build_chunk_size):
+                feature_ids = list(range(start, min(len(reader), start + self.build_chunk_size)))
+                geometries = project_geometries(
+                    layer_path,
+                    reader,
+                    feature_ids,
+                    to_wgs84,
+                    tolerance,
+                    layer_bounds,
+                    max_coordinates,
+                )
+                wkb = shapely.to_wkb(geometries)
+                writer.write_batch(pa.record_batch([pa.array(wkb.tolist(), type=pa.binary())], schema=LOD_SCHEMA))
+        os.replace(partial_path, level_path)
+        logger.info("LOD 단계 생성", extra={"layer": str(layer_path), "zoom": level, "records": len(reader)})
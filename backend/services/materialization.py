@@ -0,0 +1,210 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import orjson
+
+from errors import JobNotFoundError
+from services.shared_state import SharedStateStore
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class MaterializedParquet:
+    """변환이 끝난 Parquet 캐시. MinIO에 올린 경우 객체 이름과 etag를 함께 가집니다."""
+
+    path: str
+    rows: int
+    object_name: str | None = None
+    etag: str | None = None
+
+
+@dataclass
+class MaterializationJob:
+    job_id: str
+    key: str
+    bucket_name: str
+    file_name: str
+    status: str = JOB_PENDING
+    error: str | None = None
+    result: MaterializedParquet | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    _callbacks: list[Callable[["MaterializationJob"], None]] = field(default_factory=list, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def add_done_callback(self, callback: Callable[["MaterializationJob"], None]):
+        """작업이 끝나면 callback을 호출합니다. 이미 끝났으면 바로 호출합니다."""
+        with self._lock:
+            if not self.finished:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """작업과 완료 콜백이 모두 끝날 때까지 기다립니다."""
+        return self._finished.wait(timeout)
+
+    def to_dict(self) -> dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "bucket_name": self.bucket_name,
+            "file_name": self.file_name,
+            "rows": self.result.rows if self.result else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else None,
+        }
+
+    def _finish(self, status: str, result: MaterializedParquet | None = None, error: str | None = None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception("Parquet 변환 완료 후처리 실패", extra={"job_id": self.job_id})
+        # 대기하던 쪽이 깨어날 때는 핸들 전환까지 끝나 있도록 콜백 뒤에 알립니다.
+        self._finished.set()
+
+
+class MaterializationQueue:
+    """Parquet 캐시 변환 작업을 백그라운드에서 실행합니다.
+
+    같은 원본(fingerprint)에 대한 작업은 하나만 실행하고, 뒤이어 요청한 쪽은 같은 작업을 돌려받습니다.
+    끝난 작업은 상태 조회를 위해 최근 MATERIALIZE_JOB_HISTORY 개까지 보관합니다.
+    공유 저장소가 있으면 작업 상태를 다른 워커도 조회할 수 있게 남기고, 같은 원본의 변환은 워커 간 잠금으로
+    한 번에 하나만 실행합니다.
+    """
+
+    def __init__(self, shared_state: SharedStateStore | None = None):
+        self.shared_state = shared_state
+        self.max_workers = max(1, int(os.environ.get("MATERIALIZE_MAX_WORKERS", "1")))
+        self.history_size = max(1, int(os.environ.get("MATERIALIZE_JOB_HISTORY", "200")))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="dataviewer-materialize",
+        )
+        self._jobs: OrderedDict[str, MaterializationJob] = OrderedDict()
+        self._active: dict[str, MaterializationJob] = {}
+        self._guard = threading.Lock()
+
+    def submit(
+        self,
+        key: str,
+        bucket_name: str,
+        file_name: str,
+        func: Callable[[], MaterializedParquet],
+    ) -> MaterializationJob:
+        with self._guard:
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            job = MaterializationJob(uuid.uuid4().hex, key, bucket_name, file_name)
+            self._active[key] = job
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.history_size:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if not oldest.finished:
+                    break
+                del self._jobs[oldest_id]
+        logger.info("Parquet 변환 작업 등록", extra={"job_id": job.job_id, "bucket": bucket_name, "file_name": file_name})
+        self._publish(job)
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def get(self, job_id: str) -> MaterializationJob:
+        with self._guard:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError("변환 작업을 찾을 수 없습니다.")
+        return job
+
+    def get_status(self, job_id: str) -> dict[str, Any]:
+        """작업 상태. 이 워커에 없는 작업이면 공유 저장소에 남은 상태를 돌려줍니다."""
+        try:
+            return self.get(job_id).to_dict()
+        except JobNotFoundError:
+            payload = self.shared_state.get_job(job_id) if self.shared_state is not None else None
+            if payload is None:
+                raise
+            return orjson.loads(payload)
+
+    def stats(self) -> dict[str, int]:
+        with self._guard:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "max_workers": self.max_workers,
+            "pending": statuses.count(JOB_PENDING),
+            "running": statuses.count(JOB_RUNNING),
+            "done": statuses.count(JOB_DONE),
+            "failed": statuses.count(JOB_FAILED),
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job: MaterializationJob, func: Callable[[], MaterializedParquet]):
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        self._publish(job)
+        try:
+            if self.shared_state is not None:
+                # 다른 워커가 같은 원본을 변환 중이면 끝날 때까지 기다립니다. 변환 함수는 이미 만들어진 캐시를 재사용합니다.
+                with self.shared_state.lock(f"materialize:{job.key}"):
+                    result = func()
+            else:
+                result = func()
+        except Exception as exc:
+            logger.exception("Parquet 변환 작업 실패", extra={"job_id": job.job_id})
+            self._release(job)
+            job._finish(JOB_FAILED, error=str(exc))
+            self._publish(job)
+            return
+        logger.info(
+            "Parquet 변환 작업 완료",
+            extra={"job_id": job.job_id, "rows": result.rows, "seconds": round(time.time() - job.started_at, 3)},
+        )
+        self._release(job)
+        job._finish(JOB_DONE, result=result)
+        self._publish(job)
+
+    def _publish(self, job: MaterializationJob):
+        if self.shared_state is None:
+            return
+        try:
+            self.shared_state.save_job(job.job_id, orjson.dumps(job.to_dict()).decode("utf-8"))
+        except Exception:
+            logger.warning("변환 작업 상태 공유 실패", extra={"job_id": job.job_id}, exc_info=True)
+
+    def _release(self, job: MaterializationJob):
+        with self._guard:
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
@@ -0,0 +1,166 @@
+import contextvars
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from posixpath import basename, splitext
+
+import pyarrow.parquet as pq
+
+GLOB_CHARS = ("*", "?", "[")
+
+
+@dataclass(frozen=True)
+class PartFile:
+    """여러 파일 데이터셋의 구성 파일 하나. key는 버킷 기준 경로로 Hive 파티션(dt=...) 경로를 그대로 가집니다."""
+
+    key: str
+    path: str
+    size: int
+    version: str
+
+    @property
+    def ext(self) -> str:
+        return splitext(self.key)[1].lower().lstrip(".")
+
+    @property
+    def etag(self) -> str:
+        # 로컬 객체 캐시가 버전을 etag로 구분하므로 MinIO 객체는 etag를 version에 담습니다.
+        return self.version
+
+
+def is_multi_file(file_name: str | None) -> bool:
+    """접두사(끝이 /)나 glob 패턴이면 여러 파일 데이터셋입니다."""
+    if not file_name:
+        return False
+    return file_name.endswith("/") or any(char in file_name for char in GLOB_CHARS)
+
+
+def split_pattern(file_name: str) -> tuple[str, re.Pattern]:
+    """glob에서 와일드카드 앞 고정 디렉터리(목록 조회 시작점)와 전체 경로 정규식을 돌려줍니다.
+
+    ``events/`` 는 ``events/**`` 와 같고, ``**`` 는 여러 단계 디렉터리, ``*`` 과 ``?`` 는 한 단계 안에서만 맞춥니다.
+    """
+    pattern = file_name.lstrip("/")
+    if not pattern or pattern.endswith("/"):
+        pattern += "**"
+    if ".." in pattern.split("/"):
+        raise PermissionError("경로 이탈이 감지되었습니다.")
+    wildcard = min((pattern.find(char) for char in GLOB_CHARS if char in pattern), default=len(pattern))
+    prefix = pattern[: pattern.rfind("/", 0, wildcard) + 1]
+    return prefix, re.compile(glob_to_regex(pattern))
+
+
+def is_hidden(key: str) -> bool:
+    """_SUCCESS 같은 작업 표시 파일과 숨김/임시 파일은 데이터 파일이 아닙니다."""
+    return basename(key).startswith(("_", "."))
+
+
+def glob_to_regex(pattern: str) -> str:
+    parts = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+            continue
+        if pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", index + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[index + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                index = end
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return "".join(parts) + r"\Z"
+
+
+def list_nas_files(root: str, prefix: str, matcher: re.Pattern, max_workers: int) -> list[PartFile]:
+    """root/prefix 아래를 하위 디렉터리(파티션)별로 나눠 병렬로 훑습니다."""
+    base = os.path.join(root, prefix)
+    if not os.path.isdir(base):
+        return []
+
+    def relative_key(path: str) -> str:
+        return os.path.relpath(path, root).replace(os.sep, "/")
+
+    def walk(directory: str) -> list[PartFile]:
+        files = []
+        for current, _dirs, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(current, name)
+                key = relative_key(path)
+                if is_hidden(key) or not matcher.match(key):
+                    continue
+                stat = os.stat(path)
+                files.append(PartFile(key, path, stat.st_size, str(stat.st_mtime_ns)))
+        return files
+
+    files = []
+    directories = []
+    with os.scandir(base) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                directories.append(entry.path)
+            elif entry.is_file():
+                key = relative_key(entry.path)
+                if not is_hidden(key) and matcher.match(key):
+                    stat = entry.stat()
+                    files.append(PartFile(key, entry.path, stat.st_size, str(stat.st_mtime_ns)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataviewer-list") as executor:
+        for found in executor.map(walk, directories):
+            files.extend(found)
+    return sorted(files, key=lambda part: part.key)
+
+
+def list_minio_objects(client, bucket_name: str, prefix: str, matcher: re.Pattern, max_workers: int) -> list[PartFile]:
+    """접두사 바로 아래 디렉터리(파티션)마다 목록 조회를 병렬로 실행합니다. 크기/etag는 목록 응답에서 얻습니다."""
+    files = []
+    directories = []
+    for item in client.list_objects(bucket_name, prefix=prefix, recursive=False):
+        if item.is_dir:
+            directories.append(item.object_name)
+        elif not is_hidden(item.object_name) and matcher.match(item.object_name):
+            files.append(_object_part(item))
+
+    def walk(directory: str) -> list[PartFile]:
+        return [
+            _object_part(item)
+            for item in client.list_objects(bucket_name, prefix=directory, recursive=True)
+            if not item.is_dir and not is_hidden(item.object_name) and matcher.match(item.object_name)
+        ]
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataviewer-list") as executor:
+        # 요청별 스토리지 호출 수가 목록 조회 스레드에서도 집계되도록 컨텍스트를 넘깁니다.
+        futures = [executor.submit(contextvars.copy_context().run, walk, directory) for directory in directories]
+        for future in futures:
+            files.extend(future.result())
+    return sorted(files, key=lambda part: part.key)
+
+
+def _object_part(item) -> PartFile:
+    return PartFile(item.object_name, "", int(item.size or 0), str(item.etag or item.last_modified or ""))
+
+
+def read_parquet_footers(paths: list[str], max_workers: int) -> tuple[int, bool]:
+    """Parquet footer를 병렬로 읽어 전체 행 수와 모든 파일의 스키마가 같은지 돌려줍니다."""
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataviewer-footer") as executor:
+        metadata = list(executor.map(pq.read_metadata, paths))
+    rows = sum(item.num_rows for item in metadata)
+    first = metadata[0].schema.to_arrow_schema() if metadata else None
+    same_schema = all(item.schema.to_arrow_schema().equals(first) for item in metadata[1:])
+    return rows, same_schema
@@ -0,0 +1,219 @@
+import math
+import struct
+from typing import Any
+
+import numpy as np
+import shapely
+
+# Mapbox Vector Tile 2.1 인코더. protobuf 메시지를 직접 씁니다.
+MVT_EXTENT = 4096
+WEB_MERCATOR_HALF_WORLD = 20037508.342789244
+
+GEOMETRY_POINT = 1
+GEOMETRY_LINESTRING = 2
+GEOMETRY_POLYGON = 3
+
+COMMAND_MOVE_TO = 1
+COMMAND_LINE_TO = 2
+COMMAND_CLOSE_PATH = 7
+
+# MultiPoint, MultiLineString, MultiPolygon, GeometryCollection
+MULTI_TYPE_IDS = (4, 5, 6, 7)
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """XYZ 타일의 EPSG:3857 경계 (minx, miny, maxx, maxy)."""
+    size = 2 * WEB_MERCATOR_HALF_WORLD / (1 << z)
+    minx = -WEB_MERCATOR_HALF_WORLD + x * size
+    maxy = WEB_MERCATOR_HALF_WORLD - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+
+def _bytes_field(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed_field(number: int, values: list[int]) -> bytes:
+    return _bytes_field(number, b"".join(_varint(value) for value in values))
+
+
+def _encode_value(value: Any) -> bytes | None:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return _field(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _field(5, 0) + _varint(value)
+        return _field(6, 0) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        return _field(3, 1) + struct.pack("<d", value)
+    return _bytes_field(1, str(value).encode("utf-8"))
+
+
+def _ring_area(coords: np.ndarray) -> float:
+    x, y = coords[:, 0], coords[:, 1]
+    return float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])) / 2
+
+
+class _GeometryWriter:
+    """타일 좌표 정수열을 MoveTo/LineTo/ClosePath 명령으로 바꿉니다. 커서는 한 Feature 안에서 이어집니다."""
+
+    def __init__(self):
+        self.commands: list[int] = []
+        self.cursor = (0, 0)
+
+    def _deltas(self, coords: np.ndarray) -> np.ndarray:
+        start = np.asarray([self.cursor], dtype=np.int64)
+        deltas = np.diff(np.vstack([start, coords]), axis=0)
+        self.cursor = (int(coords[-1, 0]), int(coords[-1, 1]))
+        return deltas
+
+    def _params(self, deltas: np.ndarray) -> list[int]:
+        zigzag = (deltas << 1) ^ (deltas >> 63)
+        return zigzag.ravel().tolist()
+
+    def points(self, coords: np.ndarray):
+        if not len(coords):
+            return
+        self.commands.append(COMMAND_MOVE_TO | (len(coords) << 3))
+        self.commands.extend(self._params(self._deltas(coords)))
+
+    def line(self, coords: np.ndarray, closed: bool = False):
+        # 반올림으로 같은 점이 연속되면 길이 0인 LineTo가 생기므로 지웁니다.
+        keep = np.ones(len(coords), dtype=bool)
+        keep[1:] = np.any(coords[1:] != coords[:-1], axis=1)
+        coords = coords[keep]
+        if closed:
+            if len(coords) > 1 and np.array_equal(coords[0], coords[-1]):
+                coords = coords[:-1]
+            if len(coords) < 3:
+                return False
+        elif len(coords) < 2:
+            return False
+        self.commands.append(COMMAND_MOVE_TO | (1 << 3))
+        self.commands.extend(self._params(self._deltas(coords[:1])))
+        self.commands.append(COMMAND_LINE_TO | ((len(coords) - 1) << 3))
+        self.commands.extend(self._params(self._deltas(coords[1:])))
+        if closed:
+            self.commands.append(COMMAND_CLOSE_PATH | (1 << 3))
+        return True
+
+
+def _part_coords(geometry) -> np.ndarray:
+    return shapely.get_coordinates(geometry).astype(np.int64)
+
+
+def encode_geometry(geometry) -> tuple[int, list[int]] | None:
+    """타일 좌표(정수, y 아래 방향)의 shapely 형상을 (MVT 형상 타입, 명령열)로 바꿉니다."""
+    parts = shapely.get_parts(geometry)
+    while len(parts) and np.isin(shapely.get_type_id(parts), MULTI_TYPE_IDS).any():
+        parts = shapely.get_parts(parts)
+    parts = parts[~shapely.is_empty(parts)]
+    if not len(parts):
+        return None
+    dimensions = shapely.get_dimensions(parts)
+    dimension = int(dimensions.max())
+    parts = parts[dimensions == dimension]
+    writer = _GeometryWriter()
+
+    if dimension == 0:
+        coords = np.unique(np.vstack([_part_coords(part) for part in parts]), axis=0)
+        writer.points(coords)
+        return (GEOMETRY_POINT, writer.commands) if writer.commands else None
+
+    if dimension == 1:
+        for part in parts:
+            writer.line(_part_coords(part))
+        return (GEOMETRY_LINESTRING, writer.commands) if writer.commands else None
+
+    for polygon in parts:
+        exterior = _part_coords(polygon.exterior)
+        area = _ring_area(exterior)
+        # MVT 외곽 링은 타일 좌표(y 아래)에서 넓이가 양수, 구멍은 음수여야 합니다. 넓이 0인 링은 버립니다.
+        if area == 0:
+            continue
+        if area < 0:
+            exterior = exterior[::-1]
+        if not writer.line(exterior, closed=True):
+            continue
+        for interior in polygon.interiors:
+            ring = _part_coords(interior)
+            area = _ring_area(ring)
+            if area == 0:
+                continue
+            writer.line(ring[::-1] if area > 0 else ring, closed=True)
+    return (GEOMETRY_POLYGON, writer.commands) if writer.commands else None
+
+
+class TileLayer:
+    """한 MVT 레이어의 Feature와 속성 키/값 사전을 모읍니다."""
+
+    def __init__(self, name: str, extent: int = MVT_EXTENT):
+        self.name = name
+        self.extent = extent
+        self._keys: dict[str, int] = {}
+        self._values: dict[bytes, int] = {}
+        self._features: list[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def add_feature(self, geometry, properties: dict[str, Any], feature_id: int | None = None) -> bool:
+        encoded = encode_geometry(geometry)
+        if encoded is None:
+            return False
+        geometry_type, commands = encoded
+        tags = []
+        for key, value in properties.items():
+            value_message = _encode_value(value)
+            if value_message is None:
+                continue
+            tags.append(self._keys.setdefault(str(key), len(self._keys)))
+            tags.append(self._values.setdefault(value_message, len(self._values)))
+
+        message = b""
+        if feature_id is not None and feature_id >= 0:
+            message += _field(1, 0) + _varint(int(feature_id))
+        if tags:
+            message += _packed_field(2, tags)
+        message += _field(3, 0) + _varint(geometry_type)
+        message += _packed_field(4, commands)
+        self._features.append(message)
+        return True
+
+    def encode(self) -> bytes:
+        message = _field(15, 0) + _varint(2)
+        message += _bytes_field(1, self.name.encode("utf-8"))
+        message += b"".join(_bytes_field(2, feature) for feature in self._features)
+        message += b"".join(_bytes_field(3, key.encode("utf-8")) for key in self._keys)
+        message += b"".join(_bytes_field(4, value) for value in self._values)
+        message += _field(5, 0) + _varint(self.extent)
+        return message
+
+
+def encode_tile(layers: list[TileLayer]) -> bytes:
+    """비어 있지 않은 레이어만 담은 타일. 모두 비어 있으면 빈 바이트입니다."""
+    return b"".join(_bytes_field(3, layer.encode()) for layer in layers if len(layer))
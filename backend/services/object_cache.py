@@ -0,0 +1,207 @@
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path, PurePosixPath
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_FILE_MAX_AGE_SECONDS = 6 * 60 * 60
+
+
+class ObjectCache:
+    """MinIO 객체를 로컬 디스크에 보관하는 캐시. DuckDB/Polars가 HTTP 대신 로컬 파일을 읽게 합니다.
+
+    파일명은 (버킷, 객체, etag)로 정해지므로 객체가 바뀌면 새 파일을 받고 이전 버전은 지웁니다.
+    같은 객체를 동시에 요청하면 객체별 잠금으로 한 번만 내려받고, 전체 크기가 상한을 넘으면
+    사용 중(acquire 후 release 전)이 아닌 파일부터 오래 쓰지 않은 순서로 지웁니다.
+    여러 워커가 같은 디렉터리를 쓰므로 사용 중인 파일에는 공유 잠금(flock)을 걸고, 지울 때는 배타 잠금을
+    잡을 수 있는 파일만 지웁니다.
+    """
+
+    def __init__(self):
+        self.cache_root = Path(
+            os.environ.get(
+                "OBJECT_CACHE_DIR",
+                str(Path(tempfile.gettempdir()) / "dataviewer-object-cache"),
+            )
+        )
+        self.cache_root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(os.environ.get("OBJECT_CACHE_MAX_BYTES", str(20 * 1024 * 1024 * 1024)))
+        self._entries: OrderedDict[Path, int] = OrderedDict()
+        self._pins: dict[Path, int] = {}
+        self._pin_fds: dict[Path, int] = {}
+        self._guard = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load_existing()
+
+    def acquire(
+        self,
+        bucket_name: str,
+        object_name: str,
+        etag: str,
+        download: Callable[[str], None],
+    ) -> Path:
+        """캐시된 파일 경로를 돌려주고, 없으면 ``download(임시 경로)``로 받아 둡니다.
+
+        돌려받은 경로는 ``release``를 호출할 때까지 정리 대상에서 빠집니다.
+        """
+        object_key = self._object_key(bucket_name, object_name)
+        path = self._path(object_key, etag, object_name)
+        with self._key_lock(object_key):
+            with self._guard:
+                # 다른 워커가 받아 둔 파일도 디스크에 있으면 그대로 씁니다.
+                hit = self._pin(path)
+                if hit:
+                    if path not in self._entries:
+                        self._entries[path] = path.stat().st_size
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+            if hit:
+                # 재시작 후에도 LRU 순서를 이어가도록 수정 시각을 갱신합니다.
+                os.utime(path)
+                return path
+
+            temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+            try:
+                download(str(temp_path))
+                os.replace(temp_path, path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+            size = path.stat().st_size
+            logger.info("로컬 객체 캐시 저장", extra={"bucket": bucket_name, "object": object_name, "bytes": size})
+
+            with self._guard:
+                self.misses += 1
+                self._entries[path] = size
+                self._entries.move_to_end(path)
+                self._pin(path)
+                stale = [
+                    other
+                    for other in self._entries
+                    if other != path and other.name.startswith(object_key) and not self._pins.get(other)
+                ]
+                for other in stale:
+                    self._remove(other)
+                self._evict()
+            return path
+
+    def store(self, bucket_name: str, object_name: str, etag: str, source_path: str) -> Path:
+        """방금 업로드한 로컬 파일을 내려받지 않고 캐시로 옮깁니다. ``release``를 호출해야 합니다."""
+        return self.acquire(bucket_name, object_name, etag, lambda target: shutil.move(source_path, target))
+
+    def release(self, path: Path):
+        with self._guard:
+            count = self._pins.get(path, 0) - 1
+            if count > 0:
+                self._pins[path] = count
+            else:
+                self._pins.pop(path, None)
+                fd = self._pin_fds.pop(path, None)
+                if fd is not None:
+                    os.close(fd)
+            self._evict()
+
+    def stats(self) -> dict[str, int]:
+        with self._guard:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "pinned": len(self._pins),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _object_key(self, bucket_name: str, object_name: str) -> str:
+        return hashlib.sha256(f"{bucket_name}:{object_name}".encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, object_key: str, etag: str, object_name: str) -> Path:
+        # 확장자를 유지해야 DuckDB/Polars가 형식을 알아봅니다.
+        suffix = PurePosixPath(object_name).suffix.lower()
+        version = hashlib.sha256(str(etag).encode("utf-8")).hexdigest()[:16]
+        return self.cache_root / f"{object_key}-{version}{suffix}"
+
+    def _key_lock(self, object_key: str) -> threading.Lock:
+        with self._guard:
+            return self._key_locks.setdefault(object_key, threading.Lock())
+
+    def _pin(self, path: Path) -> bool:
+        """파일을 사용 중으로 표시합니다. 파일이 없거나 다른 워커가 지우는 중이면 False입니다."""
+        count = self._pins.get(path, 0)
+        if count:
+            self._pins[path] = count + 1
+            return True
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            # 잠금을 잡기 전에 다른 워커가 지웠다면 경로가 사라졌거나 새 파일로 바뀌었습니다.
+            if os.fstat(fd).st_ino != os.stat(path).st_ino:
+                raise FileNotFoundError(path)
+        except OSError:
+            os.close(fd)
+            return False
+        self._pin_fds[path] = fd
+        self._pins[path] = 1
+        return True
+
+    def _load_existing(self):
+        files = []
+        for path in self.cache_root.iterdir():
+            if not path.is_file():
+                continue
+            stat = path.stat()
+            if path.name.startswith("."):
+                # 이전 프로세스가 받다 만 임시 파일. 최근 파일은 다른 워커가 받는 중일 수 있어 남겨 둡니다.
+                if time.time() - stat.st_mtime > PARTIAL_FILE_MAX_AGE_SECONDS:
+                    path.unlink(missing_ok=True)
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+        for _mtime, path, size in sorted(files):
+            self._entries[path] = size
+
+    def _evict(self):
+        total = sum(self._entries.values())
+        for path in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if self._pins.get(path):
+                continue
+            size = self._entries[path]
+            if self._remove(path):
+                total -= size
+                self.evictions += 1
+
+    def _remove(self, path: Path) -> bool:
+        """다른 워커가 쓰고 있지 않으면 파일을 지웁니다. 지우지 못했으면 False입니다."""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            self._entries.pop(path, None)
+            return True
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            self._entries.pop(path, None)
+            path.unlink(missing_ok=True)
+        except OSError:
+            logger.warning("로컬 객체 캐시 삭제 실패", extra={"path": str(path)}, exc_info=True)
+        finally:
+            os.close(fd)
+        return True
@@ -0,0 +1,187 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from minio.error import S3Error
+
+logger = logging.getLogger(__name__)
+
+MISSING_OBJECT_CODES = {"NoSuchKey", "NoSuchObject", "NoSuchBucket"}
+
+
+class StorageCallCounter:
+    """요청 하나에서 MinIO로 나간 호출 수를 종류별로 셉니다. 병렬 조회 스레드에서도 함께 씁니다."""
+
+    def __init__(self):
+        self._calls: Counter[str] = Counter()
+        self._guard = threading.Lock()
+
+    def add(self, name: str):
+        with self._guard:
+            self._calls[name] += 1
+
+    @property
+    def total(self) -> int:
+        with self._guard:
+            return sum(self._calls.values())
+
+    def as_dict(self) -> dict[str, int]:
+        with self._guard:
+            return dict(self._calls)
+
+
+_request_calls: contextvars.ContextVar[StorageCallCounter | None] = contextvars.ContextVar(
+    "dataviewer_storage_calls", default=None
+)
+
+
+@contextmanager
+def count_storage_calls() -> Iterator[StorageCallCounter]:
+    """블록 안에서 CountingMinioClient를 거친 호출을 새 카운터에 모읍니다."""
+    counter = StorageCallCounter()
+    token = _request_calls.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_calls.reset(token)
+
+
+class CountingMinioClient:
+    """MinIO 클라이언트를 감싸 메서드 호출을 그대로 넘기면서 전체/요청별 호출 수를 기록합니다."""
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = StorageCallCounter()
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self.calls.add(name)
+            counter = _request_calls.get()
+            if counter is not None:
+                counter.add(name)
+            return attribute(*args, **kwargs)
+
+        return call
+
+
+@dataclass(frozen=True)
+class UploadedObject:
+    """방금 올린 객체의 stat 대신 쓰는 값. put_object/fput_object 결과와 올린 크기로 만듭니다."""
+
+    etag: str
+    size: int
+    last_modified: datetime | None = None
+
+
+class ObjectMetadataCache:
+    """bucket_exists/stat_object 결과를 짧은 TTL 동안 보관해 적재 경로의 메타데이터 왕복을 줄입니다.
+
+    DataService와 GeospatialService가 같은 인스턴스를 씁니다. 없는 객체도 TTL 동안 None으로 기억하고,
+    객체를 올린 쪽은 ``remember``로 업로드 결과를 바로 넣어 다시 조회하지 않습니다. 여러 객체는 ``stat_many``로 동시에 조회합니다.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.ttl_seconds = float(os.environ.get("MINIO_METADATA_TTL_SECONDS", "5"))
+        self.max_entries = max(1, int(os.environ.get("MINIO_METADATA_CACHE_SIZE", "10000")))
+        self.max_workers = max(1, int(os.environ.get("MINIO_METADATA_MAX_WORKERS", "8")))
+        self._entries: OrderedDict[tuple[str, str | None], tuple[float, Any]] = OrderedDict()
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        key = (bucket_name, None)
+        found, value = self._lookup(key)
+        if found:
+            return value
+        exists = bool(self.client.bucket_exists(bucket_name))
+        self._store(key, exists)
+        return exists
+
+    def stat(self, bucket_name: str, object_name: str):
+        """객체 stat을 돌려줍니다. 객체가 없으면 None입니다."""
+        key = (bucket_name, object_name)
+        found, value = self._lookup(key)
+        if found:
+            return value
+        try:
+            stat = self.client.stat_object(bucket_name, object_name)
+        except S3Error as exc:
+            if exc.code not in MISSING_OBJECT_CODES:
+                raise
+            stat = None
+        self._store(key, stat)
+        return stat
+
+    def stat_many(self, bucket_name: str, object_names: list[str]) -> dict[str, Any]:
+        """여러 객체의 stat을 한 번의 왕복 시간 안에 동시에 조회합니다."""
+        names = list(dict.fromkeys(object_names))
+        if len(names) <= 1:
+            return {name: self.stat(bucket_name, name) for name in names}
+        workers = min(self.max_workers, len(names))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dataviewer-stat") as executor:
+            # 요청별 호출 카운터가 작업 스레드에서도 보이도록 현재 컨텍스트를 복사해 실행합니다.
+            futures = {
+                name: executor.submit(contextvars.copy_context().run, self.stat, bucket_name, name) for name in names
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def remember(self, bucket_name: str, object_name: str, stat):
+        self._store((bucket_name, object_name), stat)
+
+    def invalidate(self, bucket_name: str, object_name: str | None = None):
+        with self._guard:
+            if object_name is None:
+                for key in [key for key in self._entries if key[0] == bucket_name]:
+                    del self._entries[key]
+            else:
+                self._entries.pop((bucket_name, object_name), None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            entries = len(self._entries)
+            hits, misses = self.hits, self.misses
+        calls = self.client.calls.as_dict() if isinstance(self.client, CountingMinioClient) else {}
+        return {
+            "entries": entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "storage_calls": calls,
+        }
+
+    def _lookup(self, key: tuple[str, str | None]) -> tuple[bool, Any]:
+        now = time.monotonic()
+        with self._guard:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        return False, None
+
+    def _store(self, key: tuple[str, str | None], value: Any):
+        if self.ttl_seconds <= 0:
+            return
+        with self._guard:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,205 @@
+import base64
+import binascii
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+from errors import InvalidCursorError
+from services.result_cache import normalize_query
+
+_IDENTIFIER = r'(?:[A-Za-z_][A-Za-z0-9_]*|"(?:[^"]|"")+")'
+_ORDER_KEY = rf"{_IDENTIFIER}(?:\s+(?:asc|desc))?"
+_TRAILING_ORDER_BY = re.compile(
+    rf"^(?P<body>.*?)\s+order\s+by\s+(?P<keys>{_ORDER_KEY}(?:\s*,\s*{_ORDER_KEY})*)\s*$",
+    flags=re.IGNORECASE | re.DOTALL,
+)
+_KEY_PART = re.compile(rf"^(?P<name>{_IDENTIFIER})(?:\s+(?P<direction>asc|desc))?$", flags=re.IGNORECASE)
+_ROW_WISE_SELECT = re.compile(r"^\s*select\s+(?P<columns>.+?)\s+from\s+df\b(?P<rest>.*)$", flags=re.IGNORECASE | re.DOTALL)
+# 행을 합치거나 순서를 바꾸거나 잘라 내는 쿼리는 결과 행과 원본 행이 1:1로 대응하지 않습니다.
+_NOT_ROW_WISE = re.compile(
+    r"\b(?:order\s+by|limit|offset|group\s+by|distinct|join|union|intersect|except|having|qualify|window|over|"
+    r"sample|using|unnest)\b|\b(?:count|sum|avg|min|max)\s*\(",
+    flags=re.IGNORECASE,
+)
+
+# df와 같은 행에 원본 행 번호 열을 붙인 관계. 데이터셋을 불러올 때 df와 함께 만듭니다.
+ROW_KEY_RELATION = "df_rows"
+ROW_KEY_COLUMN = "__row_key"
+# row_key_query가 결과에 붙이는 행 번호 열. 커서 값을 꺼낸 뒤 응답에서는 지웁니다.
+PAGE_KEY_COLUMN = "__page_key"
+
+
+@dataclass(frozen=True)
+class OrderKey:
+    name: str
+    descending: bool = False
+
+    @property
+    def sql(self) -> str:
+        return '"' + self.name.replace('"', '""') + '"'
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """다음 페이지의 시작 위치. values가 있으면 keyset, 없으면 offset 방식입니다."""
+
+    query_hash: str
+    offset: int = 0
+    values: tuple | None = None
+    ties: int = 0
+
+
+def query_fingerprint(dataset_id: str, base_query: str) -> str:
+    normalized = normalize_query(base_query)
+    return hashlib.sha256(f"{dataset_id}:{normalized}".encode("utf-8")).hexdigest()[:16]
+
+
+def row_key_query(query: str) -> str | None:
+    """``SELECT ... FROM df [WHERE ...]``처럼 원본 행마다 결과 행이 하나씩 나오는 쿼리를 df_rows에서 읽도록 바꾸고
+    원본 행 번호를 PAGE_KEY_COLUMN으로 붙입니다. 그런 쿼리가 아니면 None을 돌려줍니다.
+
+    DuckDB는 ORDER BY가 없으면 읽은 순서(preserve_insertion_order)대로 돌려주므로 행 번호도 오름차순입니다.
+    """
+    if _NOT_ROW_WISE.search(query):
+        return None
+    match = _ROW_WISE_SELECT.match(query)
+    if not match or match.group("rest").lstrip().startswith(","):
+        return None
+    return (
+        f"SELECT {match.group('columns')}, {ROW_KEY_COLUMN} AS {PAGE_KEY_COLUMN} "
+        f"FROM {ROW_KEY_RELATION}{match.group('rest')}"
+    )
+
+
+def split_order_by(query: str) -> tuple[str, list[OrderKey]]:
+    """쿼리 끝의 단순 ORDER BY(컬럼명 + ASC/DESC) 절을 분리합니다.
+
+    표현식, NULLS FIRST/LAST, LIMIT이 뒤따르는 경우처럼 keyset으로 이어 읽을 수 없는 쿼리는
+    빈 키 목록을 돌려주며, 호출한 쪽은 offset 방식으로 처리합니다.
+    """
+    match = _TRAILING_ORDER_BY.match(query.strip())
+    if not match:
+        return query, []
+    body = match.group("body")
+    if body.count("(") != body.count(")") or body.count('"') % 2 or body.count("'") % 2:
+        return query, []
+
+    keys = []
+    for part in match.group("keys").split(","):
+        key_match = _KEY_PART.match(part.strip())
+        if not key_match:
+            return query, []
+        name = key_match.group("name")
+        if name.startswith('"'):
+            name = name[1:-1].replace('""', '"')
+        direction = (key_match.group("direction") or "asc").lower()
+        keys.append(OrderKey(name, direction == "desc"))
+    return body, keys
+
+
+def keyset_predicate(keys: list[OrderKey], values: tuple) -> tuple[str, list[Any]]:
+    """정렬 순서상 마지막 행과 같거나 뒤에 오는 행을 고르는 조건식을 만듭니다.
+
+    DuckDB 기본값(NULLS LAST)을 따르므로 NULL 키는 항상 non-NULL 키 뒤에 옵니다.
+    같은 키를 가진 행은 PageCursor.ties 만큼 OFFSET으로 건너뜁니다.
+    """
+    clauses = []
+    params: list[Any] = []
+    for position, key in enumerate(keys):
+        parts = []
+        for previous, previous_value in zip(keys[:position], values[:position]):
+            parts.append(f"{previous.sql} IS NOT DISTINCT FROM ?")
+            params.append(previous_value)
+        value = values[position]
+        if value is None:
+            # NULL 뒤에는 NULL만 오므로 더 뒤에 있는 값은 없습니다.
+            parts.append("FALSE")
+        else:
+            operator = "<" if key.descending else ">"
+            parts.append(f"({key.sql} {operator} ? OR {key.sql} IS NULL)")
+            params.append(value)
+        clauses.append("(" + " AND ".join(parts) + ")")
+
+    equal_parts = []
+    for key, value in zip(keys, values):
+        equal_parts.append(f"{key.sql} IS NOT DISTINCT FROM ?")
+        params.append(value)
+    clauses.append("(" + " AND ".join(equal_parts) + ")")
+    predicate = " OR ".join(clauses)
+
+    lead, lead_value = keys[0], values[0]
+    if lead_value is None:
+        return f"{lead.sql} IS NULL AND ({predicate})", params
+    # 선행 키에 OR 없는 범위 조건을 따로 걸어야 DuckDB가 Parquet row group 통계로 건너뜁니다.
+    # 그래서 선행 키가 NULL인 행은 여기서 빠지며 null_tail_predicate로 이어 읽습니다.
+    operator = "<=" if lead.descending else ">="
+    return f"{lead.sql} {operator} ? AND ({predicate})", [lead_value, *params]
+
+
+def null_tail_predicate(keys: list[OrderKey], values: tuple) -> str | None:
+    """keyset_predicate 범위 뒤에 오는, 선행 키가 NULL인 행을 고르는 조건식."""
+    if values[0] is None:
+        return None
+    return f"{keys[0].sql} IS NULL"
+
+
+def order_by_sql(keys: list[OrderKey], tie_breakers: list[str] = ()) -> str:
+    """정렬 키 뒤에 tie_breakers 컬럼을 붙여 같은 키를 가진 행들의 순서도 항상 같게 만듭니다.
+
+    DuckDB 정렬은 안정 정렬이 아니므로, 이 순서가 있어야 ties 만큼 건너뛰는 OFFSET이 정확합니다.
+    원본 행 번호가 있으면 키 목록 끝에 그 열 하나만 붙이고, tie_breakers는 행 번호가 없는 파생 결과에만 씁니다.
+    """
+    key_names = {key.name for key in keys}
+    extra = [OrderKey(column) for column in tie_breakers if column not in key_names]
+    return ", ".join(f"{key.sql} {'DESC' if key.descending else 'ASC'}" for key in [*keys, *extra])
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    payload = {"q": cursor.query_hash}
+    if cursor.values is None:
+        payload["o"] = cursor.offset
+    else:
+        payload["v"] = list(cursor.values)
+        payload["t"] = cursor.ties
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, expected_hash: str) -> PageCursor:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        query_hash = payload["q"]
+        if "v" in payload:
+            cursor = PageCursor(
+                query_hash=query_hash,
+                values=tuple(payload["v"]),
+                ties=max(0, int(payload.get("t", 0))),
+            )
+        else:
+            cursor = PageCursor(query_hash=query_hash, offset=max(0, int(payload.get("o", 0))))
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursorError("페이지 커서 형식이 올바르지 않습니다.") from exc
+    if cursor.query_hash != expected_hash:
+        raise InvalidCursorError("페이지 커서가 현재 쿼리와 일치하지 않습니다. 첫 페이지부터 다시 조회해주세요.")
+    return cursor
+
+
+def normalize_keyset_values(values: tuple) -> tuple | None:
+    """정렬 키 값을 커서에 담을 수 있는 JSON 값으로 바꿉니다. 담을 수 없는 타입이면 None."""
+    normalized = []
+    for value in values:
+        if value is None or isinstance(value, (str, int, float, bool)):
+            normalized.append(value)
+        elif isinstance(value, (date, datetime, time)):
+            # 날짜/시간/Decimal은 문자열로 보내고 DuckDB가 컬럼 타입으로 캐스팅하게 둡니다.
+            normalized.append(value.isoformat())
+        elif isinstance(value, Decimal):
+            normalized.append(str(value))
+        else:
+            return None
+    return tuple(normalized)
@@ -0,0 +1,105 @@
+import inspect
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import duckdb
+
+from errors import QueryCancelledError, QueryQueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+class CancelToken:
+    """요청 하나에 대한 취소 상태와 실행 중인 DuckDB 커서를 연결합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._con: duckdb.DuckDBPyConnection | None = None
+        self.cancelled = False
+
+    def attach(self, con: duckdb.DuckDBPyConnection):
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelledError("클라이언트 연결이 끊어져 쿼리를 취소했습니다.")
+            self._con = con
+
+    def detach(self):
+        with self._lock:
+            self._con = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._con is not None:
+                # detach 전까지는 이 요청이 커서를 점유하고 있으므로 다른 요청을 중단시키지 않습니다.
+                self._con.interrupt()
+
+
+def _accepts_cancel_token(func) -> bool:
+    try:
+        return "cancel_token" in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _run(func, args: tuple, kwargs: dict, cancel_token: CancelToken | None):
+    if cancel_token is not None and cancel_token.cancelled:
+        raise QueryCancelledError("클라이언트 연결이 끊어져 쿼리를 취소했습니다.")
+    return func(*args, **kwargs)
+
+
+class QueryExecutor:
+    """쿼리 전용 스레드 풀. 작업자 수와 대기열 깊이를 넘는 요청은 즉시 거절합니다."""
+
+    def __init__(self):
+        self.max_workers = max(1, int(os.environ.get("QUERY_MAX_WORKERS", "4")))
+        self.max_queue_depth = max(0, int(os.environ.get("QUERY_MAX_QUEUE_DEPTH", "16")))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="dataviewer-query",
+        )
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue_depth)
+        self._counter_lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def submit(self, func, *args, cancel_token: CancelToken | None = None, **kwargs) -> Future:
+        """작업을 실행기에 넣습니다. 취소 토큰은 받는 함수에만 넘기고, 대기 중에 취소된 작업은 실행하지 않습니다."""
+        if not self._slots.acquire(blocking=False):
+            with self._counter_lock:
+                self.rejected += 1
+            logger.warning(
+                "쿼리 대기열 포화",
+                extra={"workers": self.max_workers, "queue_depth": self.max_queue_depth},
+            )
+            raise QueryQueueFullError("요청이 많아 쿼리를 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
+        with self._counter_lock:
+            self.in_flight += 1
+        try:
+            if cancel_token is not None and _accepts_cancel_token(func):
+                kwargs["cancel_token"] = cancel_token
+            future = self._executor.submit(_run, func, args, kwargs, cancel_token)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _future: self._release())
+        return future
+
+    def stats(self) -> dict[str, int]:
+        with self._counter_lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+            }
+
+    def _release(self):
+        with self._counter_lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,147 @@
+import copy
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import orjson
+
+from services.table_encoding import TableData, json_default
+
+
+# 따옴표 안(문자열 리터럴, 따옴표 식별자)은 그대로 두고 그 밖의 공백만 하나로 줄입니다.
+QUERY_TOKENS = re.compile(r"'(?:[^']|'')*(?:'|$)|\"(?:[^\"]|\"\")*(?:\"|$)|\s+")
+
+
+def normalize_query(query: str) -> str:
+    return QUERY_TOKENS.sub(lambda match: " " if match.group().isspace() else match.group(), query).strip()
+
+
+def copy_summary(summary: dict[str, Any] | None) -> dict[str, Any] | None:
+    """요약의 사본. 읽기 전용인 TableData(프레임을 감싼 행 목록)는 복사하지 않고 함께 씁니다."""
+    if summary is None:
+        return None
+    memo = {id(value): value for value in summary.values() if isinstance(value, TableData)}
+    return copy.deepcopy(summary, memo)
+
+
+def estimate_size(value: Any) -> int:
+    try:
+        return len(orjson.dumps(value, default=json_default, option=orjson.OPT_NON_STR_KEYS))
+    except TypeError:
+        return len(repr(value))
+
+
+@dataclass
+class CachedResult:
+    """한 쿼리 결과에서 재사용할 수 있는 부분(건수, 분포, 앞쪽 페이지)을 보관합니다."""
+
+    summary: dict[str, Any] | None = None
+    pages: dict[tuple[int, int], Sequence[dict[str, Any]]] = field(default_factory=dict)
+    part_sizes: dict[Any, int] = field(default_factory=dict)
+    size_bytes: int = 0
+
+
+class ResultCache:
+    """(데이터셋 fingerprint, 정규화된 쿼리) 단위의 프로세스 내 결과 캐시.
+
+    항목 크기를 직렬화 길이로 추정해 전체 바이트 예산을 넘으면 가장 오래 쓰지 않은 항목부터 버립니다.
+    """
+
+    def __init__(self):
+        self.max_bytes = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+        self.max_cached_page = int(os.environ.get("RESULT_CACHE_MAX_PAGE", "5"))
+        self._entries: OrderedDict[tuple[str, str], CachedResult] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_summary(self, fingerprint: str | None, query: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._lookup(fingerprint, query)
+            summary = entry.summary if entry is not None else None
+            self._count(summary is not None)
+        # 호출한 쪽이 고쳐도 캐시 내용이 바뀌지 않도록 사본을 돌려줍니다.
+        return copy_summary(summary)
+
+    def put_summary(self, fingerprint: str | None, query: str, summary: dict[str, Any]):
+        if not fingerprint:
+            return
+        with self._lock:
+            entry = self._entry(fingerprint, query)
+            entry.summary = copy_summary(summary)
+            self._resize(entry, "summary", estimate_size(summary))
+
+    def get_page(self, fingerprint: str | None, query: str, page: int, page_size: int):
+        if page > self.max_cached_page:
+            return None
+        with self._lock:
+            entry = self._lookup(fingerprint, query)
+            rows = entry.pages.get((page, page_size)) if entry is not None else None
+            self._count(rows is not None)
+            return rows
+
+    def put_page(self, fingerprint: str | None, query: str, page: int, page_size: int, rows: Sequence[dict[str, Any]]):
+        if not fingerprint or page > self.max_cached_page:
+            return
+        with self._lock:
+            entry = self._entry(fingerprint, query)
+            entry.pages[(page, page_size)] = rows
+            self._resize(entry, (page, page_size), estimate_size(rows))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _lookup(self, fingerprint: str | None, query: str) -> CachedResult | None:
+        if not fingerprint:
+            return None
+        key = (fingerprint, normalize_query(query))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _entry(self, fingerprint: str, query: str) -> CachedResult:
+        key = (fingerprint, normalize_query(query))
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = CachedResult()
+            self._entries[key] = entry
+        self._entries.move_to_end(key)
+        return entry
+
+    def _count(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def _resize(self, entry: CachedResult, part, part_bytes: int):
+        added_bytes = part_bytes - entry.part_sizes.get(part, 0)
+        entry.part_sizes[part] = part_bytes
+        entry.size_bytes += added_bytes
+        self._total_bytes += added_bytes
+        while self._total_bytes > self.max_bytes and self._entries:
+            _key, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.size_bytes
+            self.evictions += 1
@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+READ_MODE_CACHE = "cache"
+READ_MODE_S3 = "s3"
+SECRET_NAME = "dataviewer_minio"
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class DuckDBS3Reader:
+    """DuckDB httpfs로 MinIO 객체를 ``s3://버킷/키`` 경로로 바로 읽게 합니다.
+
+    단일 객체는 MINIO_READ_MODE=s3 일 때, 접두사/glob 데이터셋은 MINIO_MULTI_FILE_READ_MODE(기본 s3)일 때 씁니다.
+    여러 파일 데이터셋을 미리 모두 내려받으면 Hive 파티션 조건이 I/O를 줄이지 못하므로 기본을 s3로 둡니다.
+    S3 secret과 HTTP 설정은 공유 DuckDB 연결에 한 번만 만듭니다. 데이터셋 커서는 모두 같은 DB 인스턴스를 쓰므로
+    keep-alive 연결과 메타데이터 캐시를 함께 씁니다. httpfs를 불러오지 못하면 경고를 남기고 기존처럼 로컬 객체 캐시로 읽습니다.
+    """
+
+    def __init__(self, con: duckdb.DuckDBPyConnection, endpoint: str, access_key: str, secret_key: str):
+        self.con = con
+        self.endpoint = endpoint
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.mode = os.environ.get("MINIO_READ_MODE", READ_MODE_CACHE).lower()
+        self.multi_file_mode = os.environ.get("MINIO_MULTI_FILE_READ_MODE", READ_MODE_S3).lower()
+        self.region = os.environ.get("MINIO_REGION", "us-east-1")
+        self.use_ssl = os.environ.get("MINIO_SECURE", "false").lower() in ("1", "true", "yes")
+        self.http_retries = int(os.environ.get("S3_HTTP_RETRIES", "3"))
+        # 원격 읽기는 CPU보다 왕복 지연이 병목이라 코어 수보다 많은 스레드로 범위 요청을 겹치게 할 수 있습니다.
+        self.threads = int(os.environ.get("S3_READ_THREADS", "0"))
+        # enabled는 단일 객체, multi_file_enabled는 여러 파일 데이터셋을 s3:// 경로로 읽을지 나타냅니다.
+        self.enabled = False
+        self.multi_file_enabled = False
+        self.error: str | None = None
+        self.paths_built = 0
+        self._guard = threading.Lock()
+        if READ_MODE_S3 in (self.mode, self.multi_file_mode):
+            self._configure()
+
+    def setup_statements(self) -> list[str]:
+        statements = [
+            "SET GLOBAL http_keep_alive = true",
+            "SET GLOBAL enable_http_metadata_cache = true",
+            "SET GLOBAL parquet_metadata_cache = true",
+            f"SET GLOBAL http_retries = {self.http_retries}",
+        ]
+        if self.threads > 0:
+            statements.append(f"SET GLOBAL threads = {self.threads}")
+        statements.append(
+            f"CREATE OR REPLACE SECRET {SECRET_NAME} ("
+            "TYPE s3, "
+            f"KEY_ID {_sql_literal(self.access_key)}, "
+            f"SECRET {_sql_literal(self.secret_key)}, "
+            f"ENDPOINT {_sql_literal(self.endpoint)}, "
+            f"REGION {_sql_literal(self.region)}, "
+            "URL_STYLE 'path', "
+            f"USE_SSL {'true' if self.use_ssl else 'false'})"
+        )
+        return statements
+
+    def _configure(self):
+        if not self.endpoint:
+            self.error = "MINIO_ENDPOINT가 설정되지 않았습니다."
+            logger.warning("S3 직접 읽기를 켤 수 없어 로컬 객체 캐시로 읽습니다", extra={"error": self.error})
+            return
+        try:
+            self._load_httpfs()
+            for statement in self.setup_statements():
+                self.con.execute(statement)
+        except duckdb.Error as exc:
+            self.error = str(exc)
+            logger.warning("DuckDB httpfs를 사용할 수 없어 로컬 객체 캐시로 읽습니다", extra={"error": self.error})
+            return
+        self.enabled = self.mode == READ_MODE_S3
+        self.multi_file_enabled = self.multi_file_mode == READ_MODE_S3
+        logger.info(
+            "DuckDB S3 직접 읽기 활성화",
+            extra={"endpoint": self.endpoint, "ssl": self.use_ssl, "objects": self.enabled, "multi_file": self.multi_file_enabled},
+        )
+
+    def _load_httpfs(self):
+        try:
+            self.con.execute("LOAD httpfs")
+        except duckdb.Error:
+            self.con.execute("INSTALL httpfs")
+            self.con.execute("LOAD httpfs")
+
+    def url(self, bucket_name: str, object_name: str) -> str:
+        with self._guard:
+            self.paths_built += 1
+        return f"s3://{bucket_name}/{object_name.lstrip('/')}"
+
+    def stats(self) -> dict:
+        with self._guard:
+            paths_built = self.paths_built
+        return {
+            "mode": self.mode,
+            "enabled": self.enabled,
+            "multi_file_mode": self.multi_file_mode,
+            "multi_file_enabled": self.multi_file_enabled,
+            "paths_built": paths_built,
+            "error": self.error,
+        }
@@ -0,0 +1,154 @@
+import fcntl
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_id TEXT PRIMARY KEY,
+    bucket_name TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    storage_type TEXT,
+    sheet TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class DatasetDescriptor:
+    """다른 워커가 같은 dataset_id를 다시 열 때 필요한 적재 요청 정보."""
+
+    dataset_id: str
+    bucket_name: str
+    file_name: str
+    storage_type: str | None
+    sheet: str | None
+
+
+class InterProcessLock:
+    """스레드 잠금과 잠금 파일(flock)을 함께 잡아 같은 프로세스의 스레드와 다른 워커 프로세스를 모두 막습니다."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a+b")
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+        finally:
+            self._file = None
+            self._thread_lock.release()
+
+
+class SharedStateStore:
+    """여러 워커 프로세스가 함께 보는 로컬 상태 저장소.
+
+    dataset_id별 적재 요청과 변환 작업 상태는 SQLite(WAL)에 두고, 같은 원본의 변환처럼 한 워커만 해야 하는
+    일은 SHARED_STATE_DIR/locks 아래 잠금 파일로 조정합니다.
+    """
+
+    def __init__(self):
+        self.root = Path(
+            os.environ.get(
+                "SHARED_STATE_DIR",
+                str(Path(tempfile.gettempdir()) / "dataviewer-state"),
+            )
+        )
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "state.sqlite3"
+        self.lock_dir = self.root / "locks"
+        self.dataset_ttl_seconds = float(os.environ.get("SHARED_DATASET_TTL_SECONDS", str(24 * 60 * 60)))
+        self.job_ttl_seconds = float(os.environ.get("SHARED_JOB_TTL_SECONDS", str(24 * 60 * 60)))
+        # 쓰는 쪽이 없어진 잠금 객체는 바로 사라집니다. 프로세스 간 직렬화는 잠금 파일의 flock이 맡습니다.
+        self._locks: weakref.WeakValueDictionary[str, InterProcessLock] = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+        with closing(self._connect()) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def lock(self, name: str) -> InterProcessLock:
+        """이름별 프로세스 간 잠금. 누군가 쓰고 있는 동안 같은 이름이면 같은 잠금 객체를 돌려줍니다."""
+        digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:32]
+        with self._locks_guard:
+            lock = self._locks.get(digest)
+            if lock is None:
+                lock = self._locks[digest] = InterProcessLock(self.lock_dir / f"{digest}.lock")
+            return lock
+
+    def save_dataset(
+        self,
+        dataset_id: str,
+        bucket_name: str,
+        file_name: str,
+        storage_type: str | None,
+        sheet: str | None,
+    ):
+        now = time.time()
+        with closing(self._connect()) as con:
+            con.execute(
+                "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?)",
+                (dataset_id, bucket_name, file_name, storage_type, sheet, now),
+            )
+            con.execute("DELETE FROM datasets WHERE created_at < ?", (now - self.dataset_ttl_seconds,))
+
+    def get_dataset(self, dataset_id: str) -> DatasetDescriptor | None:
+        with closing(self._connect()) as con:
+            row = con.execute(
+                "SELECT dataset_id, bucket_name, file_name, storage_type, sheet FROM datasets "
+                "WHERE dataset_id = ? AND created_at >= ?",
+                (dataset_id, time.time() - self.dataset_ttl_seconds),
+            ).fetchone()
+        return DatasetDescriptor(*row) if row else None
+
+    def save_job(self, job_id: str, payload: str):
+        now = time.time()
+        with closing(self._connect()) as con:
+            con.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)", (job_id, payload, now))
+            con.execute("DELETE FROM jobs WHERE updated_at < ?", (now - self.job_ttl_seconds,))
+
+    def get_job(self, job_id: str) -> str | None:
+        with closing(self._connect()) as con:
+            row = con.execute("SELECT payload FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def stats(self) -> dict[str, Any]:
+        with closing(self._connect()) as con:
+            datasets = con.execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
+            jobs = con.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {"path": str(self.db_path), "datasets": datasets, "jobs": jobs}
@@ -0,0 +1,257 @@
+import logging
+import math
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPATIAL_INDEX_VERSION = "2"
+POINT_SHAPE_TYPES = {1, 11, 21}
+SHP_HEADER_BYTES = 100
+# SHP 레코드 머리(번호, 길이)와 형상 종류, bbox. 점 레코드는 bbox 자리에 x, y가 있습니다.
+RECORD_HEAD_DTYPE = np.dtype([("header", "V8"), ("shape_type", "<i4"), ("bbox", "<f8", (4,))])
+BOUNDS_CHUNK_RECORDS = 65536
+# 표본 순서를 매길 때 나누는 사분 격자의 최대 깊이(2^16 x 2^16 칸)
+SAMPLE_MAX_DEPTH = 16
+
+
+def read_shape_bounds(layer_path: Path, reader) -> np.ndarray:
+    """SHX의 레코드 위치로 SHP 레코드 머리의 bbox만 읽습니다. 형상 좌표 전체는 읽지 않고, 빈 형상은 NaN입니다."""
+    point_layer = reader.shapeType in POINT_SHAPE_TYPES
+    shx_path = layer_path.with_suffix(".shx")
+    if not shx_path.exists():
+        return _iterate_shape_bounds(reader, point_layer)
+
+    index = np.fromfile(shx_path, dtype=">i4", offset=SHP_HEADER_BYTES).reshape(-1, 2)
+    offsets = index[:, 0].astype(np.int64) * 2
+    bounds = np.full((len(offsets), 4), np.nan)
+    if not len(offsets):
+        return bounds
+    data = np.memmap(layer_path, dtype=np.uint8, mode="r")
+    # 레코드 머리(8바이트) 뒤 형상 종류와 bbox(점은 x, y)만 모아 읽습니다. 위치 배열이 레코드 수에 비례해
+    # 커지지 않도록 BOUNDS_CHUNK_RECORDS개씩 나눠 읽습니다.
+    columns = np.arange(RECORD_HEAD_DTYPE.itemsize)
+    for start in range(0, len(offsets), BOUNDS_CHUNK_RECORDS):
+        chunk = offsets[start:start + BOUNDS_CHUNK_RECORDS]
+        positions = np.minimum(chunk[:, None] + columns, len(data) - 1)
+        heads = np.ascontiguousarray(data[positions]).view(RECORD_HEAD_DTYPE).ravel()
+        if point_layer:
+            points = heads["bbox"][:, :2]
+            chunk_bounds = np.hstack([points, points])
+        else:
+            chunk_bounds = heads["bbox"]
+        chunk_bounds[heads["shape_type"] == 0] = np.nan
+        bounds[start:start + len(chunk)] = chunk_bounds
+    return bounds
+
+
+def _iterate_shape_bounds(reader, point_layer: bool) -> np.ndarray:
+    bounds = np.full((len(reader), 4), np.nan)
+    for index, shape in enumerate(reader.iterShapes()):
+        if shape is None or not shape.points:
+            continue
+        if point_layer:
+            x, y = shape.points[0][:2]
+            bounds[index] = (x, y, x, y)
+        else:
+            bounds[index] = shape.bbox
+    return bounds
+
+
+def _sample_order(ids: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """공간 층화 표본 순서(레코드 번호). 앞에서 몇 개를 잘라도 공간에 고르게 퍼진 표본이 됩니다.
+
+    레코드 중심점 범위를 사분 격자로 한 단계씩 나누며, 칸마다 가장 큰 형상을 그 칸의 대표로 삼고 처음 대표가 된
+    깊이를 우선순위로 매깁니다. 같은 깊이 안에서는 고정 시드로 섞어, 잘린 위치와 상관없이 한쪽으로 몰리지 않게 합니다.
+    """
+    if not len(ids):
+        return np.empty(0, dtype=np.int64)
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+    low = centers.min(axis=0)
+    span = np.maximum(centers.max(axis=0) - low, 1e-12)
+    unit = np.clip((centers - low) / span, 0.0, np.nextafter(1.0, 0.0))
+    extent = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+    preference = np.lexsort((ids, -extent))
+    preferred_unit = unit[preference]
+    depth_of = np.full(len(ids), SAMPLE_MAX_DEPTH + 1)
+    for depth in range(SAMPLE_MAX_DEPTH + 1):
+        cells = np.floor(preferred_unit * (1 << depth)).astype(np.int64)
+        _keys, first = np.unique((cells[:, 0] << 32) | cells[:, 1], return_index=True)
+        representatives = preference[first]
+        depth_of[representatives] = np.minimum(depth_of[representatives], depth)
+        if len(first) == len(ids):
+            break
+    shuffle = np.random.default_rng(0).permutation(len(ids))
+    return ids[np.lexsort((shuffle, depth_of))].astype(np.int64)
+
+
+def _intersects(boxes: np.ndarray, minx: float, miny: float, maxx: float, maxy: float) -> np.ndarray:
+    return (boxes[:, 2] >= minx) & (boxes[:, 0] <= maxx) & (boxes[:, 3] >= miny) & (boxes[:, 1] <= maxy)
+
+
+class SpatialIndex:
+    """레코드 bbox로 만든 STR 방식의 packed R-tree.
+
+    ``levels[0]``은 STR 순서로 정렬한 레코드 bbox이고, 위 단계는 아래 단계 ``node_size``개씩의 합 bbox입니다.
+    ``order``는 정렬 위치에서 레코드 번호로 가는 배열이고, ``sample_order``는 공간 층화 표본 순서입니다.
+    파일로 저장해 두고 mmap으로 열므로 큰 레이어도 처음 한 번만 만듭니다. 빈 형상은 인덱스에 넣지 않습니다.
+    """
+
+    def __init__(
+        self,
+        order: np.ndarray,
+        levels: list[np.ndarray],
+        point_layer: bool,
+        node_size: int,
+        sample_order: np.ndarray,
+    ):
+        self.order = order
+        self.levels = levels
+        self.point_layer = point_layer
+        self.node_size = node_size
+        self.sample_order = sample_order
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    @classmethod
+    def build(cls, bounds: np.ndarray, point_layer: bool, node_size: int = 64) -> "SpatialIndex":
+        valid = np.flatnonzero(np.isfinite(bounds).all(axis=1))
+        boxes = bounds[valid]
+        if len(valid):
+            centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+            leaf_count = math.ceil(len(valid) / node_size)
+            slab_count = max(1, math.ceil(math.sqrt(leaf_count)))
+            slab_size = slab_count * node_size
+            by_x = np.argsort(centers[:, 0], kind="stable")
+            slabs = np.arange(len(valid)) // slab_size
+            # 세로 띠(slab)마다 y 순으로 정렬합니다. lexsort는 마지막 키가 우선입니다.
+            ordered = by_x[np.lexsort((centers[by_x, 1], slabs))]
+            valid, boxes = valid[ordered], boxes[ordered]
+
+        levels = [boxes]
+        while len(levels[-1]) > node_size:
+            lower = levels[-1]
+            starts = np.arange(0, len(lower), node_size)
+            levels.append(
+                np.column_stack(
+                    [
+                        np.minimum.reduceat(lower[:, 0], starts),
+                        np.minimum.reduceat(lower[:, 1], starts),
+                        np.maximum.reduceat(lower[:, 2], starts),
+                        np.maximum.reduceat(lower[:, 3], starts),
+                    ]
+                )
+            )
+        return cls(valid.astype(np.int64), levels, point_layer, node_size, _sample_order(valid, boxes))
+
+    def query(self, minx: float, miny: float, maxx: float, maxy: float) -> tuple[np.ndarray, np.ndarray]:
+        """bbox와 겹치는 레코드 번호(오름차순)와 각 레코드의 bbox를 돌려줍니다."""
+        if not len(self.order):
+            return np.empty(0, dtype=np.int64), np.empty((0, 4))
+        top = self.levels[-1]
+        nodes = np.flatnonzero(_intersects(top, minx, miny, maxx, maxy))
+        for level in reversed(self.levels[:-1]):
+            if not len(nodes):
+                break
+            children = (nodes[:, None] * self.node_size + np.arange(self.node_size)).ravel()
+            children = children[children < len(level)]
+            nodes = children[_intersects(level[children], minx, miny, maxx, maxy)]
+        ids = self.order[nodes]
+        sort = np.argsort(ids, kind="stable")
+        return ids[sort], np.asarray(self.levels[0][nodes[sort]])
+
+    def sample(self, limit: int) -> np.ndarray:
+        """공간에 고르게 퍼진 레코드 최대 limit개. 파일 위치 순서로 읽도록 오름차순으로 돌려줍니다."""
+        return np.sort(self.sample_order[: max(0, limit)])
+
+    def save(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "order.npy", self.order)
+        np.save(directory / "sample.npy", self.sample_order)
+        for number, level in enumerate(self.levels):
+            np.save(directory / f"level{number}.npy", level)
+        (directory / "meta").write_text(
+            f"{SPATIAL_INDEX_VERSION}:{len(self.levels)}:{int(self.point_layer)}:{self.node_size}", encoding="utf-8"
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> "SpatialIndex | None":
+        try:
+            version, level_count, point_layer, node_size = (directory / "meta").read_text(encoding="utf-8").split(":")
+            if version != SPATIAL_INDEX_VERSION:
+                return None
+            order = np.load(directory / "order.npy", mmap_mode="r")
+            levels = [np.load(directory / f"level{number}.npy", mmap_mode="r") for number in range(int(level_count))]
+            sample_order = np.load(directory / "sample.npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return cls(order, levels, point_layer == "1", int(node_size), sample_order)
+
+
+class SpatialIndexStore:
+    """레이어별 공간 인덱스를 디스크(지오 캐시 디렉터리)에 만들어 두고, 연 인덱스는 메모리에 몇 개 유지합니다.
+
+    인덱스 디렉터리는 원본 지문(.fingerprint)으로 관리되는 캐시 디렉터리 안에 있으므로 원본이 바뀌면 함께 지워집니다.
+    """
+
+    def __init__(self):
+        self.node_size = max(2, int(os.environ.get("GEO_SPATIAL_INDEX_NODE_SIZE", "64")))
+        self.max_open = max(1, int(os.environ.get("GEO_SPATIAL_INDEX_CACHE_SIZE", "8")))
+        self._open: OrderedDict[str, SpatialIndex] = OrderedDict()
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.loaded = 0
+        self.built = 0
+
+    def get(self, index_dir: Path, layer_path: Path, reader, lock) -> SpatialIndex:
+        """열린 인덱스, 디스크 인덱스 순으로 찾고 없으면 만듭니다. 만들 때는 lock(프로세스 간 잠금)을 잡습니다."""
+        source_stat = layer_path.stat()
+        key = f"{index_dir}:{source_stat.st_size}:{source_stat.st_mtime_ns}"
+        with self._guard:
+            index = self._open.get(key)
+            if index is not None:
+                self._open.move_to_end(key)
+                self.hits += 1
+                return index
+
+        index = SpatialIndex.load(index_dir)
+        if index is not None:
+            counter = "loaded"
+        else:
+            with lock:
+                index = SpatialIndex.load(index_dir)
+                counter = "loaded"
+                if index is None:
+                    index = self._build(index_dir, layer_path, reader)
+                    counter = "built"
+
+        with self._guard:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self._open[key] = index
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return index
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            return {"open": len(self._open), "hits": self.hits, "loaded": self.loaded, "built": self.built}
+
+    def _build(self, index_dir: Path, layer_path: Path, reader) -> SpatialIndex:
+        bounds = read_shape_bounds(layer_path, reader)
+        index = SpatialIndex.build(bounds, reader.shapeType in POINT_SHAPE_TYPES, self.node_size)
+        # 다른 워커가 반쯤 쓴 인덱스를 읽지 않도록 임시 디렉터리에 쓴 뒤 이름을 바꿉니다.
+        partial_dir = index_dir.with_name(f"{index_dir.name}.{uuid.uuid4().hex}.part")
+        index.save(partial_dir)
+        if index_dir.exists():
+            shutil.rmtree(index_dir)
+        os.replace(partial_dir, index_dir)
+        logger.info("공간 인덱스 생성", extra={"layer": str(layer_path), "records": len(index)})
+        return SpatialIndex.load(index_dir) or index
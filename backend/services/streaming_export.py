@@ -0,0 +1,100 @@
+import io
+import zlib
+from collections.abc import Iterator
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# format -> (media_type, 파일 확장자)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+class _DrainableBuffer(io.RawIOBase):
+    """인코더가 쓴 바이트를 모아두었다가 청크 단위로 꺼낼 수 있는 쓰기 전용 버퍼."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_csv(reader: pa.RecordBatchReader) -> Iterator[bytes]:
+    include_header = True
+    for batch in reader:
+        buffer = io.BytesIO()
+        pl.from_arrow(pa.Table.from_batches([batch])).write_csv(buffer, include_header=include_header)
+        include_header = False
+        yield buffer.getvalue()
+    if include_header:
+        # 결과가 비어 있어도 헤더는 내려줍니다.
+        buffer = io.BytesIO()
+        pl.from_arrow(reader.schema.empty_table()).write_csv(buffer)
+        yield buffer.getvalue()
+
+
+def _iter_gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _iter_parquet(reader: pa.RecordBatchReader) -> Iterator[bytes]:
+    sink = _DrainableBuffer()
+    with pq.ParquetWriter(sink, reader.schema, compression="zstd") as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+def _iter_arrow(reader: pa.RecordBatchReader) -> Iterator[bytes]:
+    sink = _DrainableBuffer()
+    with pa.ipc.new_stream(sink, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_export(reader: pa.RecordBatchReader, export_format: str = "csv") -> Iterator[bytes]:
+    """Arrow RecordBatch 스트림을 요청한 형식의 바이트 청크로 변환합니다.
+
+    배치를 하나씩 인코딩해 내보내므로 메모리 사용량은 결과 크기가 아니라 배치 크기에 비례합니다.
+    """
+    if export_format == "csv":
+        return _iter_csv(reader)
+    if export_format == "csv.gz":
+        return _iter_gzip(_iter_csv(reader))
+    if export_format == "parquet":
+        return _iter_parquet(reader)
+    if export_format == "arrow":
+        return _iter_arrow(reader)
+    raise ValueError(f"지원하지 않는 다운로드 형식입니다: {export_format}")
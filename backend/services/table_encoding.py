@@ -0,0 +1,158 @@
+import threading
+from collections.abc import Sequence
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+import orjson
+import polars as pl
+import pyarrow as pa
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Arrow 응답에서 tableData 외의 값(columns, total, next_cursor 등)을 담는 스키마 메타데이터 키
+ARROW_PAYLOAD_METADATA_KEY = "dataviewer"
+
+JSON_NATIVE_TYPES = (
+    pl.Boolean,
+    pl.String,
+    pl.Categorical,
+    pl.Enum,
+    pl.Date,
+    pl.Time,
+    pl.Null,
+)
+
+
+class TableData(Sequence):
+    """표 응답의 행 목록. Polars 프레임을 그대로 들고 있다가 응답을 만들 때 바로 바이트로 직렬화합니다.
+
+    JSON은 polars JSON 작성기(Rust)로, Arrow는 IPC 스트림으로 만들어 행마다 Python dict를 만들지 않습니다.
+    기존 코드처럼 행 목록으로 읽으면 그때 한 번만 ``to_dicts()``로 바꿉니다.
+    """
+
+    def __init__(self, frame: pl.DataFrame):
+        self.frame = frame
+        self._rows: list[dict[str, Any]] | None = None
+        self._json: bytes | None = None
+        self._guard = threading.Lock()
+
+    @property
+    def rows(self) -> list[dict[str, Any]]:
+        if self._rows is None:
+            self._rows = self.frame.to_dicts()
+        return self._rows
+
+    def json(self) -> bytes:
+        """행 객체 배열 JSON. 결과 캐시에 들어간 페이지는 처음 만든 바이트를 다시 씁니다."""
+        with self._guard:
+            if self._json is None:
+                self._json = frame_to_json(self.frame)
+            return self._json
+
+    def __len__(self) -> int:
+        return self.frame.height
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TableData):
+            return self.rows == other.rows
+        if isinstance(other, list):
+            return self.rows == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TableData(rows={len(self)}, columns={self.frame.columns})"
+
+
+def _is_json_native(dtype: pl.DataType) -> bool:
+    if dtype.is_numeric() and not isinstance(dtype, pl.Decimal):
+        return True
+    if isinstance(dtype, JSON_NATIVE_TYPES):
+        return True
+    if isinstance(dtype, (pl.List, pl.Array)):
+        return _is_json_native(dtype.inner)
+    if isinstance(dtype, pl.Struct):
+        return all(_is_json_native(field.dtype) for field in dtype.fields)
+    return False
+
+
+def _json_expression(name: str, dtype: pl.DataType) -> pl.Expr | None:
+    """polars JSON 작성기가 기존 응답(orjson/jsonable_encoder)과 다르게 쓰는 최상위 컬럼을 맞춥니다."""
+    column = pl.col(name)
+    if isinstance(dtype, pl.Datetime):
+        return column.dt.strftime("%Y-%m-%dT%H:%M:%S%.f" + ("%:z" if dtype.time_zone else ""))
+    if isinstance(dtype, pl.Duration):
+        return column.dt.total_microseconds() / 1_000_000
+    if isinstance(dtype, pl.Decimal):
+        return column.cast(pl.Float64)
+    return None
+
+
+def frame_to_json(frame: pl.DataFrame) -> bytes:
+    """프레임을 ``[{"컬럼": 값, ...}, ...]`` JSON 바이트로 만듭니다. NaN/Infinity는 null로 씁니다."""
+    expressions = []
+    for name, dtype in frame.schema.items():
+        expression = _json_expression(name, dtype)
+        if expression is not None:
+            expressions.append(expression)
+        elif not _is_json_native(dtype):
+            # 바이너리/객체나 중첩 안의 날짜처럼 JSON 작성기가 못 쓰는 타입은 행 단위 orjson으로 씁니다.
+            return orjson.dumps(frame.to_dicts(), default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    if expressions:
+        frame = frame.with_columns(expressions)
+    return frame.write_json().encode("utf-8")
+
+
+def json_default(value: Any):
+    """orjson ``default``. 표 데이터는 미리 만든 JSON 조각으로 그대로 끼워 넣습니다."""
+    if isinstance(value, TableData):
+        return orjson.Fragment(value.json())
+    if isinstance(value, pl.DataFrame):
+        return orjson.Fragment(frame_to_json(value))
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, default=json_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def frame_to_arrow_stream(frame: pl.DataFrame, metadata: dict[str, Any] | None = None) -> bytes:
+    """프레임을 Arrow IPC 스트림으로 만듭니다. 브라우저 Arrow 구현이 읽도록 view 타입 대신 large_string 등을 씁니다."""
+    table = frame.to_arrow(compat_level=pl.CompatLevel.oldest())
+    if metadata:
+        table = table.replace_schema_metadata({ARROW_PAYLOAD_METADATA_KEY: dumps(metadata)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def accepts_arrow(accept: str | None) -> bool:
+    if not accept:
+        return False
+    return any(part.split(";")[0].strip().lower() == ARROW_STREAM_MEDIA_TYPE for part in accept.split(","))
+
+
+def encode_table_payload(payload: dict[str, Any], accept: str | None = None) -> tuple[bytes, str]:
+    """표 응답을 (본문, media type)으로 만듭니다. Arrow를 요청했고 tableData가 프레임이면 Arrow 스트림으로 보냅니다."""
+    table_data = payload.get("tableData")
+    if accepts_arrow(accept) and isinstance(table_data, TableData):
+        metadata = {key: value for key, value in payload.items() if key != "tableData"}
+        return frame_to_arrow_stream(table_data.frame, metadata), ARROW_STREAM_MEDIA_TYPE
+    return dumps(payload), "application/json"
@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import shapely
+from pyproj import CRS
+
+from errors import GeospatialDataError
+from services.crs_cache import CrsCache
+from services.geo_features import read_geometries, record_to_dict
+from services.mvt import MVT_EXTENT, TileLayer, encode_tile, tile_bounds
+from services.spatial_index import SpatialIndex
+
+logger = logging.getLogger(__name__)
+
+TILE_CACHE_VERSION = "1"
+TILE_PIXELS = 256
+
+
+class VectorTileBuilder:
+    """SHP 레이어를 XYZ 타일 단위의 Mapbox Vector Tile로 만들고 디스크에 캐시합니다.
+
+    레이어 공간 인덱스로 타일과 겹치는 레코드만 읽습니다. 타일 한 픽셀보다 작은 형상은 픽셀마다 가장 큰
+    하나만 남기고 GEO_TILE_MAX_FEATURES에서 자르므로, 줌이 낮아도 요청당 비용이 일정합니다. 형상은 타일
+    경계(버퍼 포함)로 자르고 타일 해상도에 맞춰 단순화합니다. 타일 캐시는 호출하는 쪽이 넘기는 레이어 디렉터리
+    (원본 지문으로 관리되는 데이터셋 캐시 디렉터리 안)에 두므로 원본이 바뀌면 함께 지워집니다.
+    """
+
+    def __init__(self, crs_cache: CrsCache | None = None):
+        self.crs_cache = crs_cache or CrsCache()
+        self.max_zoom = int(os.environ.get("GEO_TILE_MAX_ZOOM", "22"))
+        self.max_features = max(1, int(os.environ.get("GEO_TILE_MAX_FEATURES", "20000")))
+        self.min_feature_pixels = float(os.environ.get("GEO_TILE_MIN_FEATURE_PIXELS", "1.0"))
+        self.simplify_units = float(os.environ.get("GEO_TILE_SIMPLIFY_UNITS", "2.0"))
+        self.buffer_units = int(os.environ.get("GEO_TILE_BUFFER_UNITS", "64"))
+        self.cache_enabled = os.environ.get("GEO_TILE_CACHE", "true").lower() not in {"0", "false", "no"}
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.rendered = 0
+        self.truncated = 0
+
+    def render(
+        self,
+        cache_dir: Path,
+        layer_path: Path,
+        reader,
+        index: SpatialIndex,
+        source_crs: CRS,
+        fields: list[str],
+        z: int,
+        x: int,
+        y: int,
+    ) -> bytes:
+        if not 0 <= z <= self.max_zoom or not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+            raise GeospatialDataError(f"타일 좌표가 올바르지 않습니다: {z}/{x}/{y} (최대 줌 {self.max_zoom})")
+
+        source_stat = layer_path.stat()
+        cache_path = self._cache_path(cache_dir, layer_path, source_stat, fields, z, x, y)
+        if self.cache_enabled and cache_path.exists():
+            with self._guard:
+                self.hits += 1
+            return cache_path.read_bytes()
+
+        tile = self._render(layer_path, reader, index, source_crs, fields, z, x, y)
+        if self.cache_enabled:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            partial_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.part")
+            partial_path.write_bytes(tile)
+            os.replace(partial_path, cache_path)
+        with self._guard:
+            self.rendered += 1
+        return tile
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            return {
+                "hits": self.hits,
+                "rendered": self.rendered,
+                "truncated": self.truncated,
+            }
+
+    def _render(self, layer_path, reader, index, source_crs, fields, z, x, y) -> bytes:
+        minx, miny, maxx, maxy = tile_bounds(z, x, y)
+        size = maxx - minx
+        buffer = size * self.buffer_units / MVT_EXTENT
+        clip_bounds = (minx - buffer, miny - buffer, maxx + buffer, maxy + buffer)
+
+        to_source = self.crs_cache.transformer(self.crs_cache.from_epsg(3857), source_crs)
+        source_bounds = to_source.transform_bounds(*clip_bounds, densify_pts=21)
+        if not all(np.isfinite(source_bounds)):
+            return b""
+        candidates, bounds = index.query(*source_bounds)
+        source_pixel = (source_bounds[2] - source_bounds[0]) / (TILE_PIXELS * (1 + 2 * self.buffer_units / MVT_EXTENT))
+        candidates = self._thin(candidates, bounds, source_bounds, source_pixel)
+        if not len(candidates):
+            return b""
+
+        feature_ids = np.sort(candidates).tolist()
+        geometries = read_geometries(layer_path, reader, feature_ids)
+        present = np.flatnonzero(~shapely.is_missing(geometries))
+        geometries = geometries[present]
+        feature_ids = [feature_ids[position] for position in present.tolist()]
+        properties = [record_to_dict(reader.record(feature_id, fields=fields)) for feature_id in feature_ids]
+
+        to_mercator = self.crs_cache.transformer(source_crs, self.crs_cache.from_epsg(3857))
+        scale = MVT_EXTENT / size
+        geometries = shapely.transform(
+            geometries,
+            lambda coords: np.column_stack(to_mercator.transform(coords[:, 0], coords[:, 1])),
+        )
+        geometries = shapely.clip_by_rect(geometries, *clip_bounds)
+        # EPSG:3857 좌표를 타일 좌표(0~4096, y 아래 방향)로 옮긴 뒤 타일 해상도로 단순화하고 정수로 맞춥니다.
+        geometries = shapely.transform(geometries, lambda coords: (coords - (minx, maxy)) * (scale, -scale))
+        if not index.point_layer and self.simplify_units > 0:
+            geometries = shapely.simplify(geometries, self.simplify_units)
+        geometries = shapely.transform(geometries, np.round)
+
+        layer = TileLayer(layer_path.stem)
+        for geometry, feature_properties, feature_id in zip(geometries, properties, feature_ids):
+            if geometry is None or geometry.is_empty:
+                continue
+            layer.add_feature(geometry, feature_properties, feature_id)
+        return encode_tile([layer])
+
+    def _thin(self, candidates: np.ndarray, bounds: np.ndarray, source_bounds, source_pixel: float) -> np.ndarray:
+        """한 픽셀보다 작은 형상은 픽셀마다 가장 큰 것 하나만 남기고, 상한을 넘으면 큰 형상부터 남깁니다."""
+        if not len(candidates):
+            return candidates
+        extent = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+        small = extent < source_pixel * self.min_feature_pixels
+        if small.any():
+            order = np.argsort(-extent[small], kind="stable")
+            small_ids = candidates[small][order]
+            small_bounds = bounds[small][order]
+            centers = (small_bounds[:, :2] + small_bounds[:, 2:]) / 2
+            cells = np.floor((centers - (source_bounds[0], source_bounds[1])) / source_pixel).astype(np.int64)
+            _cells, first = np.unique(cells, axis=0, return_index=True)
+            candidates = np.concatenate([candidates[~small], small_ids[np.sort(first)]])
+            extent = np.concatenate([extent[~small], extent[small][order][np.sort(first)]])
+        if len(candidates) > self.max_features:
+            keep = np.argpartition(-extent, self.max_features - 1)[: self.max_features]
+            candidates = candidates[keep]
+            with self._guard:
+                self.truncated += 1
+        return candidates
+
+    def _cache_path(self, cache_dir: Path, layer_path: Path, source_stat, fields: list[str], z: int, x: int, y: int) -> Path:
+        settings = (
+            TILE_CACHE_VERSION,
+            str(layer_path),
+            source_stat.st_size,
+            source_stat.st_mtime_ns,
+            tuple(fields),
+            self.max_features,
+            self.min_feature_pixels,
+            self.simplify_units,
+            self.buffer_units,
+        )
+        cache_key = hashlib.sha256(repr(settings).encode("utf-8")).hexdigest()
+        return cache_dir / cache_key[:16] / str(z) / str(x) / f"{y}.mvt"
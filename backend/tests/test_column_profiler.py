@@ -0,0 +1,65 @@
+import math
+import unittest
+
+import duckdb
+import polars as pl
+
+from services.column_profiler import ColumnProfiler
+
+
+class ColumnProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.con = duckdb.connect()
+        self.profiler = ColumnProfiler(max_categories=2)
+
+    def tearDown(self):
+        self.con.close()
+
+    def profile(self, frame: pl.DataFrame, approximate: bool = False):
+        self.con.register("df", frame)
+        return self.profiler.profile(self.con, "SELECT * FROM df", approximate=approximate)
+
+    def test_categorical_columns_keep_top_values_by_count(self):
+        frame = pl.DataFrame(
+            {
+                "city": ["seoul"] * 5 + ["busan"] * 3 + ["daegu"] + [None],
+                "flag": [True] * 7 + [False] * 3,
+            }
+        )
+        distributions = self.profile(frame)
+
+        self.assertEqual(distributions["city"], {"type": "categorical", "counts": [5, 3], "labels": ["seoul", "busan"]})
+        self.assertEqual(distributions["flag"], {"type": "categorical", "counts": [7, 3], "labels": ["True", "False"]})
+
+    def test_discrete_and_constant_numeric_columns(self):
+        frame = pl.DataFrame(
+            {
+                "grade": [1, 1, 2, 3, 3, 3, None],
+                "constant": [7.0] * 6 + [math.nan],
+            }
+        )
+        distributions = self.profile(frame)
+
+        self.assertEqual(distributions["grade"], {"type": "numeric", "counts": [2, 1, 3], "labels": ["1", "2", "3"]})
+        self.assertEqual(distributions["constant"], {"type": "numeric", "counts": [6], "labels": ["7"]})
+
+    def test_histogram_excludes_non_finite_values(self):
+        values = [float(index) for index in range(100)] + [math.inf, -math.inf, math.nan, None]
+        for approximate in (False, True):
+            distributions = self.profile(pl.DataFrame({"value": values}), approximate=approximate)
+            histogram = distributions["value"]
+            self.assertEqual(sum(histogram["counts"]), 100)
+            self.assertEqual(histogram["labels"][0], "0")
+            self.assertEqual(len(histogram["counts"]), len(histogram["labels"]))
+
+    def test_profiles_query_results_and_skips_empty_columns(self):
+        frame = pl.DataFrame({"id": list(range(50)), "empty": [None] * 50}, schema={"id": pl.Int64, "empty": pl.Float64})
+        self.con.register("df", frame)
+        distributions = self.profiler.profile(self.con, "SELECT id, empty FROM df WHERE id < 10")
+
+        self.assertNotIn("empty", distributions)
+        self.assertEqual(sum(distributions["id"]["counts"]), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import gzip
+import os
+import unittest
+from unittest import mock
+
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from compression import CompressionMiddleware, CompressionStats, parse_accept_encoding
+
+PAYLOAD = b'{"type":"Feature","geometry":{"type":"Point","coordinates":[127.0,37.5]}},' * 200
+
+
+def make_client(stats: CompressionStats, **env) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return Response(PAYLOAD, media_type="application/json")
+
+    @app.get("/small")
+    def small():
+        return Response(b'{"ok":true}', media_type="application/json")
+
+    @app.get("/parquet")
+    def parquet():
+        return Response(PAYLOAD, media_type="application/vnd.apache.parquet")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([PAYLOAD[:5000], PAYLOAD[5000:10000], PAYLOAD[10000:]]), media_type="text/csv")
+
+    with mock.patch.dict(os.environ, env):
+        app.add_middleware(CompressionMiddleware, stats=stats)
+        return TestClient(app)
+
+
+class CompressionMiddlewareTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = CompressionStats()
+        self.client = make_client(self.stats, COMPRESSION_MIN_SIZE="1024")
+
+    def test_accept_encoding_quality_values(self):
+        self.assertEqual(parse_accept_encoding("gzip;q=0.5, zstd, br;q=0"), {"gzip": 0.5, "zstd": 1.0, "br": 0.0})
+
+    def test_negotiates_preferred_encoding_with_content_length(self):
+        response = self.client.get("/big", headers={"Accept-Encoding": "gzip, zstd"})
+        self.assertEqual(response.headers["content-encoding"], "zstd")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        # TestClient는 본문을 자동으로 풀어주므로 원래 바이트와 같아야 합니다.
+        self.assertEqual(response.content, PAYLOAD)
+        self.assertLess(int(response.headers["content-length"]), len(PAYLOAD) // 10)
+
+        response = self.client.get("/big", headers={"Accept-Encoding": "gzip, zstd;q=0"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+
+        stats = self.stats.stats()["encodings"]
+        self.assertEqual(stats["zstd"]["bytes_in"], len(PAYLOAD))
+        self.assertGreater(stats["zstd"]["ratio"], 10)
+        self.assertEqual(stats["gzip"]["responses"], 1)
+
+    def test_small_and_precompressed_responses_pass_through(self):
+        small = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        parquet = self.client.get("/parquet", headers={"Accept-Encoding": "gzip"})
+        plain = self.client.get("/big", headers={"Accept-Encoding": "identity"})
+
+        for response in (small, parquet, plain):
+            self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(self.stats.stats()["skipped"], {"small": 1, "media_type": 1, "not_accepted": 1})
+
+    def test_streaming_response_is_compressed_incrementally(self):
+        with self.client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertNotIn("content-length", response.headers)
+        self.assertEqual(gzip.decompress(raw), PAYLOAD)
+
+        with self.client.stream("GET", "/stream", headers={"Accept-Encoding": "zstd"}) as response:
+            raw = b"".join(response.iter_raw())
+        self.assertEqual(zstandard.ZstdDecompressor().decompressobj().decompress(raw), PAYLOAD)
+
+
+if __name__ == "__main__":
+    unittest.main()
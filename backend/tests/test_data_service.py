@@ -0,0 +1,573 @@
+import gzip
+import io
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import openpyxl
+import orjson
+import polars as pl
+import pyarrow as pa
+
+from errors import DatasetNotFoundError, InvalidCursorError, JobNotFoundError, QueryCancelledError, SheetNotFoundError
+from services import data_service
+from services.data_service import DataService
+from services.pagination import decode_cursor, query_fingerprint
+from services.query_executor import CancelToken
+
+
+class DataServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.nas_root = self.root / "nas"
+        self.bucket_root = self.nas_root / "tables"
+        self.bucket_root.mkdir(parents=True)
+        os.environ["GEO_CACHE_DIR"] = str(self.root / "geo-cache")
+        os.environ["SHARED_STATE_DIR"] = str(self.root / "state")
+        self.nas_patch = mock.patch.object(data_service, "NAS_ROOT_PATH", str(self.nas_root))
+        self.nas_patch.start()
+        self.service = DataService()
+
+    def tearDown(self):
+        self.service.materialization_queue.shutdown(wait=True)
+        self.nas_patch.stop()
+        os.environ.pop("GEO_CACHE_DIR", None)
+        os.environ.pop("SHARED_STATE_DIR", None)
+        self.temp_dir.cleanup()
+
+    def write_csv(self, name: str, rows: int, label: str) -> str:
+        lines = ["id,label,value"]
+        lines.extend(f"{index},{label},{index * 1.5}" for index in range(rows))
+        (self.bucket_root / name).write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return name
+
+    def test_concurrent_datasets_are_isolated(self):
+        first = self.service.get_dataset_details("tables", self.write_csv("a.csv", 30, "alpha"), "nas")
+        second = self.service.get_dataset_details("tables", self.write_csv("b.csv", 5, "beta"), "nas")
+
+        self.assertNotEqual(first["dataset_id"], second["dataset_id"])
+        self.assertEqual(first["total"], 30)
+        self.assertEqual(second["total"], 5)
+
+        result = self.service.execute_query(first["dataset_id"], "SELECT * FROM data WHERE id >= 20")
+        self.assertEqual(result["total"], 10)
+        self.assertEqual({row["label"] for row in result["tableData"]}, {"alpha"})
+
+        page = self.service.get_paged_data(second["dataset_id"], "SELECT * FROM data", 1, 10)
+        self.assertEqual([row["label"] for row in page["tableData"]], ["beta"] * 5)
+
+        csv_bytes = b"".join(self.service.download_query(second["dataset_id"], "SELECT id FROM data"))
+        self.assertEqual(csv_bytes.decode("utf-8").splitlines()[0], "id")
+        self.assertEqual(len(csv_bytes.decode("utf-8").splitlines()), 6)
+
+    def test_download_streams_every_export_format(self):
+        self.service.export_batch_rows = 7
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 30, "alpha"), "nas")
+        query = "SELECT id, label FROM data WHERE id < 20"
+
+        chunks = list(self.service.download_query(details["dataset_id"], query, "csv"))
+        self.assertGreater(len(chunks), 1)
+        lines = b"".join(chunks).decode("utf-8").splitlines()
+        self.assertEqual(lines[0], "id,label")
+        self.assertEqual(len(lines), 21)
+
+        gzipped = b"".join(self.service.download_query(details["dataset_id"], query, "csv.gz"))
+        self.assertEqual(gzip.decompress(gzipped), b"".join(chunks))
+
+        parquet_bytes = b"".join(self.service.download_query(details["dataset_id"], query, "parquet"))
+        self.assertEqual(pl.read_parquet(io.BytesIO(parquet_bytes))["id"].to_list(), list(range(20)))
+
+        arrow_bytes = b"".join(self.service.download_query(details["dataset_id"], query, "arrow"))
+        table = pa.ipc.open_stream(arrow_bytes).read_all()
+        self.assertEqual(table.num_rows, 20)
+
+    def test_cancelled_download_stops_between_chunks(self):
+        self.service.export_batch_rows = 7
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 30, "alpha"), "nas")
+        cancel_token = CancelToken()
+        chunks = self.service.download_query(details["dataset_id"], "SELECT id FROM data", "csv", cancel_token)
+
+        self.assertTrue(next(chunks).startswith(b"id\n"))
+        cancel_token.cancel()
+        with self.assertRaises(QueryCancelledError):
+            next(chunks)
+
+    def test_large_mode_download_reads_from_view(self):
+        self.service.large_file_threshold_bytes = 1
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 12, "alpha"), "nas")
+
+        csv_bytes = b"".join(self.service.download_query(details["dataset_id"], "SELECT label FROM data"))
+        self.assertEqual(csv_bytes.decode("utf-8").splitlines(), ["label"] + ["alpha"] * 12)
+        page = self.service.get_paged_data(details["dataset_id"], "SELECT * FROM data", 2, 10)
+        self.assertEqual(len(page["tableData"]), 2)
+
+    def test_empty_csv_download_keeps_header(self):
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 3, "alpha"), "nas")
+        csv_bytes = b"".join(self.service.download_query(details["dataset_id"], "SELECT id FROM data WHERE id < 0"))
+        self.assertEqual(csv_bytes.decode("utf-8").splitlines(), ["id"])
+
+    def collect_cursor_pages(self, dataset_id: str, query: str, page_size: int) -> list[dict]:
+        rows = []
+        cursor = None
+        for _ in range(100):
+            page = self.service.get_paged_data(dataset_id, query, 1, page_size, cursor=cursor, use_cursor=True)
+            self.assertLessEqual(len(page["tableData"]), page_size)
+            rows.extend(page["tableData"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return rows
+        self.fail("cursor pagination did not terminate")
+
+    def test_cursor_pagination_follows_order_by_with_ties_and_nulls(self):
+        lines = ["id,grp"]
+        lines.extend(f"{index},{'' if index % 5 == 0 else index % 3}" for index in range(23))
+        (self.bucket_root / "ties.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        details = self.service.get_dataset_details("tables", "ties.csv", "nas")
+        dataset_id = details["dataset_id"]
+        self.service.get_paged_data(dataset_id, "SELECT * FROM data", 1, 10)
+        handle = self.service.registry.get(dataset_id)
+        with handle.cursor() as con:
+            con.execute("CREATE OR REPLACE TEMP VIEW ordered AS SELECT id, NULLIF(grp, 0) AS grp FROM df")
+
+        query = "SELECT * FROM ordered ORDER BY grp DESC, id"
+        with handle.cursor() as con:
+            expected = con.execute(query).pl().to_dicts()
+        self.assertEqual(self.collect_cursor_pages(dataset_id, query, 4), expected)
+
+        by_group_only = self.collect_cursor_pages(dataset_id, "SELECT * FROM ordered ORDER BY grp", 3)
+        self.assertEqual(sorted(row["id"] for row in by_group_only), list(range(23)))
+
+    def test_cursor_pagination_without_order_by_follows_row_keys(self):
+        file_name = self.write_csv("a.csv", 25, "alpha")
+        for threshold in (self.service.large_file_threshold_bytes, 1):
+            # 메모리 프레임과 대용량 모드(Parquet 뷰) 모두 원본 행 번호로 이어 읽습니다.
+            self.service.large_file_threshold_bytes = threshold
+            details = self.service.get_dataset_details("tables", file_name, "nas")
+            dataset_id = details["dataset_id"]
+            query = "SELECT id FROM data WHERE id % 2 = 0"
+            rows = self.collect_cursor_pages(dataset_id, query, 5)
+            self.assertEqual(rows, [{"id": index} for index in range(0, 25, 2)])
+
+            page = self.service.get_paged_data(dataset_id, query, 1, 5, use_cursor=True)
+            position = decode_cursor(page["next_cursor"], query_fingerprint(dataset_id, self.service._rewrite_user_query(query)))
+            self.assertEqual(position.values, (8,))
+            default = self.collect_cursor_pages(dataset_id, "SELECT * FROM data", 10)
+            self.assertEqual([row["id"] for row in default], list(range(25)))
+            self.assertEqual(list(default[0]), ["id", "label", "value"])
+            self.assertEqual(self.service.registry.get(dataset_id).use_duckdb_view, threshold == 1)
+
+            # 집계 결과처럼 원본 행과 대응하지 않는 쿼리는 offset 커서로 읽습니다.
+            grouped = "SELECT id % 3 AS bucket, count(*) AS n FROM data GROUP BY 1"
+            rows = self.collect_cursor_pages(dataset_id, grouped, 2)
+            self.assertEqual(sorted(row["bucket"] for row in rows), [0, 1, 2])
+            self.service.registry.remove(dataset_id)
+
+    def test_ordered_cursor_breaks_ties_with_row_key(self):
+        lines = ["id,grp"] + [f"{index},{index % 3}" for index in range(20)]
+        (self.bucket_root / "ties.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        details = self.service.get_dataset_details("tables", "ties.csv", "nas")
+        dataset_id = details["dataset_id"]
+
+        rows = self.collect_cursor_pages(dataset_id, "SELECT * FROM data ORDER BY grp DESC", 3)
+        self.assertEqual(list(rows[0]), ["id", "grp"])
+        self.assertEqual([row["grp"] for row in rows], sorted((index % 3 for index in range(20)), reverse=True))
+        self.assertEqual(sorted(row["id"] for row in rows), list(range(20)))
+
+        query = "SELECT * FROM data ORDER BY grp DESC"
+        page = self.service.get_paged_data(dataset_id, query, 1, 3, use_cursor=True)
+        position = decode_cursor(page["next_cursor"], query_fingerprint(dataset_id, self.service._rewrite_user_query(query)))
+        # 정렬 키 뒤에는 모든 열이 아니라 원본 행 번호 하나만 붙습니다.
+        self.assertEqual(len(position.values), 2)
+
+    def test_cursor_keeps_string_literal_case(self):
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 25, "alpha"), "nas")
+        page = self.service.get_paged_data(
+            details["dataset_id"], "SELECT * FROM data WHERE label = 'alpha'", 1, 5, use_cursor=True
+        )
+        with self.assertRaises(InvalidCursorError):
+            self.service.get_paged_data(
+                details["dataset_id"],
+                "SELECT * FROM data WHERE label = 'ALPHA'",
+                1,
+                5,
+                cursor=page["next_cursor"],
+            )
+
+    def test_cursor_from_other_query_is_rejected(self):
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 25, "alpha"), "nas")
+        page = self.service.get_paged_data(details["dataset_id"], "SELECT * FROM data ORDER BY id", 1, 5, use_cursor=True)
+
+        with self.assertRaises(InvalidCursorError):
+            self.service.get_paged_data(
+                details["dataset_id"],
+                "SELECT * FROM data ORDER BY value",
+                1,
+                5,
+                cursor=page["next_cursor"],
+            )
+        with self.assertRaises(InvalidCursorError):
+            self.service.get_paged_data(details["dataset_id"], "SELECT * FROM data", 1, 5, cursor="not-a-cursor")
+
+    def test_query_results_are_cached_per_source_and_query(self):
+        file_name = self.write_csv("a.csv", 30, "alpha")
+        first = self.service.get_dataset_details("tables", file_name, "nas")
+        second = self.service.get_dataset_details("tables", file_name, "nas")
+        query = "SELECT * FROM data WHERE id >= 20"
+
+        result = self.service.execute_query(first["dataset_id"], query)
+        self.assertEqual(self.service.result_cache.stats()["hits"], 0)
+        cached = self.service.execute_query(second["dataset_id"], "SELECT *  FROM data\nWHERE id >= 20")
+        self.assertEqual(cached, result)
+        page = self.service.get_paged_data(second["dataset_id"], query, 1, 10)
+        self.assertEqual(page["tableData"], result["tableData"])
+        self.assertEqual(self.service.result_cache.stats()["hits"], 2)
+
+        self.write_csv("a.csv", 40, "alpha")
+        newer = (self.bucket_root / file_name).stat().st_mtime_ns + 10**10
+        os.utime(self.bucket_root / file_name, ns=(newer, newer))
+        reloaded = self.service.get_dataset_details("tables", file_name, "nas")
+        self.assertEqual(self.service.execute_query(reloaded["dataset_id"], query)["total"], 20)
+
+    def test_result_cache_evicts_by_byte_budget(self):
+        cache = self.service.result_cache
+        cache.max_bytes = 400
+        rows = [{"id": index, "label": "x" * 20} for index in range(5)]
+        cache.put_page("fp", "SELECT 1", 1, 5, rows)
+        cache.put_page("fp", "SELECT 2", 1, 5, rows)
+        cache.put_page("fp", "SELECT 3", 1, 5, rows)
+
+        self.assertIsNone(cache.get_page("fp", "SELECT 1", 1, 5))
+        self.assertEqual(cache.get_page("fp", "SELECT 3", 1, 5), rows)
+        self.assertLessEqual(cache.stats()["bytes"], 400)
+        self.assertGreater(cache.stats()["evictions"], 0)
+
+    def test_stream_query_sends_estimate_before_exact_total(self):
+        self.service.count_estimate_sample_rows = 10
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 40, "alpha"), "nas")
+        query = "SELECT * FROM data WHERE id % 2 = 0"
+
+        events = list(self.service.stream_query(details["dataset_id"], query))
+        self.assertEqual([name for name, _payload in events], ["preview", "total", "distributions"])
+        preview = events[0][1]
+        self.assertTrue(preview["total_estimated"])
+        self.assertEqual(preview["total"], 20)
+        self.assertEqual(len(preview["tableData"]), 10)
+        self.assertEqual(events[1][1], {"total": 20})
+        self.assertIn("value", events[2][1]["distributions"])
+
+        summary = self.service.execute_query(details["dataset_id"], query)
+        self.assertEqual(summary["total"], 20)
+        self.assertEqual(self.service.result_cache.stats()["hits"], 1)
+
+        limited = list(self.service.stream_query(details["dataset_id"], "SELECT * FROM data LIMIT 3"))
+        self.assertEqual(limited[0][1]["total"], 3)
+        self.assertEqual(limited[1][1], {"total": 3})
+
+    def test_estimate_scales_columns_named_like_aggregates(self):
+        self.service.count_estimate_sample_rows = 10
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 40, "alpha"), "nas")
+
+        # max, min_price 같은 컬럼 이름은 집계 함수가 아니므로 샘플 비율로 늘려 추정합니다.
+        renamed = "SELECT id AS max, value AS min_price FROM data WHERE id % 2 = 0"
+        preview = next(self.service.stream_query(details["dataset_id"], renamed))[1]
+        self.assertEqual((preview["total"], preview["total_estimated"]), (20, True))
+
+        aggregated = next(self.service.stream_query(details["dataset_id"], "SELECT max (id) FROM data"))[1]
+        self.assertEqual((aggregated["total"], aggregated["total_estimated"]), (1, True))
+
+    def test_stream_query_without_filter_uses_known_row_count(self):
+        self.service.count_estimate_sample_rows = 10
+        details = self.service.get_dataset_details("tables", self.write_csv("a.csv", 40, "alpha"), "nas")
+
+        name, preview = next(self.service.stream_query(details["dataset_id"], "select *\nfrom data"))
+        self.assertEqual(name, "preview")
+        self.assertEqual((preview["total"], preview["total_estimated"]), (40, False))
+
+    def test_minio_objects_are_read_from_local_cache(self):
+        source = self.root / "remote.csv"
+        source.write_text("id,label\n1,a\n2,b\n", encoding="utf-8")
+        minio = mock.Mock()
+        minio.bucket_exists.return_value = True
+
+        def stat_object(bucket, name):
+            if name != "remote.csv":
+                raise data_service.S3Error("NoSuchKey", "", name, "", "", mock.Mock())
+            return mock.Mock(size=source.stat().st_size, etag="etag-1", last_modified=1)
+
+        minio.stat_object.side_effect = stat_object
+        minio.fget_object.side_effect = lambda bucket, name, target: Path(target).write_bytes(source.read_bytes())
+        minio.fput_object.return_value = mock.Mock(etag="parquet-etag")
+        self.service.minio_client = minio
+
+        with mock.patch.dict(os.environ, {"OBJECT_CACHE_DIR": str(self.root / "objects")}):
+            self.service.object_cache = data_service.ObjectCache()
+            first = self.service.get_dataset_details("bucket", "remote.csv", "minio")
+            second = self.service.get_dataset_details("bucket", "remote.csv", "minio")
+
+        self.assertEqual(first["total"], 2)
+        self.assertEqual(second["tableData"], first["tableData"])
+        self.assertEqual(minio.fget_object.call_count, 1)
+        # TTL 안의 두 번째 적재는 원본과 Parquet 캐시의 stat을 모두 메타데이터 캐시에서 씁니다.
+        stat_calls = [call.args[1] for call in minio.stat_object.call_args_list]
+        self.assertEqual(minio.bucket_exists.call_count, 1)
+        self.assertEqual(stat_calls.count("remote.csv"), 1)
+        # 올린 Parquet은 업로드 결과로 메타데이터 캐시에 들어가므로, 두 번의 적재를 합쳐 한 번만 조회합니다.
+        self.assertEqual(stat_calls.count("remote.parquet"), 1)
+        stats = self.service.object_cache.stats()
+        self.assertEqual((stats["entries"], stats["pinned"]), (2, 2))
+
+        self.service.registry.remove(first["dataset_id"])
+        self.service.registry.remove(second["dataset_id"])
+        self.assertEqual(self.service.object_cache.stats()["pinned"], 0)
+
+    def wait_for_materialization(self, details: dict) -> dict:
+        job = self.service.materialization_queue.get(details["materialization"]["job_id"])
+        self.assertTrue(job.wait(timeout=30))
+        return self.service.get_materialization_status(job.job_id)
+
+    def test_first_load_previews_raw_csv_and_swaps_to_parquet(self):
+        release = threading.Event()
+        convert = self.service._materialize_local
+
+        def gated_convert(*args):
+            release.wait(timeout=30)
+            return convert(*args)
+
+        with mock.patch.object(self.service, "_materialize_local", side_effect=gated_convert) as patched:
+            first = self.service.get_dataset_details("tables", self.write_csv("a.csv", 30, "alpha"), "nas")
+            second = self.service.get_dataset_details("tables", "a.csv", "nas")
+            self.assertEqual(first["materialization"]["job_id"], second["materialization"]["job_id"])
+            self.assertEqual(first["total"], 30)
+            self.assertEqual(len(first["tableData"]), 10)
+            self.assertEqual(self.service.registry.get(first["dataset_id"]).fingerprint[-4:], ":raw")
+            release.set()
+            status = self.wait_for_materialization(first)
+        self.assertEqual(patched.call_count, 1)
+        self.assertEqual((status["status"], status["rows"]), ("done", 30))
+        handle = self.service.registry.get(first["dataset_id"])
+        self.assertIsNone(handle.materialization)
+        self.assertTrue(handle.fingerprint.endswith(":frame"))
+        self.assertEqual(handle.total_rows, 30)
+        self.assertEqual(self.service.execute_query(first["dataset_id"], "SELECT * FROM data WHERE id >= 25")["total"], 5)
+
+        with self.assertRaises(JobNotFoundError):
+            self.service.get_materialization_status("missing")
+
+    def test_large_delimited_files_get_streamed_parquet_cache(self):
+        self.service.large_file_threshold_bytes = 1
+        self.service.parquet_row_group_rows = 4
+        (self.bucket_root / "big.tsv").write_text("id\tname\tscore\n1\ta\t\n2\t\t2.5\n3\tc\tNA\n", encoding="utf-8")
+
+        details = self.service.get_dataset_details("tables", "big.tsv", "nas")
+        self.wait_for_materialization(details)
+        cache = self.bucket_root / "big.parquet"
+        self.assertTrue(cache.exists())
+        self.assertEqual(pl.read_parquet(cache)["score"].to_list(), [0.0, 2.5, 0.0])
+
+        reloaded = self.service.get_dataset_details("tables", "big.tsv", "nas")
+        self.assertIsNone(reloaded["materialization"])
+        self.assertEqual(reloaded["columns"], ["id", "name", "score"])
+        self.assertEqual(reloaded["tableData"][1], {"id": 2, "name": "", "score": 2.5})
+
+    def test_non_utf8_csv_is_transcoded_before_conversion(self):
+        (self.bucket_root / "korean.csv").write_bytes("지역,인구\n서울,10\n부산,3\n".encode("euc-kr"))
+
+        details = self.service.get_dataset_details("tables", "korean.csv", "nas")
+        self.assertEqual(details["columns"], ["지역", "인구"])
+        self.assertEqual([row["지역"] for row in details["tableData"]], ["서울", "부산"])
+        self.assertEqual(list(self.bucket_root.glob("*.tmp*")), [])
+
+    def write_workbook(self, name: str, rows: int) -> str:
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "data"
+        sheet.append(["id", "label"])
+        for index in range(rows):
+            sheet.append([index, f"row{index}"])
+        summary = workbook.create_sheet("요약")
+        summary.append(["name", "count"])
+        summary.append(["전체", rows])
+        workbook.save(self.bucket_root / name)
+        return name
+
+    def test_excel_previews_sheet_head_and_queries_wait_for_conversion(self):
+        self.service.excel_preview_rows = 5
+        release = threading.Event()
+        convert = self.service._materialize_local
+
+        def gated_convert(*args):
+            release.wait(timeout=30)
+            return convert(*args)
+
+        with mock.patch.object(self.service, "_materialize_local", side_effect=gated_convert):
+            details = self.service.get_dataset_details("tables", self.write_workbook("book.xlsx", 40), "nas")
+            self.assertEqual((details["sheets"], details["sheet"]), (["data", "요약"], "data"))
+            self.assertEqual((details["total"], details["total_estimated"]), (40, True))
+            self.assertEqual([row["id"] for row in details["tableData"]], [0, 1, 2, 3, 4])
+
+            results = []
+            query = threading.Thread(
+                target=lambda: results.append(
+                    self.service.execute_query(details["dataset_id"], "SELECT * FROM data WHERE id >= 30")
+                )
+            )
+            query.start()
+            query.join(timeout=0.3)
+            # 시트 앞부분만 적재된 동안에는 쿼리가 변환을 기다립니다.
+            self.assertTrue(query.is_alive())
+            release.set()
+            query.join(timeout=30)
+        self.assertEqual(results[0]["total"], 10)
+        self.assertTrue((self.bucket_root / "book.parquet").exists())
+
+        summary = self.service.get_dataset_details("tables", "book.xlsx", "nas", sheet="요약")
+        self.assertEqual((summary["total"], summary["total_estimated"]), (1, False))
+        self.assertEqual(summary["tableData"], [{"name": "전체", "count": 40}])
+        self.wait_for_materialization(summary)
+        self.assertEqual(len(list(self.bucket_root.glob("book.*-*.parquet"))), 1)
+
+        with self.assertRaises(SheetNotFoundError):
+            self.service.get_dataset_details("tables", "book.xlsx", "nas", sheet="missing")
+
+    def test_minio_excel_with_current_cache_skips_source_download(self):
+        objects = {"book.xlsx": (self.bucket_root / self.write_workbook("book.xlsx", 12)).read_bytes()}
+        versions = {"book.xlsx": 1}
+        minio = mock.Mock()
+        minio.bucket_exists.return_value = True
+
+        def stat_object(bucket, name):
+            if name not in objects:
+                raise data_service.S3Error("NoSuchKey", "", name, "", "", mock.Mock())
+            return mock.Mock(size=len(objects[name]), etag=f"{name}-etag", last_modified=versions[name])
+
+        def store(name, payload):
+            objects[name] = payload
+            versions[name] = 2
+            return mock.Mock(etag=f"{name}-etag")
+
+        minio.stat_object.side_effect = stat_object
+        minio.fget_object.side_effect = lambda bucket, name, target: Path(target).write_bytes(objects[name])
+        minio.get_object.side_effect = lambda bucket, name: mock.Mock(read=mock.Mock(return_value=objects[name]))
+        minio.put_object.side_effect = lambda bucket, name, data, length, content_type: store(name, data.read())
+        minio.fput_object.side_effect = lambda bucket, name, path, content_type: store(name, Path(path).read_bytes())
+
+        with mock.patch.dict(os.environ, {"OBJECT_CACHE_DIR": str(self.root / "objects")}):
+            self.service.minio_client = minio
+            self.service.object_cache = data_service.ObjectCache()
+            first = self.service.get_dataset_details("bucket", "book.xlsx", "minio")
+            self.wait_for_materialization(first)
+            self.assertEqual(orjson.loads(objects["book.sheets.json"]), {"sheets": ["data", "요약"]})
+
+            # 새 워커는 원본을 받지 않고, 남겨 둔 시트 목록과 Parquet 캐시만으로 적재합니다.
+            restarted = DataService()
+            restarted.minio_client = minio
+            restarted.object_cache = data_service.ObjectCache()
+            minio.fget_object.reset_mock()
+            summary = restarted.get_dataset_details("bucket", "book.xlsx", "minio")
+            restarted.materialization_queue.shutdown(wait=True)
+        self.assertEqual((summary["sheets"], summary["total"]), (["data", "요약"], 12))
+        self.assertIsNone(summary["materialization"])
+        self.assertNotIn("book.xlsx", [call.args[1] for call in minio.fget_object.call_args_list])
+
+    def test_partitioned_prefix_builds_one_view_and_prunes_partitions(self):
+        events = self.bucket_root / "events"
+
+        def write_partition(day: int, **extra):
+            partition = events / f"dt=2024-01-0{day}"
+            partition.mkdir(parents=True)
+            frame = pl.DataFrame({"id": [day * 10 + index for index in range(4)], "value": [day * 1.5] * 4})
+            frame.with_columns(pl.lit(value).alias(name) for name, value in extra.items()).write_parquet(
+                partition / "part-0.parquet"
+            )
+
+        for day in (1, 2, 3):
+            write_partition(day)
+        (events / "_SUCCESS").write_text("", encoding="utf-8")
+
+        details = self.service.get_dataset_details("tables", "events/", "nas")
+        self.assertEqual(details["columns"], ["id", "value", "dt"])
+        self.assertEqual(details["total"], 12)
+
+        # 조건에 맞지 않는 파티션 파일은 읽지 않으므로 깨진 파일이 있어도 쿼리가 성공합니다.
+        (events / "dt=2024-01-03" / "part-0.parquet").write_bytes(b"broken")
+        result = self.service.execute_query(details["dataset_id"], "SELECT * FROM data WHERE dt = '2024-01-02'")
+        self.assertEqual(result["total"], 4)
+        self.assertEqual({row["value"] for row in result["tableData"]}, {3.0})
+
+        write_partition(4, note="late")
+        narrowed = self.service.get_dataset_details("tables", "events/dt=2024-01-0[124]/*.parquet", "nas")
+        self.assertEqual(narrowed["columns"], ["id", "value", "note", "dt"])
+        self.assertEqual(narrowed["total"], 12)
+        with self.assertRaises(FileNotFoundError):
+            self.service.get_dataset_details("tables", "events/dt=2023-*/*.parquet", "nas")
+
+    def test_minio_glob_mirrors_partition_paths_from_parallel_listing(self):
+        payloads = {
+            f"sales/region={region}/part-{index}.csv": f"id,amount\n{index},{index * 10}\n".encode("utf-8")
+            for region in ("east", "west")
+            for index in range(3)
+        }
+        payloads["sales/region=east/notes.txt"] = b"not,data\n"
+
+        def item(name, is_dir=False):
+            size = len(payloads.get(name, b""))
+            return mock.Mock(object_name=name, is_dir=is_dir, size=size, etag=f"etag-{name}", last_modified=1)
+
+        def list_objects(bucket, prefix="", recursive=False):
+            if not recursive:
+                return [item("sales/region=east/", True), item("sales/region=west/", True)]
+            return [item(name) for name in payloads if name.startswith(prefix)]
+
+        minio = mock.Mock()
+        minio.bucket_exists.return_value = True
+        minio.list_objects.side_effect = list_objects
+        minio.fget_object.side_effect = lambda bucket, name, target: Path(target).write_bytes(payloads[name])
+        self.service.minio_client = minio
+
+        with mock.patch.dict(os.environ, {"OBJECT_CACHE_DIR": str(self.root / "objects")}):
+            self.service.object_cache = data_service.ObjectCache()
+            details = self.service.get_dataset_details("bucket", "sales/*/*.csv", "minio")
+
+        self.assertEqual(details["columns"], ["id", "amount", "region"])
+        self.assertEqual(details["total"], 6)
+        self.assertEqual(minio.fget_object.call_count, 6)
+        result = self.service.execute_query(details["dataset_id"], "SELECT * FROM data WHERE region = 'west'")
+        self.assertEqual(result["total"], 3)
+
+        handle = self.service.registry.get(details["dataset_id"])
+        mirror = Path(handle.url)
+        self.service.registry.remove(details["dataset_id"])
+        self.assertFalse(mirror.exists())
+        self.assertEqual(self.service.object_cache.stats()["pinned"], 0)
+
+    def test_unknown_dataset_id_is_rejected(self):
+        with self.assertRaises(DatasetNotFoundError):
+            self.service.execute_query("missing", "SELECT * FROM data")
+
+    def test_least_recently_used_handle_is_evicted(self):
+        self.service.registry.max_handles = 2
+        first = self.service.get_dataset_details("tables", self.write_csv("a.csv", 3, "alpha"), "nas")
+        second = self.service.get_dataset_details("tables", self.write_csv("b.csv", 3, "beta"), "nas")
+        self.service.get_paged_data(first["dataset_id"], "SELECT * FROM data", 1, 10)
+        self.service.get_dataset_details("tables", self.write_csv("c.csv", 3, "gamma"), "nas")
+
+        self.service.get_paged_data(first["dataset_id"], "SELECT * FROM data", 1, 10)
+        with self.assertRaises(DatasetNotFoundError):
+            self.service.get_paged_data(second["dataset_id"], "SELECT * FROM data", 1, 10)
+
+    def test_memory_budget_evicts_older_handles(self):
+        self.service.registry.memory_budget_bytes = 1
+        first = self.service.get_dataset_details("tables", self.write_csv("a.csv", 3, "alpha"), "nas")
+        second = self.service.get_dataset_details("tables", self.write_csv("b.csv", 3, "beta"), "nas")
+
+        self.service.get_paged_data(second["dataset_id"], "SELECT * FROM data", 1, 10)
+        with self.assertRaises(DatasetNotFoundError):
+            self.service.get_paged_data(first["dataset_id"], "SELECT * FROM data", 1, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+import openpyxl
+import polars as pl
+import pyarrow.parquet as pq
+
+from errors import SheetNotFoundError
+from services.excel_reader import list_sheets, read_preview, resolve_sheet, write_sheet_parquet
+
+
+class ExcelReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_workbook(self, rows: int) -> str:
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "data"
+        sheet.append(["id", "name", "day", "flag", None, "mixed"])
+        for index in range(rows):
+            mixed = "x" if index == 2 else index * 1.5
+            sheet.append([index, f"n{index}", datetime(2024, 1, 1 + index % 28), index % 2 == 0, None, mixed])
+        workbook.create_sheet("요약").append(["total"])
+        path = self.root / "book.xlsx"
+        workbook.save(path)
+        return str(path)
+
+    def test_preview_matches_full_read_types(self):
+        path = self.write_workbook(40)
+        self.assertEqual(list_sheets(path), ["data", "요약"])
+
+        preview = read_preview(path, "data", 5)
+        expected = pl.read_excel(path, sheet_name="data")
+        self.assertFalse(preview.complete)
+        self.assertEqual(preview.total_rows, 40)
+        self.assertEqual(preview.frame.schema, expected.schema)
+        self.assertEqual(preview.frame.to_dicts(), expected.head(5).to_dicts())
+        self.assertEqual(preview.frame["day"][0], date(2024, 1, 1))
+
+        complete = read_preview(path, "data", 100)
+        self.assertTrue(complete.complete)
+        self.assertTrue(complete.frame.equals(expected))
+
+    def test_preview_types_match_parquet_output(self):
+        path = self.write_workbook(30)
+        target = self.root / "data.parquet"
+        write_sheet_parquet(path, "data", str(target), lambda frame: frame, compression="zstd", row_group_rows=10)
+
+        preview = read_preview(path, "data", 10)
+        written = pl.read_parquet(target)
+        self.assertEqual(preview.frame.schema, written.schema)
+        self.assertEqual(preview.frame.to_dicts(), written.head(10).to_dicts())
+
+    def test_write_sheet_parquet_cleans_each_row_group(self):
+        path = self.write_workbook(25)
+        target = self.root / "data.parquet"
+        rows = write_sheet_parquet(
+            path,
+            "data",
+            str(target),
+            lambda frame: frame.with_columns(pl.col("name").str.to_uppercase()),
+            compression="zstd",
+            row_group_rows=10,
+        )
+
+        self.assertEqual(rows, 25)
+        self.assertEqual(pq.ParquetFile(target).num_row_groups, 3)
+        written = pl.read_parquet(target)
+        self.assertEqual(written["name"][24], "N24")
+        self.assertEqual(written.columns, ["id", "name", "day", "flag", "mixed"])
+
+    def test_sheet_larger_than_batch_matches_full_read(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "data"
+        sheet.append(["id", "amount", "day", None])
+        for index in range(35):
+            # 정수/자정/빈 열 규칙을 깨는 값이 마지막 묶음에만 있습니다.
+            late = index == 33
+            sheet.append([index, 2.5 if late else index, datetime(2024, 1, 1, 9 if late else 0), "memo" if late else None])
+        path = self.root / "batches.xlsx"
+        workbook.save(path)
+        target = self.root / "batches.parquet"
+
+        rows = write_sheet_parquet(str(path), "data", str(target), lambda frame: frame, compression="zstd", row_group_rows=10)
+
+        expected = pl.read_excel(path, sheet_name="data")
+        written = pl.read_parquet(target)
+        self.assertEqual(rows, 35)
+        self.assertEqual(pq.ParquetFile(target).num_row_groups, 4)
+        self.assertEqual(written.schema, expected.schema)
+        self.assertEqual(written.to_dicts(), expected.to_dicts())
+        self.assertEqual(list(self.root.glob("*.raw")), [])
+
+    def test_resolve_sheet_defaults_to_first_sheet(self):
+        self.assertEqual(resolve_sheet(["data", "요약"], None), "data")
+        self.assertEqual(resolve_sheet(["data", "요약"], "요약"), "요약")
+        with self.assertRaises(SheetNotFoundError):
+            resolve_sheet(["data"], "missing")
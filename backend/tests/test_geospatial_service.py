@@ -1,15 +1,22 @@
+import math
 import os
 import tempfile
 import unittest
 import zipfile
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from unittest import mock
 
+import orjson
 import shapefile
 from pyproj import CRS, Transformer
 
 from errors import GeospatialDataError
 from scripts.create_geo_demo import build_demo
+from services.cpu_pool import CpuPool
 from services.geospatial_service import GeospatialService
+from services.layer_catalog import LayerCatalog
+from services.table_encoding import dumps
 
 
 class GeospatialServiceTest(unittest.TestCase):
@@ -49,7 +56,10 @@ class GeospatialServiceTest(unittest.TestCase):
         )
         self.assertEqual(preview["metadata"]["returned"], 2)
         self.assertTrue(preview["metadata"]["sampled"])
-        self.assertEqual(preview["features"][0]["properties"]["name"], "서울권")
+        # 공간 층화 표본은 가장 큰 형상(제주권)을 먼저 대표로 뽑고, 레코드 순서로 돌려줍니다.
+        self.assertIn("제주권", [feature["properties"]["name"] for feature in preview["features"]])
+        feature_ids = [feature["id"] for feature in preview["features"]]
+        self.assertEqual(feature_ids, sorted(feature_ids))
 
     def test_bbox_filters_features(self):
         preview = self.service.get_preview(
@@ -92,6 +102,61 @@ class GeospatialServiceTest(unittest.TestCase):
         self.assertAlmostEqual(latitude, 37.5665, places=4)
         self.assertEqual(preview["metadata"]["source_crs"], "EPSG:5179")
 
+    def test_crs_and_transformers_are_reused_across_previews(self):
+        def preview():
+            return self.service.get_preview(
+                "geo-demo",
+                "korea-spatial-preview.zip",
+                "nas",
+                layer="places/major_places.shp",
+                bbox=(126.8, 37.4, 127.2, 37.7),
+            )
+
+        preview()
+        first = self.service.crs_cache.stats()
+        preview()
+        second = self.service.crs_cache.stats()
+
+        self.assertEqual(second["crs_misses"], first["crs_misses"])
+        self.assertEqual(second["transformer_misses"], first["transformer_misses"])
+        self.assertGreater(second["transformer_hits"], first["transformer_hits"])
+
+        with mock.patch.dict(os.environ, {"GEO_CRS_CACHE_SIZE": "1"}):
+            bounded = GeospatialService(None, str(self.nas_root)).crs_cache
+        bounded.from_epsg(4326)
+        bounded.from_epsg(5179)
+        self.assertEqual(bounded.stats()["crs"], 1)
+
+    def test_layer_metadata_is_served_from_catalog(self):
+        # 레이어마다 카탈로그를 다시 쓰지 않고, 없는 항목을 모두 만든 뒤 한 번만 씁니다.
+        with mock.patch.object(LayerCatalog, "_write", autospec=True, side_effect=LayerCatalog._write) as write:
+            details = self.service.get_dataset_details("geo-demo", "korea-spatial-preview.zip", "nas")
+        self.assertEqual(self.service.layer_catalog.stats()["built"], 3)
+        self.assertEqual(write.call_count, 1)
+
+        restarted = GeospatialService(None, str(self.nas_root))
+        with mock.patch("services.geospatial_service.shapefile.Reader") as reader:
+            self.assertEqual(
+                self.service.get_dataset_details("geo-demo", "korea-spatial-preview.zip", "nas"),
+                details,
+            )
+            self.assertEqual(
+                restarted.get_dataset_details("geo-demo", "korea-spatial-preview.zip", "nas"),
+                details,
+            )
+        reader.assert_not_called()
+        self.assertEqual(restarted.layer_catalog.stats()["built"], 0)
+
+        self.assertEqual(self.service.get_dataset_details("geo-demo", "regions.shp", "nas")["total"], 3)
+        base_path = self.demo_root / "regions"
+        with shapefile.Writer(base_path, shapeType=shapefile.POINT) as writer:
+            writer.field("name", "C", size=30)
+            writer.point(127.0, 37.5)
+            writer.record("변경됨")
+        changed = self.service.get_dataset_details("geo-demo", "regions.shp", "nas")
+        self.assertEqual(changed["total"], 1)
+        self.assertEqual(changed["tableData"], [{"name": "변경됨"}])
+
     def test_euc_kr_cpg_is_applied_to_dbf_records(self):
         base_path = self.demo_root / "euc_kr_place"
         with shapefile.Writer(
@@ -113,6 +178,152 @@ class GeospatialServiceTest(unittest.TestCase):
         )
         self.assertEqual(preview["features"][0]["properties"]["name"], "부산광역시")
 
+    def test_process_pool_builds_the_same_features(self):
+        with mock.patch.dict(os.environ, {"CPU_POOL_WORKERS": "2", "CPU_POOL_MIN_ITEMS": "1", "CPU_POOL_START_METHOD": "spawn"}):
+            pool = CpuPool()
+        pooled = GeospatialService(None, str(self.nas_root), cpu_pool=pool)
+        try:
+            cases = [
+                {"layer": "boundaries/regions.shp", "limit": 2},
+                {"layer": "places/major_places.shp", "bbox": (126.8, 37.4, 127.2, 37.7)},
+            ]
+            for options in cases:
+                expected = self.service.get_preview("geo-demo", "korea-spatial-preview.zip", "nas", **options)
+                actual = pooled.get_preview("geo-demo", "korea-spatial-preview.zip", "nas", **options)
+                self.assertEqual(orjson.loads(dumps(actual)), orjson.loads(dumps(expected)))
+            self.assertGreater(pool.stats()["tasks"], 0)
+        finally:
+            pool.shutdown(wait=True)
+
+    def test_process_pool_defaults_avoid_fork(self):
+        environ = {key: value for key, value in os.environ.items() if not key.startswith("CPU_POOL_")}
+        with mock.patch.dict(os.environ, environ, clear=True):
+            pool = CpuPool()
+        self.assertGreater(pool.max_workers, 0)
+        self.assertIn(pool.start_method, ("forkserver", "spawn"))
+        # 작업 프로세스는 처음 쓸 때 띄웁니다.
+        self.assertIsNone(pool._executor)
+
+        # fork 풀이 깨지면 스레드가 도는 프로세스에서 다시 fork하지 않고 직접 실행합니다.
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool()
+        pool.start_method = "fork"
+        with mock.patch.object(pool, "_ensure_executor", return_value=broken) as ensure:
+            self.assertEqual(pool.map(bytes.upper, [b"a"]), [b"A"])
+            self.assertEqual(pool.map(bytes.upper, [b"b"]), [b"B"])
+        self.assertEqual(ensure.call_count, 1)
+        self.assertFalse(pool.stats()["enabled"])
+
+    def test_batched_geometries_match_pyshp_geojson(self):
+        def ring(center_x, center_y, radius, clockwise=True):
+            points = [
+                (center_x + radius * math.cos(step * math.pi / 8), center_y + radius * math.sin(step * math.pi / 8))
+                for step in range(16)
+            ]
+            if clockwise:
+                points.reverse()
+            return points + [points[0]]
+
+        polygon_base = self.demo_root / "rings"
+        with shapefile.Writer(polygon_base, shapeType=shapefile.POLYGON) as writer:
+            writer.field("id", "N", size=5, decimal=0)
+            writer.poly([ring(127, 37, 0.1)])
+            writer.poly([ring(127, 37, 0.1), ring(127, 37, 0.02, clockwise=False)])
+            writer.poly([ring(127, 37, 0.1), ring(128, 37, 0.1)])
+            # 외곽이 여럿이고 구멍도 있으면 pyshp 방식으로 구멍 소속을 가립니다.
+            writer.poly([ring(127, 37, 0.1), ring(128, 37, 0.1), ring(128, 37, 0.02, clockwise=False)])
+            writer.null()
+            for index in range(5):
+                writer.record(index)
+        line_base = self.demo_root / "lines"
+        with shapefile.Writer(line_base, shapeType=shapefile.POLYLINE) as writer:
+            writer.field("id", "N", size=5, decimal=0)
+            writer.line([[(127, 37), (127.1, 37.2), (127.3, 37.1)]])
+            writer.record(0)
+            writer.line([[(127, 37), (127.1, 37.2)], [(128, 37), (128.2, 37.1)]])
+            writer.record(1)
+        for base_path in (polygon_base, line_base):
+            base_path.with_suffix(".prj").write_text(CRS.from_epsg(4326).to_wkt(), encoding="utf-8")
+
+            preview = self.service.get_preview("geo-demo", base_path.name + ".shp", "nas", limit=10)
+            with shapefile.Reader(base_path) as reader:
+                expected = [
+                    orjson.loads(orjson.dumps(shape.__geo_interface__))
+                    for shape in reader.iterShapes()
+                    if shape.shapeType != shapefile.NULL
+                ]
+            self.assertEqual([orjson.loads(dumps(feature["geometry"])) for feature in preview["features"]], expected)
+        self.assertEqual(preview["metadata"]["omitted_invalid_geometries"], 0)
+        self.assertEqual([feature["geometry"]["type"] for feature in preview["features"]], ["LineString", "MultiLineString"])
+
+    def test_corrupt_record_is_skipped_and_counted(self):
+        base_path = self.demo_root / "broken"
+        with shapefile.Writer(base_path, shapeType=shapefile.POLYLINE) as writer:
+            writer.field("id", "N", size=5, decimal=0)
+            for index in range(3):
+                writer.line([[(127 + index, 37), (127.5 + index, 37.5), (128 + index, 37)]])
+                writer.record(index)
+        base_path.with_suffix(".prj").write_text(CRS.from_epsg(4326).to_wkt(), encoding="utf-8")
+        # 가운데 레코드의 파트 수를 파일보다 크게 덮어써 레코드 하나만 읽을 수 없게 만듭니다.
+        shx = base_path.with_suffix(".shx").read_bytes()
+        offset = int.from_bytes(shx[108:112], "big") * 2
+        shp = bytearray(base_path.with_suffix(".shp").read_bytes())
+        shp[offset + 44:offset + 48] = (10**6).to_bytes(4, "little")
+        base_path.with_suffix(".shp").write_bytes(bytes(shp))
+
+        preview = self.service.get_preview("geo-demo", "broken.shp", "nas", limit=10)
+        self.assertEqual([feature["id"] for feature in preview["features"]], [0, 2])
+        self.assertEqual(preview["metadata"]["omitted_invalid_geometries"], 1)
+
+    def test_zoom_uses_precomputed_lod_levels(self):
+        base_path = self.demo_root / "detailed"
+        with shapefile.Writer(base_path, shapeType=shapefile.POLYGON) as writer:
+            writer.field("id", "N", size=5, decimal=0)
+            for index in range(20):
+                points = [
+                    (127 + index * 0.1 + 0.04 * math.cos(step * math.pi / 200), 37 + 0.04 * math.sin(step * math.pi / 200))
+                    for step in range(400)
+                ][::-1]
+                writer.poly([points + [points[0]]])
+                writer.record(index)
+        base_path.with_suffix(".prj").write_text(CRS.from_epsg(4326).to_wkt(), encoding="utf-8")
+
+        def coordinate_count(zoom):
+            preview = self.service.get_preview("geo-demo", "detailed.shp", "nas", zoom=zoom)
+            features = [orjson.loads(dumps(feature)) for feature in preview["features"]]
+            count = sum(len(feature["geometry"]["coordinates"][0]) for feature in features)
+            return preview["metadata"]["lod_zoom"], count
+
+        # 단계 파일이 없을 때는 같은 허용 오차로 바로 단순화해 답하고, 단계 생성은 백그라운드에 맡깁니다.
+        with mock.patch.object(self.service.lod_pyramid, "_executor") as executor:
+            self.assertEqual(coordinate_count(5)[0], 6)
+        executor.submit.assert_called_once()
+        self.service.lod_pyramid._builds.clear()
+
+        low_level, low = coordinate_count(5)
+        high_level, high = coordinate_count(13.5)
+        full_level, full = coordinate_count(18)
+        self.assertTrue(self.service.lod_pyramid.wait(timeout=30))
+        self.assertEqual((low_level, high_level, full_level), (6, 14, None))
+        self.assertLess(low, high)
+        self.assertLessEqual(high, full)
+        self.assertEqual(full, 20 * 401)
+        self.assertEqual(self.service.lod_pyramid.stats()["built"], 2)
+        self.assertEqual(self.service.lod_pyramid.stats()["building"], 0)
+
+        with mock.patch("services.lod_pyramid.project_geometries") as project:
+            self.assertEqual(coordinate_count(5), (6, low))
+            self.assertEqual(coordinate_count(5), (6, low))
+            restarted = GeospatialService(None, str(self.nas_root))
+            preview = restarted.get_preview("geo-demo", "detailed.shp", "nas", zoom=6)
+        project.assert_not_called()
+        self.assertEqual(self.service.lod_pyramid.stats()["hits"], 1)
+        self.assertEqual(restarted.lod_pyramid.stats()["loaded"], 1)
+        self.assertEqual(sum(len(feature["geometry"]["coordinates"][0]) for feature in preview["features"]), low)
+
+        points = self.service.get_preview("geo-demo", "korea-spatial-preview.zip", "nas", layer="places/major_places.shp", zoom=5)
+        self.assertIsNone(points["metadata"]["lod_zoom"])
+
     def test_zip_path_traversal_is_rejected(self):
         unsafe_archive = self.demo_root / "unsafe.zip"
         with zipfile.ZipFile(unsafe_archive, "w") as archive:
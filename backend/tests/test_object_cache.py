@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from services.object_cache import ObjectCache
+
+
+class ObjectCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.env_patch = mock.patch.dict(
+            os.environ,
+            {"OBJECT_CACHE_DIR": self.temp_dir.name, "OBJECT_CACHE_MAX_BYTES": "100"},
+        )
+        self.env_patch.start()
+        self.cache = ObjectCache()
+        self.downloads = []
+
+    def tearDown(self):
+        self.env_patch.stop()
+        self.temp_dir.cleanup()
+
+    def downloader(self, payload: bytes, delay: float = 0.0):
+        def download(target: str):
+            self.downloads.append(target)
+            time.sleep(delay)
+            Path(target).write_bytes(payload)
+
+        return download
+
+    def test_concurrent_requests_download_once(self):
+        paths = []
+
+        def load():
+            paths.append(self.cache.acquire("bucket", "a.parquet", "etag-1", self.downloader(b"x" * 10, 0.05)))
+
+        threads = [threading.Thread(target=load) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.downloads), 1)
+        self.assertEqual(len(set(paths)), 1)
+        self.assertEqual(paths[0].suffix, ".parquet")
+        self.assertEqual(self.cache.stats()["hits"], 3)
+        self.assertEqual(self.cache.stats()["pinned"], 1)
+
+    def test_new_etag_replaces_previous_version(self):
+        first = self.cache.acquire("bucket", "a.csv", "etag-1", self.downloader(b"old"))
+        self.cache.release(first)
+        second = self.cache.acquire("bucket", "a.csv", "etag-2", self.downloader(b"new"))
+
+        self.assertFalse(first.exists())
+        self.assertEqual(second.read_bytes(), b"new")
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_least_recently_used_unpinned_files_are_evicted(self):
+        pinned = self.cache.acquire("bucket", "pinned.csv", "1", self.downloader(b"p" * 40))
+        old = self.cache.acquire("bucket", "old.csv", "1", self.downloader(b"o" * 40))
+        self.cache.release(old)
+        newest = self.cache.acquire("bucket", "new.csv", "1", self.downloader(b"n" * 40))
+
+        self.assertTrue(pinned.exists())
+        self.assertFalse(old.exists())
+        self.assertTrue(newest.exists())
+        self.assertLessEqual(self.cache.stats()["bytes"], 100)
+
+        reopened = ObjectCache()
+        self.assertEqual(reopened.stats()["entries"], 2)
+
+    def test_workers_share_files_and_skip_files_pinned_elsewhere(self):
+        other_worker = ObjectCache()
+        shared = self.cache.acquire("bucket", "shared.csv", "1", self.downloader(b"s" * 60))
+        reused = other_worker.acquire("bucket", "shared.csv", "1", self.downloader(b"x" * 60))
+        self.assertEqual(reused, shared)
+        self.assertEqual(len(self.downloads), 1)
+        other_worker.release(reused)
+
+        # 다른 워커가 예산을 넘겨도 이 워커가 쓰는 파일은 지우지 못합니다.
+        extra = other_worker.acquire("bucket", "extra.csv", "1", self.downloader(b"e" * 60))
+        other_worker.release(extra)
+        self.assertTrue(shared.exists())
+
+        self.cache.release(shared)
+        newest = other_worker.acquire("bucket", "newest.csv", "1", self.downloader(b"n" * 60))
+        self.assertFalse(shared.exists())
+        self.assertTrue(newest.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from minio.error import S3Error
+
+from services.object_metadata import CountingMinioClient, ObjectMetadataCache, count_storage_calls
+
+
+class ObjectMetadataCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.minio = mock.Mock()
+        self.minio.bucket_exists.return_value = True
+
+        def stat_object(bucket, name):
+            if name.startswith("missing"):
+                raise S3Error("NoSuchKey", "", name, "", "", mock.Mock())
+            return mock.Mock(etag=f"etag-{name}", size=1)
+
+        self.minio.stat_object.side_effect = stat_object
+        self.client = CountingMinioClient(self.minio)
+
+    def make_cache(self, ttl: str = "60") -> ObjectMetadataCache:
+        with mock.patch.dict(os.environ, {"MINIO_METADATA_TTL_SECONDS": ttl}):
+            return ObjectMetadataCache(self.client)
+
+    def test_stats_and_missing_objects_are_cached_until_invalidated(self):
+        cache = self.make_cache()
+        with count_storage_calls() as calls:
+            self.assertTrue(cache.bucket_exists("bucket"))
+            self.assertTrue(cache.bucket_exists("bucket"))
+            self.assertEqual(cache.stat("bucket", "a.csv").etag, "etag-a.csv")
+            self.assertIsNone(cache.stat("bucket", "missing.parquet"))
+            self.assertIsNone(cache.stat("bucket", "missing.parquet"))
+            cache.invalidate("bucket", "missing.parquet")
+            cache.stat("bucket", "missing.parquet")
+
+        self.assertEqual(calls.as_dict(), {"bucket_exists": 1, "stat_object": 3})
+        self.assertEqual(cache.stats()["storage_calls"], {"bucket_exists": 1, "stat_object": 3})
+
+    def test_entries_expire_after_ttl(self):
+        cache = self.make_cache("0.05")
+        cache.stat("bucket", "a.csv")
+        time.sleep(0.1)
+        cache.stat("bucket", "a.csv")
+        self.assertEqual(self.minio.stat_object.call_count, 2)
+
+    def test_stat_many_runs_concurrently_and_counts_per_request(self):
+        cache = self.make_cache()
+        barrier = threading.Barrier(3, timeout=2)
+
+        def stat_object(bucket, name):
+            # 세 조회가 동시에 진행되지 않으면 barrier가 시간 초과로 깨집니다.
+            barrier.wait()
+            return mock.Mock(etag=f"etag-{name}")
+
+        self.minio.stat_object.side_effect = stat_object
+        with count_storage_calls() as calls:
+            stats = cache.stat_many("bucket", ["a", "b", "c", "a"])
+
+        self.assertEqual({name: stat.etag for name, stat in stats.items()}, {"a": "etag-a", "b": "etag-b", "c": "etag-c"})
+        self.assertEqual(calls.total, 3)
@@ -0,0 +1,84 @@
+import os
+import threading
+import unittest
+from concurrent.futures import wait
+
+import duckdb
+
+from errors import QueryCancelledError, QueryQueueFullError
+from services.dataset_registry import DatasetRegistry
+from services.query_executor import CancelToken, QueryExecutor
+
+
+class QueryExecutorTest(unittest.TestCase):
+    def setUp(self):
+        os.environ["QUERY_MAX_WORKERS"] = "1"
+        os.environ["QUERY_MAX_QUEUE_DEPTH"] = "1"
+        self.executor = QueryExecutor()
+
+    def tearDown(self):
+        self.executor.shutdown()
+        os.environ.pop("QUERY_MAX_WORKERS", None)
+        os.environ.pop("QUERY_MAX_QUEUE_DEPTH", None)
+
+    def test_saturated_executor_rejects_new_work(self):
+        release = threading.Event()
+        running = self.executor.submit(release.wait, 5)
+        queued = self.executor.submit(lambda: "queued")
+
+        with self.assertRaises(QueryQueueFullError):
+            self.executor.submit(lambda: "rejected")
+
+        release.set()
+        self.assertTrue(running.result(timeout=5))
+        self.assertEqual(queued.result(timeout=5), "queued")
+        self.assertEqual(self.executor.submit(lambda: "accepted").result(timeout=5), "accepted")
+
+    def test_cancel_token_is_passed_only_to_functions_that_take_it(self):
+        cancel_token = CancelToken()
+        self.assertEqual(self.executor.submit(next, iter([1]), cancel_token=cancel_token).result(timeout=5), 1)
+        self.assertIs(self.executor.submit(lambda cancel_token=None: cancel_token, cancel_token=cancel_token).result(timeout=5), cancel_token)
+
+        # 대기열에 있는 동안 취소된 작업은 실행하지 않습니다.
+        release = threading.Event()
+        calls = []
+        running = self.executor.submit(release.wait, 5)
+        queued = self.executor.submit(calls.append, "queued", cancel_token=cancel_token)
+        cancel_token.cancel()
+        release.set()
+        self.assertTrue(running.result(timeout=5))
+        with self.assertRaises(QueryCancelledError):
+            queued.result(timeout=5)
+        self.assertEqual(calls, [])
+
+    def test_cancel_token_interrupts_running_query(self):
+        registry = DatasetRegistry(duckdb.connect())
+        handle = registry.create("bucket", "file.csv")
+        cancel_token = CancelToken()
+        started = threading.Event()
+
+        def slow_query(cancel_token=None):
+            with handle.cursor(cancel_token) as con:
+                started.set()
+                return con.execute(
+                    "SELECT COUNT(*) FROM range(100000000000) AS t(i) WHERE i % 7 = 3"
+                ).fetchone()
+
+        future = self.executor.submit(slow_query, cancel_token=cancel_token)
+        self.assertTrue(started.wait(5))
+        # 쿼리가 시작되기 전에 도착한 interrupt는 무시되므로 종료될 때까지 다시 보냅니다.
+        for _ in range(50):
+            cancel_token.cancel()
+            if future.done() or wait([future], timeout=0.1).done:
+                break
+
+        with self.assertRaises(duckdb.InterruptException):
+            future.result(timeout=10)
+        with self.assertRaises(QueryCancelledError):
+            with handle.cursor(cancel_token):
+                pass
+        handle.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from services.result_cache import ResultCache, normalize_query
+
+
+class ResultCacheTest(unittest.TestCase):
+    def test_whitespace_inside_literals_is_kept(self):
+        self.assertEqual(normalize_query("SELECT *\n  FROM data\tWHERE id = 1 "), "SELECT * FROM data WHERE id = 1")
+        self.assertEqual(
+            normalize_query("SELECT  \"a  b\" FROM data WHERE name = 'it''s  x'"),
+            "SELECT \"a  b\" FROM data WHERE name = 'it''s  x'",
+        )
+
+        cache = ResultCache()
+        cache.put_summary("fp", "SELECT * FROM data WHERE name = 'a  b'", {"total": 1})
+        self.assertIsNone(cache.get_summary("fp", "SELECT * FROM data WHERE name = 'a b'"))
+        self.assertEqual(cache.get_summary("fp", "SELECT *  FROM data WHERE name = 'a  b'"), {"total": 1})
+
+    def test_summary_is_returned_as_copy(self):
+        cache = ResultCache()
+        summary = {"total": 3, "distributions": {"id": [1, 2]}}
+        cache.put_summary("fp", "SELECT * FROM data", summary)
+        summary["total"] = 0
+
+        cached = cache.get_summary("fp", "SELECT * FROM data")
+        cached["distributions"]["id"].append(3)
+        self.assertEqual(cache.get_summary("fp", "SELECT * FROM data"), {"total": 3, "distributions": {"id": [1, 2]}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+import unittest
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import unquote
+
+import duckdb
+import polars as pl
+
+from services.s3_reader import DuckDBS3Reader
+
+
+def httpfs_available() -> bool:
+    try:
+        duckdb.connect().execute("LOAD httpfs")
+    except duckdb.Error:
+        return False
+    return True
+
+
+class ObjectStoreHandler(BaseHTTPRequestHandler):
+    """경로 방식(/버킷/키) HEAD와 범위 GET만 지원하는 MinIO 대역."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.guard:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _object(self) -> bytes | None:
+        with self.server.guard:
+            self.server.requests += 1
+        return self.server.objects.get(unquote(self.path.split("?")[0]).lstrip("/"))
+
+    def _headers(self, status: int, length: int, extra: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", '"etag-1"')
+        self.send_header("Last-Modified", formatdate(usegmt=True))
+        self.send_header("Accept-Ranges", "bytes")
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        body = self._object()
+        if body is None:
+            self._headers(404, 0)
+            return
+        self._headers(200, len(body))
+
+    def do_GET(self):
+        body = self._object()
+        if body is None:
+            self._headers(404, 0)
+            return
+        header = self.headers.get("Range")
+        if header is None:
+            self._headers(200, len(body))
+            self.wfile.write(body)
+            return
+        start, _, end = header.removeprefix("bytes=").partition("-")
+        start, end = int(start), min(int(end or len(body) - 1), len(body) - 1)
+        chunk = body[start:end + 1]
+        self._headers(206, len(chunk), {"Content-Range": f"bytes {start}-{end}/{len(body)}"})
+        self.wfile.write(chunk)
+
+
+class DuckDBS3ReaderTest(unittest.TestCase):
+    def make_reader(self, endpoint: str, **env) -> DuckDBS3Reader:
+        with mock.patch.dict(os.environ, env):
+            return DuckDBS3Reader(duckdb.connect(), endpoint, "access", "it's-secret")
+
+    def test_secret_uses_path_style_and_escapes_credentials(self):
+        reader = self.make_reader(
+            "minio:9000", MINIO_READ_MODE="cache", MINIO_MULTI_FILE_READ_MODE="cache", S3_READ_THREADS="16"
+        )
+        statements = reader.setup_statements()
+        secret = statements[-1]
+
+        self.assertFalse(reader.enabled)
+        self.assertFalse(reader.multi_file_enabled)
+        self.assertIn("SET GLOBAL http_keep_alive = true", statements)
+        self.assertIn("SET GLOBAL threads = 16", statements)
+        self.assertIn("SECRET 'it''s-secret'", secret)
+        self.assertIn("ENDPOINT 'minio:9000'", secret)
+        self.assertIn("URL_STYLE 'path'", secret)
+        self.assertIn("USE_SSL false", secret)
+        self.assertEqual(reader.url("bucket", "/dt=1/a.parquet"), "s3://bucket/dt=1/a.parquet")
+
+    def test_s3_mode_without_endpoint_falls_back_to_cache(self):
+        reader = self.make_reader("", MINIO_READ_MODE="s3")
+        self.assertFalse(reader.enabled)
+        self.assertFalse(reader.multi_file_enabled)
+        self.assertEqual(reader.stats()["mode"], "s3")
+        self.assertIsNotNone(reader.stats()["error"])
+        # 경로를 만든 횟수만 셉니다. 실제로 읽었는지는 이 카운터로 알 수 없습니다.
+        self.assertEqual(reader.url("bucket", "/dt=1/data.parquet"), "s3://bucket/dt=1/data.parquet")
+        self.assertEqual(reader.stats()["paths_built"], 1)
+
+    @unittest.skipUnless(httpfs_available(), "DuckDB httpfs 확장이 설치되어 있지 않습니다.")
+    def test_reads_s3_urls_over_reused_connections(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "data.parquet"
+            pl.DataFrame({"id": list(range(50_000)), "value": [index % 7 for index in range(50_000)]}).write_parquet(
+                path, row_group_size=5_000
+            )
+            server = ThreadingHTTPServer(("127.0.0.1", 0), ObjectStoreHandler)
+            server.objects = {"bucket/dt=1/data.parquet": path.read_bytes()}
+            server.guard = threading.Lock()
+            server.connections = 0
+            server.requests = 0
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                reader = self.make_reader(f"127.0.0.1:{server.server_port}", MINIO_READ_MODE="s3")
+                self.assertTrue(reader.enabled, reader.error)
+                self.assertTrue(reader.multi_file_enabled)
+                # 단일 객체를 로컬 캐시로 읽는 기본 모드에서도 여러 파일 데이터셋은 s3:// 경로로 읽습니다.
+                default = self.make_reader(f"127.0.0.1:{server.server_port}", MINIO_READ_MODE="cache")
+                self.assertEqual((default.enabled, default.multi_file_enabled), (False, True))
+                url = reader.url("bucket", "dt=1/data.parquet")
+                cursor = reader.con.cursor()
+                for _ in range(3):
+                    total = cursor.execute(f"SELECT SUM(value) FROM read_parquet('{url}')").fetchone()[0]
+                    self.assertEqual(total, sum(index % 7 for index in range(50_000)))
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        # 범위 요청 여러 개가 keep-alive 연결을 다시 씁니다.
+        self.assertGreater(server.requests, 3)
+        self.assertLess(server.connections, server.requests)
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from errors import DatasetNotFoundError
+from services import data_service
+from services.data_service import DataService
+from services.shared_state import InterProcessLock, SharedStateStore
+
+
+class SharedStateTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.nas_root = self.root / "nas"
+        (self.nas_root / "tables").mkdir(parents=True)
+        self.env_patch = mock.patch.dict(
+            os.environ,
+            {
+                "SHARED_STATE_DIR": str(self.root / "state"),
+                "GEO_CACHE_DIR": str(self.root / "geo-cache"),
+                "DATAVIEWER_WORKERS": "2",
+            },
+        )
+        self.env_patch.start()
+        self.nas_patch = mock.patch.object(data_service, "NAS_ROOT_PATH", str(self.nas_root))
+        self.nas_patch.start()
+
+    def tearDown(self):
+        self.nas_patch.stop()
+        self.env_patch.stop()
+        self.temp_dir.cleanup()
+
+    def test_any_worker_serves_a_dataset_id(self):
+        lines = ["id,label"] + [f"{index},row{index}" for index in range(20)]
+        (self.nas_root / "tables" / "a.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        first_worker = DataService()
+        second_worker = DataService()
+        try:
+            details = first_worker.get_dataset_details("tables", "a.csv", "nas")
+            job_id = details["materialization"]["job_id"]
+            self.assertTrue(first_worker.materialization_queue.get(job_id).wait(timeout=30))
+
+            # 두 번째 워커는 변환 작업 상태를 공유 저장소에서 읽고, 같은 id를 Parquet 캐시로 다시 엽니다.
+            self.assertEqual(second_worker.get_materialization_status(job_id)["status"], "done")
+            result = second_worker.execute_query(details["dataset_id"], "SELECT * FROM data WHERE id >= 15")
+            self.assertEqual(result["total"], 5)
+            handle = second_worker.registry.get(details["dataset_id"])
+            self.assertIsNone(handle.materialization)
+            self.assertTrue(handle.url.endswith("a.parquet"))
+
+            with self.assertRaises(DatasetNotFoundError):
+                second_worker.execute_query("missing", "SELECT * FROM data")
+        finally:
+            first_worker.materialization_queue.shutdown(wait=True)
+            second_worker.materialization_queue.shutdown(wait=True)
+
+    def test_slow_reopen_does_not_block_other_datasets(self):
+        for name in ("a.csv", "b.csv"):
+            (self.nas_root / "tables" / name).write_text("id\n1\n2\n", encoding="utf-8")
+        first_worker = DataService()
+        second_worker = DataService()
+        release = threading.Event()
+        load = second_worker._get_or_load_dataframe
+
+        def gated_load(handle, bucket_name, file_name, *args):
+            if file_name == "a.csv":
+                release.wait(timeout=30)
+            return load(handle, bucket_name, file_name, *args)
+
+        try:
+            slow = first_worker.get_dataset_details("tables", "a.csv", "nas")["dataset_id"]
+            fast = first_worker.get_dataset_details("tables", "b.csv", "nas")["dataset_id"]
+            with mock.patch.object(second_worker, "_get_or_load_dataframe", side_effect=gated_load):
+                thread = threading.Thread(target=second_worker.execute_query, args=(slow, "SELECT * FROM data"))
+                thread.start()
+                time.sleep(0.1)
+                # a.csv를 다시 여는 동안에도 b.csv는 기다리지 않고 다시 열립니다.
+                self.assertEqual(second_worker.execute_query(fast, "SELECT * FROM data")["total"], 2)
+                self.assertTrue(thread.is_alive())
+                release.set()
+                thread.join(timeout=30)
+            self.assertEqual(second_worker._reopen_locks, {})
+        finally:
+            release.set()
+            first_worker.materialization_queue.shutdown(wait=True)
+            second_worker.materialization_queue.shutdown(wait=True)
+
+    def test_lock_excludes_other_lock_objects_on_the_same_file(self):
+        # 서로 다른 객체는 서로 다른 파일 설명자로 flock을 잡으므로 다른 프로세스와 같은 상황입니다.
+        path = self.root / "state" / "locks" / "job.lock"
+        holder, waiter = InterProcessLock(path), InterProcessLock(path)
+        events = []
+
+        def wait_for_lock():
+            with waiter:
+                events.append("waiter")
+
+        with holder:
+            thread = threading.Thread(target=wait_for_lock)
+            thread.start()
+            time.sleep(0.1)
+            events.append("holder")
+        thread.join(timeout=5)
+        self.assertEqual(events, ["holder", "waiter"])
+
+    def test_store_keeps_datasets_and_jobs(self):
+        store = SharedStateStore()
+        store.save_dataset("abc", "tables", "book.xlsx", "nas", "요약")
+        store.save_job("job-1", '{"status": "running"}')
+
+        other = SharedStateStore()
+        descriptor = other.get_dataset("abc")
+        self.assertEqual((descriptor.file_name, descriptor.sheet), ("book.xlsx", "요약"))
+        self.assertIsNone(other.get_dataset("missing"))
+        self.assertEqual(other.get_job("job-1"), '{"status": "running"}')
+        self.assertIs(store.lock("a"), store.lock("a"))
+
+    def test_unused_locks_are_released(self):
+        store = SharedStateStore()
+        held = store.lock("materialize:held")
+        for index in range(100):
+            with store.lock(f"materialize:{index}"):
+                pass
+        self.assertEqual(list(store._locks.values()), [held])
+        self.assertIs(store.lock("materialize:held"), held)
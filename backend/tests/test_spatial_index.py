@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import shapefile
+from pyproj import CRS
+
+from services.geospatial_service import GeospatialService
+from services.spatial_index import SpatialIndex, read_shape_bounds
+
+
+class SpatialIndexTest(unittest.TestCase):
+    def test_query_matches_linear_scan_after_reload(self):
+        rng = np.random.default_rng(7)
+        corners = rng.uniform(0, 1000, size=(5000, 2))
+        bounds = np.hstack([corners, corners + rng.uniform(0, 20, size=(5000, 2))])
+        bounds[::97] = np.nan
+        index = SpatialIndex.build(bounds, point_layer=False, node_size=16)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index.save(Path(temp_dir) / "index")
+            reloaded = SpatialIndex.load(Path(temp_dir) / "index")
+            self.assertEqual(len(reloaded.levels), 4)
+            for minx, miny in rng.uniform(0, 1000, size=(20, 2)):
+                query = (minx, miny, minx + 50, miny + 30)
+                expected = np.flatnonzero(
+                    (bounds[:, 2] >= query[0])
+                    & (bounds[:, 0] <= query[2])
+                    & (bounds[:, 3] >= query[1])
+                    & (bounds[:, 1] <= query[3])
+                )
+                ids, boxes = reloaded.query(*query)
+                np.testing.assert_array_equal(ids, expected)
+                np.testing.assert_array_equal(boxes, bounds[expected])
+
+    def test_sample_spreads_over_sparse_areas(self):
+        rng = np.random.default_rng(11)
+        # 레코드 대부분이 한쪽 구석에 몰려 있고, 나머지 세 구석에는 몇 개씩만 있습니다.
+        dense = rng.uniform(0, 10, size=(9000, 2))
+        sparse = np.vstack([rng.uniform(base, np.add(base, 10), size=(10, 2)) for base in ((90, 0), (0, 90), (90, 90))])
+        corners = np.vstack([dense, sparse])
+        bounds = np.hstack([corners, corners + 0.1])
+        bounds[5] = np.nan
+        index = SpatialIndex.build(bounds, point_layer=False)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index.save(Path(temp_dir) / "index")
+            sample = SpatialIndex.load(Path(temp_dir) / "index").sample(40)
+
+        self.assertEqual(len(sample), 40)
+        np.testing.assert_array_equal(sample, np.sort(sample))
+        self.assertNotIn(5, sample.tolist())
+        quadrants = {(x >= 50, y >= 50) for x, y in corners[sample]}
+        self.assertEqual(len(quadrants), 4)
+        stride = np.linspace(0, len(bounds) - 1, 40).astype(int)
+        self.assertLess(len({(x >= 50, y >= 50) for x, y in corners[stride]}), 4)
+
+    def test_bounds_are_read_from_record_headers(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base_path = Path(temp_dir) / "mixed"
+            with shapefile.Writer(base_path, shapeType=shapefile.POLYLINE) as writer:
+                writer.field("id", "N", size=5, decimal=0)
+                writer.line([[[1, 2], [3, 8]]])
+                writer.record(1)
+                writer.null()
+                writer.record(2)
+                writer.line([[[-5, -1], [0, 4], [2, -3]]])
+                writer.record(3)
+            with shapefile.Reader(base_path) as reader:
+                bounds = read_shape_bounds(base_path.with_suffix(".shp"), reader)
+                # 레코드를 여러 묶음으로 나눠 읽어도 결과가 같습니다.
+                with mock.patch("services.spatial_index.BOUNDS_CHUNK_RECORDS", 2):
+                    chunked = read_shape_bounds(base_path.with_suffix(".shp"), reader)
+
+        np.testing.assert_array_equal(bounds[[0, 2]], [[1, 2, 3, 8], [-5, -3, 2, 4]])
+        self.assertTrue(np.isnan(bounds[1]).all())
+        np.testing.assert_array_equal(chunked, bounds)
+
+
+class GeospatialSpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.layer_root = self.root / "nas" / "grid"
+        self.layer_root.mkdir(parents=True)
+        with mock.patch.dict(os.environ, {"GEO_CACHE_DIR": str(self.root / "cache")}):
+            self.service = GeospatialService(None, str(self.root / "nas"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_points(self, count: int):
+        base_path = self.layer_root / "points"
+        with shapefile.Writer(base_path, shapeType=shapefile.POINT) as writer:
+            writer.field("id", "N", size=10, decimal=0)
+            for index in range(count):
+                writer.point(126.0 + (index % 100) * 0.01, 36.0 + (index // 100) * 0.01)
+                writer.record(index)
+        base_path.with_suffix(".prj").write_text(CRS.from_epsg(4326).to_wkt(), encoding="utf-8")
+
+    def preview(self, bbox):
+        return self.service.get_preview("grid", "points.shp", "nas", bbox=bbox, limit=100)
+
+    def test_bbox_preview_uses_persisted_index_until_source_changes(self):
+        self.write_points(1000)
+        preview = self.preview((126.205, 36.015, 126.235, 36.035))
+        self.assertEqual([feature["id"] for feature in preview["features"]], [221, 222, 223, 321, 322, 323])
+        self.assertEqual(self.service.spatial_indexes.stats()["built"], 1)
+
+        index_dirs = list((self.root / "cache").glob("*/index/*"))
+        self.assertEqual(len(index_dirs), 1)
+        self.assertTrue((index_dirs[0] / "order.npy").exists())
+
+        self.preview((126.0, 36.0, 126.05, 36.05))
+        self.assertEqual(self.service.spatial_indexes.stats()["hits"], 1)
+
+        # 새 서비스(재시작한 워커)는 인덱스를 다시 만들지 않고 디스크에서 엽니다.
+        with mock.patch.dict(os.environ, {"GEO_CACHE_DIR": str(self.root / "cache")}):
+            restarted = GeospatialService(None, str(self.root / "nas"))
+        restarted.get_preview("grid", "points.shp", "nas", bbox=(126.0, 36.0, 126.05, 36.05), limit=100)
+        self.assertEqual(restarted.spatial_indexes.stats()["loaded"], 1)
+        self.assertEqual(restarted.spatial_indexes.stats()["built"], 0)
+
+        # 원본이 바뀌면 지문이 달라져 캐시 디렉터리와 함께 인덱스를 다시 만듭니다.
+        self.write_points(2000)
+        preview = self.preview((126.985, 36.185, 126.995, 36.195))
+        self.assertEqual([feature["id"] for feature in preview["features"]], [1999])
+        self.assertEqual(self.service.spatial_indexes.stats()["built"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import orjson
+import polars as pl
+import pyarrow as pa
+
+from services.table_encoding import (
+    ARROW_PAYLOAD_METADATA_KEY,
+    ARROW_STREAM_MEDIA_TYPE,
+    TableData,
+    dumps,
+    encode_table_payload,
+    frame_to_json,
+)
+
+
+class TableEncodingTest(unittest.TestCase):
+    def setUp(self):
+        self.frame = pl.DataFrame(
+            {
+                "id": [1, None],
+                "score": [float("nan"), 2.5],
+                "name": ["서울 \"중구\"", None],
+                "day": [date(2024, 1, 2), None],
+                "at": [datetime(2024, 1, 2, 3, 4, 5), None],
+                "clock": [time(1, 2, 3), None],
+                "elapsed": [timedelta(seconds=90), None],
+                "amount": [Decimal("1.50"), None],
+                "tags": [["a", "b"], None],
+            }
+        )
+
+    def test_json_matches_row_encoding(self):
+        rows = orjson.loads(frame_to_json(self.frame))
+        self.assertEqual(
+            rows[0],
+            {
+                "id": 1,
+                "score": None,
+                "name": "서울 \"중구\"",
+                "day": "2024-01-02",
+                "at": "2024-01-02T03:04:05",
+                "clock": "01:02:03",
+                "elapsed": 90.0,
+                "amount": 1.5,
+                "tags": ["a", "b"],
+            },
+        )
+        self.assertEqual({key for key, value in rows[1].items() if value is not None}, {"score"})
+
+    def test_unsupported_types_fall_back_to_rows(self):
+        frame = pl.DataFrame({"raw": [b"ab", None], "nested": [[datetime(2024, 1, 2)], []]})
+        self.assertEqual(
+            orjson.loads(frame_to_json(frame)),
+            [{"raw": "ab", "nested": ["2024-01-02T00:00:00"]}, {"raw": None, "nested": []}],
+        )
+
+    def test_table_data_reads_like_rows_and_embeds_json(self):
+        table_data = TableData(self.frame.select("id", "name"))
+        self.assertEqual(len(table_data), 2)
+        self.assertEqual(table_data[0], {"id": 1, "name": "서울 \"중구\""})
+        self.assertEqual(table_data, [{"id": 1, "name": "서울 \"중구\""}, {"id": None, "name": None}])
+        payload = orjson.loads(dumps({"tableData": table_data, "total": 2}))
+        self.assertEqual(payload["tableData"], list(table_data))
+
+    def test_arrow_stream_carries_payload_metadata(self):
+        payload = {"columns": self.frame.columns, "tableData": TableData(self.frame), "total": 2}
+
+        body, media_type = encode_table_payload(payload, "application/json")
+        self.assertEqual(media_type, "application/json")
+        self.assertEqual(orjson.loads(body)["total"], 2)
+
+        body, media_type = encode_table_payload(payload, f"{ARROW_STREAM_MEDIA_TYPE}, application/json;q=0.5")
+        self.assertEqual(media_type, ARROW_STREAM_MEDIA_TYPE)
+        table = pa.ipc.open_stream(body).read_all()
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.schema.field("name").type, pa.large_string())
+        metadata = orjson.loads(table.schema.metadata[ARROW_PAYLOAD_METADATA_KEY.encode("utf-8")])
+        self.assertEqual(metadata, {"columns": self.frame.columns, "total": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
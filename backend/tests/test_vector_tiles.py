@@ -0,0 +1,183 @@
+import math
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import shapefile
+from pyproj import CRS, Transformer
+from shapely.geometry import LineString, Point, Polygon
+
+from errors import GeospatialDataError
+from scripts.create_geo_demo import build_demo
+from services.geospatial_service import GeospatialService
+from services.mvt import TileLayer, encode_tile
+
+
+def read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, position
+
+
+def read_message(data: bytes) -> list[tuple[int, object]]:
+    """테스트용 최소 protobuf 파서. (필드 번호, 값) 목록을 돌려줍니다."""
+    fields = []
+    position = 0
+    while position < len(data):
+        key, position = read_varint(data, position)
+        number, wire_type = key >> 3, key & 0x7
+        if wire_type == 0:
+            value, position = read_varint(data, position)
+        elif wire_type == 1:
+            value, position = data[position:position + 8], position + 8
+        else:
+            length, position = read_varint(data, position)
+            value, position = data[position:position + length], position + length
+        fields.append((number, value))
+    return fields
+
+
+def read_packed(data: bytes) -> list[int]:
+    values = []
+    position = 0
+    while position < len(data):
+        value, position = read_varint(data, position)
+        values.append(value)
+    return values
+
+
+def decode_tile(data: bytes) -> dict[str, list[dict]]:
+    layers = {}
+    for number, layer_bytes in read_message(data):
+        assert number == 3
+        layer = read_message(layer_bytes)
+        name = next(value for field, value in layer if field == 1).decode("utf-8")
+        keys = [value.decode("utf-8") for field, value in layer if field == 3]
+        values = []
+        for field, value in layer:
+            if field == 4:
+                value_field, raw = read_message(value)[0]
+                values.append(raw.decode("utf-8") if value_field == 1 else raw)
+        features = []
+        for field, value in layer:
+            if field != 2:
+                continue
+            feature = dict(read_message(value))
+            tags = read_packed(feature.get(2, b""))
+            features.append(
+                {
+                    "id": feature.get(1),
+                    "type": feature[3],
+                    "geometry": read_packed(feature[4]),
+                    "properties": {keys[tags[i]]: values[tags[i + 1]] for i in range(0, len(tags), 2)},
+                }
+            )
+        layers[name] = features
+    return layers
+
+
+def tile_for(longitude: float, latitude: float, z: int) -> tuple[int, int]:
+    n = 1 << z
+    x = int((longitude + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2 * n)
+    return x, y
+
+
+class MvtEncoderTest(unittest.TestCase):
+    def test_geometry_commands_follow_spec(self):
+        layer = TileLayer("demo")
+        layer.add_feature(Point(25, 17), {"name": "a"}, 1)
+        layer.add_feature(LineString([(2, 2), (2, 10), (10, 10)]), {"name": "a", "value": 3}, 2)
+        # 넓이가 음수인 방향으로 넣어도 외곽 링 방향(타일 좌표에서 넓이 양수)으로 바뀌어야 합니다.
+        layer.add_feature(Polygon([(3, 6), (8, 12), (5, 6), (3, 6)]), {}, 3)
+        features = decode_tile(encode_tile([layer]))["demo"]
+
+        self.assertEqual(features[0]["geometry"], [9, 50, 34])
+        self.assertEqual(features[1]["geometry"], [9, 4, 4, 18, 0, 16, 16, 0])
+        self.assertEqual(features[1]["properties"], {"name": "a", "value": b"\x03"[0]})
+        self.assertEqual(features[2]["geometry"], [9, 6, 12, 18, 4, 0, 6, 12, 15])
+        self.assertEqual([feature["type"] for feature in features], [1, 2, 3])
+
+    def test_empty_layers_are_omitted(self):
+        layer = TileLayer("empty")
+        self.assertFalse(layer.add_feature(Polygon([(1, 1), (1, 1), (1, 1)]), {}))
+        self.assertEqual(encode_tile([layer]), b"")
+
+
+class VectorTileServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.demo_root = self.root / "nas" / "geo-demo"
+        build_demo(self.demo_root, announce=False)
+        with mock.patch.dict(os.environ, {"GEO_CACHE_DIR": str(self.root / "cache")}):
+            self.service = GeospatialService(None, str(self.root / "nas"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_tiles_are_clipped_to_tile_and_cached(self):
+        world = decode_tile(self.service.get_tile("geo-demo", "korea-spatial-preview.zip", "nas", None, 0, 0, 0))
+        self.assertEqual(len(world["regions"]), 3)
+        self.assertEqual(world["regions"][0]["properties"]["name"], "서울권")
+        self.assertEqual({feature["type"] for feature in world["regions"]}, {3})
+
+        x, y = tile_for(126.978, 37.5665, 12)
+        tile = self.service.get_tile(
+            "geo-demo", "korea-spatial-preview.zip", "nas", "places/major_places.shp", 12, x, y, ["name"]
+        )
+        names = {feature["properties"]["name"] for feature in decode_tile(tile)["major_places"]}
+        self.assertIn("광화문", names)
+        self.assertNotIn("부산역", names)
+        self.assertEqual(self.service.get_tile("geo-demo", "regions.shp", "nas", None, 12, 0, 0), b"")
+
+        rendered = self.service.tile_builder.stats()["rendered"]
+        cached = self.service.get_tile(
+            "geo-demo", "korea-spatial-preview.zip", "nas", "places/major_places.shp", 12, x, y, ["name"]
+        )
+        self.assertEqual(cached, tile)
+        self.assertEqual(self.service.tile_builder.stats()["rendered"], rendered)
+        self.assertEqual(self.service.tile_builder.stats()["hits"], 1)
+
+    def test_tile_cache_is_dropped_with_dataset_cache(self):
+        self.assertEqual(len(decode_tile(self.service.get_tile("geo-demo", "regions.shp", "nas", None, 0, 0, 0))["regions"]), 3)
+        self.assertEqual(len(list((self.root / "cache").rglob("*.mvt"))), 1)
+
+        # 원본이 바뀌면 데이터셋 캐시 디렉터리와 함께 이전 타일도 지워집니다.
+        with shapefile.Writer(self.demo_root / "regions", shapeType=shapefile.POINT) as writer:
+            writer.field("name", "C", size=30)
+            writer.point(127.0, 37.5)
+            writer.record("변경됨")
+        changed = decode_tile(self.service.get_tile("geo-demo", "regions.shp", "nas", None, 0, 0, 0))
+        self.assertEqual([feature["properties"]["name"] for feature in changed["regions"]], ["변경됨"])
+        self.assertEqual(len(list((self.root / "cache").rglob("*.mvt"))), 1)
+
+    def test_dense_layers_are_thinned_per_pixel(self):
+        base_path = self.demo_root / "dense_points"
+        to_projected = Transformer.from_crs(4326, 5186, always_xy=True)
+        with shapefile.Writer(base_path, shapeType=shapefile.POINT) as writer:
+            writer.field("id", "N", size=10, decimal=0)
+            for index in range(2000):
+                writer.point(*to_projected.transform(127.0 + (index % 50) * 0.001, 37.5 + (index // 50) * 0.001))
+                writer.record(index)
+        base_path.with_suffix(".prj").write_text(CRS.from_epsg(5186).to_wkt(), encoding="utf-8")
+
+        low = self.service.get_tile("geo-demo", "dense_points.shp", "nas", None, 4, *tile_for(127.02, 37.52, 4))
+        x, y = tile_for(127.02, 37.52, 15)
+        high = self.service.get_tile("geo-demo", "dense_points.shp", "nas", None, 15, x, y)
+
+        self.assertLessEqual(len(decode_tile(low)["dense_points"]), 2)
+        self.assertGreater(len(decode_tile(high)["dense_points"]), 100)
+        with self.assertRaises(GeospatialDataError):
+            self.service.get_tile("geo-demo", "dense_points.shp", "nas", None, 3, 8, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
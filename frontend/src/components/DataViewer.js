@@ -36,10 +36,13 @@ class DataViewer {
         this.pageSize = 10
         this.currentPage = 1
         this.totalRows = 0
+        this.totalEstimated = false
+        this.materializationJobId = null
         this.totalPages = 0
         this.sortColumn = null
         this.sortDirection = null
         this.bucket_name = null;
+        this.datasetId = null;
         this.file_name = null;
         this.storage = null
         this.isGeospatial = false
@@ -81,6 +84,30 @@ class DataViewer {
         }
     }
 
+    async readServerEvents(response, onEvent) {
+        const reader = response.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ''
+        while (true) {
+            const { value, done } = await reader.read()
+            if (done) break
+            buffer += decoder.decode(value, { stream: true })
+            let boundary = buffer.indexOf('\n\n')
+            while (boundary !== -1) {
+                const block = buffer.slice(0, boundary)
+                buffer = buffer.slice(boundary + 2)
+                let event = 'message'
+                let data = ''
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('event: ')) event = line.slice(7)
+                    else if (line.startsWith('data: ')) data += line.slice(6)
+                }
+                await onEvent(event, data ? JSON.parse(data) : {})
+                boundary = buffer.indexOf('\n\n')
+            }
+        }
+    }
+
     initializeElements() {
         this.container.innerHTML = `
             <div class="loading-overlay">
@@ -90,6 +117,10 @@ class DataViewer {
                 <header class="viewer-header">
                     <h3>DataViewer</h3>
                     <p id="viewerFileName" class="viewer-file-name"></p>
+                    <label id="sheetControl" class="sheet-control" hidden>
+                        <span>시트</span>
+                        <select id="sheetSelect"></select>
+                    </label>
                 </header>
                 <div id="querySection" class="query-section">
                     <button id="toggleQueryButton" class="execute-button small-toggle">쿼리 실행</button>
@@ -210,6 +241,8 @@ class DataViewer {
         this.toggleQueryButton = this.container.querySelector('#toggleQueryButton');
         this.queryInputWrapper = this.container.querySelector('.query-input-wrapper');
         this.viewerFileName = this.container.querySelector('#viewerFileName')
+        this.sheetControl = this.container.querySelector('#sheetControl')
+        this.sheetSelect = this.container.querySelector('#sheetSelect')
         this.querySection = this.container.querySelector('#querySection')
         this.geoSection = this.container.querySelector('#geoSection')
         this.geoMapPanel = this.container.querySelector('#geoMapPanel')
@@ -296,6 +329,9 @@ class DataViewer {
             this.fitSelectedLayer()
             this.loadMapPreview({ useBounds: false })
         })
+        this.sheetSelect.addEventListener('change', () => {
+            this.loadDataset(this.bucket_name, this.file_name, this.storage, this.sheetSelect.value)
+        })
         this.geoLayerSelect.addEventListener('change', () => {
             this.selectedGeoLayer = this.geoLayerSelect.value
             this.fitSelectedLayer()
@@ -328,8 +364,8 @@ class DataViewer {
         }, 200);
     }
 
-    async loadDataset(bucketName, fileName, storage) {
-        console.log('loadDataset', bucketName, fileName, storage)
+    async loadDataset(bucketName, fileName, storage, sheet = null) {
+        console.log('loadDataset', bucketName, fileName, storage, sheet)
         this.showLoading();
         this.loading = true
         this.error = null
@@ -344,7 +380,8 @@ class DataViewer {
                 body: JSON.stringify({
                     bucket_name: bucketName,
                     file_name: fileName,
-                    type: storage || ''
+                    type: storage || '',
+                    sheet
                 })
             })
 
@@ -358,11 +395,15 @@ class DataViewer {
                 this.tableData = data.tableData
                 this.distributions = data.distributions
                 this.totalRows = data.total
+                this.totalEstimated = Boolean(data.total_estimated)
                 this.totalPages = Math.ceil(this.totalRows / this.pageSize)
                 this.bucket_name = bucketName
+                this.datasetId = data.dataset_id || null
+                this.materializationJobId = data.materialization?.job_id || null
                 this.file_name = fileName
                 this.storage = storage || ''
                 this.viewerFileName.textContent = fileName
+                this.updateSheetOptions(data.sheets || [], data.sheet)
                 this.isGeospatial = data.dataset_type === 'geospatial'
 
                 if (this.isGeospatial) {
@@ -379,6 +420,9 @@ class DataViewer {
                 await this.updateTable()
                 this.updatePagination()
                 this.sendHeightToParent()
+                if (this.materializationJobId) {
+                    this.watchMaterialization(this.materializationJobId)
+                }
             }
         } catch (err) {
             console.error(err)
@@ -389,6 +433,44 @@ class DataViewer {
         }
     }
 
+    updateSheetOptions(sheets, selectedSheet) {
+        this.sheetSelect.innerHTML = ''
+        sheets.forEach(sheet => {
+            const option = document.createElement('option')
+            option.value = sheet
+            option.textContent = sheet
+            option.selected = sheet === selectedSheet
+            this.sheetSelect.appendChild(option)
+        })
+        this.sheetControl.hidden = sheets.length <= 1
+    }
+
+    async watchMaterialization(jobId) {
+        // 원본 CSV/Excel을 Parquet으로 변환하는 동안 상태를 확인하고, 끝나면 추정 건수를 정확한 건수로 바꿉니다.
+        // 다른 데이터셋을 열거나 쿼리를 실행하면 materializationJobId가 바뀌어 더 이상 반영하지 않습니다.
+        while (this.materializationJobId === jobId) {
+            await new Promise(resolve => setTimeout(resolve, 2000))
+            let job
+            try {
+                const response = await fetch(`${this.apiPrefix}/jobs/${jobId}`)
+                if (!response.ok) return
+                job = await response.json()
+            } catch (error) {
+                return
+            }
+            if (job.status === 'failed') return
+            if (job.status === 'done') {
+                if (this.materializationJobId === jobId && job.rows !== null) {
+                    this.totalRows = job.rows
+                    this.totalEstimated = false
+                    this.totalPages = Math.ceil(this.totalRows / this.pageSize)
+                    this.updatePagination()
+                }
+                return
+            }
+        }
+    }
+
     async setupGeospatialDataset(data) {
         this.geoMetadata = data.map
         this.selectedGeoLayer = data.map.selected_layer
@@ -472,7 +554,7 @@ class DataViewer {
             type: this.storage || '',
             layer: this.selectedGeoLayer,
             limit: this.geoPreviewLimit,
-            simplify_tolerance: this.getMapSimplificationTolerance(),
+            zoom: this.map.getZoom(),
         }
         if (useBounds) {
             const bounds = this.map.getBounds()
@@ -584,12 +666,6 @@ class DataViewer {
         this.geoCrsStatus.textContent = metadata.crs_warning || metadata.source_crs || ''
     }
 
-    getMapSimplificationTolerance() {
-        if (!this.map) return 0
-        const zoom = this.map.getZoom()
-        return Math.min(5, 360 / (256 * Math.pow(2, zoom)) * 1.5)
-    }
-
     async executeQuery() {
         if (!this.bucket_name) {
             this.showError('미리보기 할 수 없는 데이터입니다. 관리자에게 문의해주세요')
@@ -614,13 +690,15 @@ class DataViewer {
         this.error = null
 
         try {
-            const response = await fetch(`${this.apiPrefix}/query`, {
+            this.materializationJobId = null
+            const response = await fetch(`${this.apiPrefix}/query/stream`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
                     query: query,
+                    dataset_id: this.datasetId,
                     bucket_name: this.bucket_name,
                     page: this.currentPage,
                     page_size: this.pageSize,
@@ -631,19 +709,32 @@ class DataViewer {
                 throw new Error(await this.getResponseErrorMessage(response, '미리보기 할 수 없는 데이터입니다. 관리자에게 문의해주세요'))
             }
 
-            const data = await response.json()
-            
-            if (data.tableData) {
-                this.tableData = data.tableData
-                this.totalRows = data.total
-                this.columns = data.columns
-                this.distributions = data.distributions
-                this.totalPages = Math.ceil(this.totalRows / this.pageSize)
-                
-                await this.updateTable()
-                this.updatePagination()
-                this.sendHeightToParent()
-            }
+            // 첫 행과 추정 건수를 먼저 그리고, 정확한 건수와 분포는 도착하는 대로 갱신합니다.
+            await this.readServerEvents(response, async (event, data) => {
+                if (event === 'preview') {
+                    this.tableData = data.tableData
+                    this.columns = data.columns
+                    this.distributions = {}
+                    this.totalRows = data.total
+                    this.totalEstimated = data.total_estimated
+                    this.totalPages = Math.ceil(this.totalRows / this.pageSize)
+                    await this.updateTable()
+                    this.updatePagination()
+                    this.sendHeightToParent()
+                    this.hideLoading()
+                } else if (event === 'total') {
+                    this.totalRows = data.total
+                    this.totalEstimated = false
+                    this.totalPages = Math.ceil(this.totalRows / this.pageSize)
+                    this.updatePagination()
+                } else if (event === 'distributions') {
+                    this.distributions = data.distributions
+                    await this.updateTable()
+                    this.sendHeightToParent()
+                } else if (event === 'error') {
+                    throw new Error(data.detail || '미리보기 할 수 없는 데이터입니다. 관리자에게 문의해주세요')
+                }
+            })
         } catch (error) {
             console.error('Query execution error:', error)
             this.showError(error.message || '미리보기 할 수 없는 데이터입니다. 관리자에게 문의해주세요')
@@ -665,6 +756,7 @@ class DataViewer {
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
                     query: query,
+                    dataset_id: this.datasetId,
                     bucket_name: this.bucket_name
                 })
             })
@@ -706,6 +798,7 @@ class DataViewer {
                 },
                 body: JSON.stringify({
                     query: this.queryInput.value,
+                    dataset_id: this.datasetId,
                     bucket_name: this.bucket_name,
                     page: page,
                     page_size: this.pageSize,
@@ -1073,7 +1166,9 @@ class DataViewer {
     updatePagination() {
         this.totalPages = Math.max(1, this.totalPages || 1)
         
-        this.totalRowsElement.textContent = `총 ${this.totalRows.toLocaleString()}건`
+        this.totalRowsElement.textContent = this.totalEstimated
+            ? `약 ${this.totalRows.toLocaleString()}건 (집계 중)`
+            : `총 ${this.totalRows.toLocaleString()}건`
         this.pageInfo.textContent = `${this.currentPage.toLocaleString()} / ${this.totalPages.toLocaleString()}`
         this.prevButton.disabled = this.currentPage <= 1
         this.nextButton.disabled = this.currentPage >= this.totalPages